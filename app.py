@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
-import time
-import requests
+from sensor_repository import get_repository
+import perf_metrics
+from realtime_listener import ChangeListener, realtime_url
+from downsample import target_points, HALF_CHART_WIDTH, FULL_CHART_WIDTH
+from sensor_charts import sensor_figures, explore_figure, device_figure
+from sensor_tiles import LEVEL_LABELS
 
 # 페이지 설정
 st.set_page_config(
@@ -21,144 +23,258 @@ except KeyError:
     st.error("❌ Supabase 설정이 없습니다. secrets.toml을 확인해주세요.")
     st.stop()
 
-@st.cache_data(ttl=30)  # 30초마다 캐시 갱신
-def load_data(hours=24):
-    """환경 센서 데이터 로드"""
-    try:
-        time_threshold = datetime.now() - timedelta(hours=hours)
-        
-        headers = {
-            'apikey': SUPABASE_KEY,
-            'Authorization': f'Bearer {SUPABASE_KEY}',
-            'Content-Type': 'application/json'
-        }
-        
-        url = f"{SUPABASE_URL}/rest/v1/maintable2"
-        params = {
-            'created_at': f'gte.{time_threshold.isoformat()}',
-            'order': 'created_at.asc'
-        }
-        
-        response = requests.get(url, headers=headers, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            if data:
-                df = pd.DataFrame(data)
-                df['created_at'] = pd.to_datetime(df['created_at'])
-                return df
-            else:
-                return pd.DataFrame()
-        else:
-            st.error(f"API 요청 실패: {response.status_code}")
-            return pd.DataFrame()
-            
-    except Exception as e:
-        st.error(f"데이터 로드 오류: {e}")
-        return pd.DataFrame()
+@st.cache_resource
+def get_change_listener():
+    # 프로세스당 하나, maintable2 INSERT를 Realtime으로 받음
+    return ChangeListener(realtime_url(SUPABASE_URL), SUPABASE_KEY, tables=('maintable2',)).start()
 
-def main():
-    # 헤더
-    st.title("🌡️ 실시간 환경 모니터링 대시보드")
-    st.markdown("---")
-    
-    # 사이드바
-    with st.sidebar:
-        st.header("⚙️ 설정")
-        
-        time_options = {
-            "최근 1시간": 1,
-            "최근 6시간": 6,
-            "최근 12시간": 12,
-            "최근 24시간": 24,
-            "최근 3일": 72
-        }
-        selected_time = st.selectbox("데이터 범위", list(time_options.keys()), index=3)
-        hours = time_options[selected_time]
-        
-        auto_refresh = st.checkbox("자동 새로고침", value=True)
-        
-        if st.button("🔄 새로고침"):
-            st.cache_data.clear()
-    
-    # 데이터 로드
-    df = load_data(hours)
-    
+def get_sensor_repository(device_id=None):
+    # 프로세스당 하나(장치를 고르면 장치별로 하나), 모든 세션과 다른 앱이 같은 수집/캐시/스냅샷을 공유
+    return get_repository(SUPABASE_URL, SUPABASE_KEY, listener=get_change_listener(), device_id=device_id)
+
+def load_data(hours=24, show_error=True, device_id=None):
+    """환경 센서 데이터 로드 (created_at 오름차순, 공유 스냅샷에서 구간만 잘라 읽음)"""
+    repo = get_sensor_repository(device_id)
+    if show_error and repo.error() is not None:
+        st.error(f"데이터 로드 오류: {repo.error()}")
+    return repo.window(hours)
+
+# 패널별 자동 새로고침 주기(초) - 각 fragment만 다시 실행되고 나머지 화면은 그대로
+METRICS_REFRESH = 10
+CHARTS_REFRESH = 30
+# 장치별 격자의 열 개수
+GRID_COLUMNS = 3
+ALL_DEVICES = "전체 (장치별 보기)"
+
+def render_metrics(hours, device_id=None):
+    """현재값 메트릭"""
+    df = load_data(hours, device_id=device_id)
     if df.empty:
         st.warning("📭 데이터가 없습니다. ESP8266이 작동 중인지 확인해주세요.")
-        st.stop()
+        return
     
-    # 메트릭 표시
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        temp = df['temperature'].iloc[-1] if not df.empty else 0
+        temp = df['temperature'].iloc[-1]
         st.metric("현재 온도", f"{temp:.1f}°C")
     
     with col2:
-        humidity = df['humidity'].iloc[-1] if not df.empty else 0
+        humidity = df['humidity'].iloc[-1]
         st.metric("현재 습도", f"{humidity:.1f}%")
     
     with col3:
-        light = df['light'].iloc[-1] if not df.empty else 0
-        st.metric("현재 조도", f"{light}%")
+        light = df['light'].iloc[-1]
+        st.metric("현재 조도", f"{light:g}%")
     
     with col4:
         data_count = len(df)
         st.metric("데이터 개수", f"{data_count}개")
+
+def render_recent_table(hours, device_id=None):
+    """최근 측정 데이터 테이블"""
+    df = load_data(hours, show_error=False, device_id=device_id)
+    if df.empty:
+        return
+    
+    st.subheader("📋 최근 측정 데이터")
+    # 오름차순이므로 마지막 10행을 뒤집기만 하면 최신순 (정렬 불필요)
+    recent_data = df[['created_at', 'temperature', 'humidity', 'light']].iloc[:-11:-1]
+    recent_data['created_at'] = recent_data['created_at'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    recent_data.columns = ['시간', '온도(°C)', '습도(%)', '조도(%)']
+    st.dataframe(recent_data, use_container_width=True)
+
+def render_charts(hours, device_id=None):
+    """온도/습도/조도/종합 차트"""
+    df = load_data(hours, show_error=False, device_id=device_id)
+    if df.empty:
+        return
+    
+    # 긴 구간은 원본 대신 차트 해상도를 채우는 가장 굵은 집계(1분/10분/1시간)를 사용
+    with perf_metrics.span('store.chart_frame'):
+        chart_source = get_sensor_repository(device_id).chart_frame(hours, target_points(HALF_CHART_WIDTH))
+    if chart_source is None:
+        chart_source = df
+    
+    # 다운샘플링/트레이스 생성은 데이터 버전별로 한 번만 (세션 간 공유, 점이 많으면 WebGL)
+    with perf_metrics.span('figure.build'):
+        figures = sensor_figures(chart_source, target_points(HALF_CHART_WIDTH), target_points(FULL_CHART_WIDTH))
     
     # 메인 차트들
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("🌡️ 온도 변화")
-        fig_temp = px.line(df, x='created_at', y='temperature',
-                          title="온도 추이",
-                          labels={'created_at': '시간', 'temperature': '온도 (°C)'})
-        fig_temp.update_traces(line_color='red')
-        st.plotly_chart(fig_temp, use_container_width=True)
+        with perf_metrics.span('render.plotly_chart'):
+            st.plotly_chart(figures['temperature'], use_container_width=True)
     
     with col2:
         st.subheader("💧 습도 변화")
-        fig_hum = px.line(df, x='created_at', y='humidity',
-                         title="습도 추이",
-                         labels={'created_at': '시간', 'humidity': '습도 (%)'})
-        fig_hum.update_traces(line_color='blue')
-        st.plotly_chart(fig_hum, use_container_width=True)
+        with perf_metrics.span('render.plotly_chart'):
+            st.plotly_chart(figures['humidity'], use_container_width=True)
     
     # 조도 차트
     st.subheader("💡 조도 변화")
-    fig_light = px.line(df, x='created_at', y='light',
-                       title="조도 추이",
-                       labels={'created_at': '시간', 'light': '조도 (%)'})
-    fig_light.update_traces(line_color='orange')
-    st.plotly_chart(fig_light, use_container_width=True)
+    with perf_metrics.span('render.plotly_chart'):
+        st.plotly_chart(figures['light'], use_container_width=True)
     
     # 복합 차트
     st.subheader("📊 종합 환경 데이터")
-    fig_combined = go.Figure()
+    with perf_metrics.span('render.plotly_chart'):
+        st.plotly_chart(figures['combined'], use_container_width=True)
+
+def render_device_grid(hours):
+    """장치별 작은 차트 격자 (장치마다 조회하지 않고 전체 장치를 한 번 받은 스냅샷을 나눠 그림)"""
+    repo = get_sensor_repository()
+    if repo.error() is not None:
+        st.error(f"데이터 로드 오류: {repo.error()}")
+    frames = repo.by_device(hours)
+    if not frames:
+        st.warning("📭 데이터가 없습니다. ESP8266이 작동 중인지 확인해주세요.")
+        return
     
-    fig_combined.add_trace(go.Scatter(x=df['created_at'], y=df['temperature'],
-                                    mode='lines', name='온도 (°C)', line=dict(color='red')))
-    fig_combined.add_trace(go.Scatter(x=df['created_at'], y=df['humidity'],
-                                    mode='lines', name='습도 (%)', line=dict(color='blue')))
-    fig_combined.add_trace(go.Scatter(x=df['created_at'], y=df['light'],
-                                    mode='lines', name='조도 (%)', line=dict(color='orange')))
+    st.subheader(f"📟 장치별 현황 ({len(frames)}대)")
+    points = target_points(FULL_CHART_WIDTH // GRID_COLUMNS)
+    items = list(frames.items())
+    for i in range(0, len(items), GRID_COLUMNS):
+        for col, (device_id, df) in zip(st.columns(GRID_COLUMNS), items[i:i + GRID_COLUMNS]):
+            with col, st.container(border=True):
+                latest = df.iloc[-1]
+                st.markdown(f"**{device_id}**")
+                st.caption(
+                    f"🌡️ {latest['temperature']:.1f}°C · 💧 {latest['humidity']:.1f}% · "
+                    f"💡 {latest['light']:g}% · {len(df)}개"
+                )
+                with perf_metrics.span('figure.build'):
+                    fig = device_figure(df, points)
+                with perf_metrics.span('render.plotly_chart'):
+                    st.plotly_chart(fig, use_container_width=True, key=f"device_grid_{device_id}")
+
+def _set_explore_range(start, end):
+    """탐색 구간 위젯 값 갱신 (위젯이 그려지기 전, 콜백이나 render_explorer 맨 앞에서만 호출)"""
+    state = st.session_state
+    state.explore_start_date, state.explore_start_time = start.date(), start.time()
+    state.explore_end_date, state.explore_end_time = end.date(), end.time()
+
+def _explore_range():
+    state = st.session_state
+    start = pd.Timestamp(datetime.combine(state.explore_start_date, state.explore_start_time), tz='UTC')
+    end = pd.Timestamp(datetime.combine(state.explore_end_date, state.explore_end_time), tz='UTC')
+    return start, end
+
+def _reset_explore_range(hours=24):
+    end = pd.Timestamp.now(tz='UTC').ceil('min')
+    _set_explore_range(end - timedelta(hours=hours), end)
+
+def _zoom_out_explore_range(factor=4):
+    start, end = _explore_range()
+    center, half = start + (end - start) / 2, (end - start) * factor / 2
+    _set_explore_range(center - half, min(center + half, pd.Timestamp.now(tz='UTC').ceil('min')))
+
+def render_explorer(device_id=None):
+    """기간 탐색: 시작/끝을 지정하거나 차트를 드래그해서 확대 (구간 길이에 맞는 해상도로 다시 조회)"""
+    state = st.session_state
+    if 'explore_start_date' not in state:
+        _reset_explore_range()
     
-    fig_combined.update_layout(title="환경 데이터 종합", xaxis_title="시간", yaxis_title="값")
-    st.plotly_chart(fig_combined, use_container_width=True)
+    # 차트에서 드래그한 구간(box select)이 새로 들어왔으면 그 구간으로 확대
+    selection = state.get('explore_chart')
+    boxes = selection.selection.box if selection and selection.selection else []
+    if boxes and boxes[0] != state.get('_explore_applied_box'):
+        state['_explore_applied_box'] = boxes[0]
+        # date 축은 'YYYY-MM-DD HH:MM:SS' 문자열, 숫자로 오면 epoch ms
+        x0, x1 = sorted(
+            pd.Timestamp(v, unit='ms', tz='UTC') if isinstance(v, (int, float)) else pd.Timestamp(v, tz='UTC')
+            for v in boxes[0]['x']
+        )
+        if x1 > x0:
+            _set_explore_range(x0.floor('s'), x1.ceil('s'))
     
-    # 최근 데이터 테이블
-    st.subheader("📋 최근 측정 데이터")
-    recent_data = df.tail(10)[['created_at', 'temperature', 'humidity', 'light']].sort_values('created_at', ascending=False)
-    recent_data['created_at'] = recent_data['created_at'].dt.strftime('%Y-%m-%d %H:%M:%S')
-    recent_data.columns = ['시간', '온도(°C)', '습도(%)', '조도(%)']
-    st.dataframe(recent_data, use_container_width=True)
+    col1, col2, col3, col4 = st.columns(4)
+    col1.date_input("시작 날짜", key='explore_start_date')
+    col2.time_input("시작 시각 (UTC)", key='explore_start_time', step=60)
+    col3.date_input("끝 날짜", key='explore_end_date')
+    col4.time_input("끝 시각 (UTC)", key='explore_end_time', step=60)
+    
+    col1, col2, _ = st.columns([1, 1, 4])
+    col1.button("🔍 축소 (×4)", on_click=_zoom_out_explore_range)
+    col2.button("↩️ 최근 24시간", on_click=_reset_explore_range)
+    
+    start, end = _explore_range()
+    if end <= start:
+        st.warning("끝 시각이 시작 시각보다 뒤여야 합니다.")
+        return
+    
+    level, df = get_sensor_repository(device_id).tiles(start, end)
+    if df.empty:
+        st.info("이 구간에는 데이터가 없습니다.")
+        return
+    st.caption(f"해상도: {LEVEL_LABELS[level]} · {len(df):,}개 구간 · 차트를 드래그하면 그 구간을 확대합니다.")
+    
+    with perf_metrics.span('figure.build'):
+        fig = explore_figure(df, target_points(FULL_CHART_WIDTH))
+    with perf_metrics.span('render.plotly_chart'):
+        st.plotly_chart(fig, use_container_width=True, key='explore_chart', on_select='rerun', selection_mode='box')
+
+def main():
+    perf_metrics.begin_run('app')
+    
+    # 헤더
+    st.title("🌡️ 실시간 환경 모니터링 대시보드")
+    st.markdown("---")
+    
+    # 사이드바
+    with st.sidebar:
+        st.header("⚙️ 설정")
+        
+        view = st.radio("보기", ["최근 데이터", "기간 탐색"], horizontal=True)
+        
+        # 장치가 여럿이면 전체 격자 또는 한 장치 선택
+        # (기간 탐색은 집계 테이블을 읽으므로 장치를 골라야 함, 전체 저장소의 집계는 장치를 섞어서 평균)
+        device_id = None
+        devices = get_sensor_repository().devices()
+        if len(devices) > 1:
+            options = devices if view == "기간 탐색" else [ALL_DEVICES] + devices
+            choice = st.selectbox("장치", options)
+            device_id = None if choice == ALL_DEVICES else choice
+        
+        time_options = {
+            "최근 1시간": 1,
+            "최근 6시간": 6,
+            "최근 12시간": 12,
+            "최근 24시간": 24,
+            "최근 3일": 72,
+            "최근 7일": 24 * 7,
+            "최근 30일": 24 * 30
+        }
+        selected_time = st.selectbox("데이터 범위", list(time_options.keys()), index=3)
+        hours = time_options[selected_time]
+        
+        auto_refresh = st.checkbox("자동 새로고침", value=True)
+        
+        if st.button("🔄 새로고침"):
+            get_sensor_repository(device_id).refresh(clear=True)
+    
+    if view == "기간 탐색":
+        render_explorer(device_id)
+        perf_metrics.debug_panel()
+        return
+    
+    # 3일보다 긴 구간은 지난 날짜를 Parquet 보관소(sensor_archive.py)에서 읽음
+    if hours > 72 and not get_sensor_repository(device_id).archived_days():
+        st.info("보관된 지난 데이터가 없어 최근 3일만 표시합니다. `python sensor_archive.py`로 지난 날짜를 보관하세요.")
+    
+    # 메트릭과 차트는 각자의 주기로 자기 fragment만 다시 실행 (sleep으로 스레드를 붙잡지 않음)
+    # 데이터는 공유 스냅샷에서 읽으므로 fragment가 몇 번 돌든 Supabase 조회는 늘지 않음
+    if len(devices) > 1 and device_id is None:
+        st.fragment(render_device_grid, run_every=CHARTS_REFRESH if auto_refresh else None)(hours)
+    else:
+        st.fragment(render_metrics, run_every=METRICS_REFRESH if auto_refresh else None)(hours, device_id)
+        st.fragment(render_charts, run_every=CHARTS_REFRESH if auto_refresh else None)(hours, device_id)
+        st.fragment(render_recent_table, run_every=METRICS_REFRESH if auto_refresh else None)(hours, device_id)
     
-    # 자동 새로고침
-    if auto_refresh:
-        time.sleep(30)
-        st.rerun()
+    # 이번 rerun의 구간별 처리 시간 (사이드바에서 켰을 때만)
+    perf_metrics.debug_panel()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,208 @@
+# 데이터 조회 함수 벤치마크 (로컬 PostgREST 대역 fake_postgrest.py 사용)
+#   python benchmarks/bench_data_access.py                       # 1k, 100k, 1M 행
+#   python benchmarks/bench_data_access.py --sizes 1000,100000 --compare <이전 커밋 또는 결과 파일>
+#
+# 함수별로 지연(ms, 중앙값), 서버가 보낸 바이트, 클라이언트 CPU 시간(ms)을 재고
+# 결과를 benchmarks/results/<커밋>.json 에 저장합니다. 서버는 별도 프로세스라서
+# CPU 시간에는 클라이언트(디코딩/저장/집계) 비용만 들어갑니다.
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path.insert(0, ROOT)
+
+SIZES = [1_000, 100_000, 1_000_000]
+REPEAT = 3
+PORT = 54321
+WINDOW_HOURS = 72        # fake_postgrest가 합성 데이터를 채우는 구간 전체
+
+
+def start_server(rows, port):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'fake_postgrest.py'), '--rows', str(rows), '--port', str(port)],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = proc.stdout.readline()
+    if 'ready' not in line:
+        proc.kill()
+        raise RuntimeError(f"fake_postgrest 시작 실패: {line!r}")
+    return proc
+
+
+def import_apps(url, workdir):
+    """앱 모듈을 bare 모드로 import (secrets는 임시 디렉터리의 .streamlit/secrets.toml)"""
+    os.makedirs(os.path.join(workdir, '.streamlit'), exist_ok=True)
+    with open(os.path.join(workdir, '.streamlit', 'secrets.toml'), 'w') as f:
+        f.write(f'SUPABASE_URL = "{url}"\nSUPABASE_KEY = "bench-key"\n')
+    os.chdir(workdir)
+    os.environ['SENSOR_STORE_PATH'] = os.path.join(workdir, 'sensor_store.sqlite3')
+    # Realtime은 대역이 없으므로 바로 실패하는 주소로 (리스너는 폴링 모드로 동작)
+    os.environ['SUPABASE_REALTIME_URL'] = 'ws://127.0.0.1:9'
+    logging.disable(logging.WARNING)
+
+    import app
+    import integrated_board
+    import member_bbs2
+    return app, integrated_board, member_bbs2
+
+
+def workloads(app, integrated_board, member_bbs2, workdir):
+    """(이름, 준비 함수, 측정 함수) - 준비 함수의 반환값이 측정 함수의 인자"""
+    from sensor_repository import SensorRepository
+    from sensor_store import SensorStore
+
+    url, key = app.SUPABASE_URL, app.SUPABASE_KEY
+
+    def fresh_cache():
+        path = os.path.join(workdir, 'bench_store.sqlite3')
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        return SensorRepository(url, key, store=SensorStore(path)).cache
+
+    def warm_cache():
+        cache = fresh_cache()
+        cache.get(WINDOW_HOURS)
+        return cache
+
+    def window(cache):
+        return len(cache.get(WINDOW_HOURS))
+
+    # 앱 함수들은 공유 저장소의 스냅샷을 읽으므로 먼저 한 번 채워 둠
+    app.get_sensor_repository().refresh(clear=True)
+
+    comment_ids = [c['id'] for c in member_bbs2.select_comments()]
+    return [
+        # 센서 데이터 수집 경로 (모든 앱 공통): 처음 전체 구간을 받는 경우와 꼬리만 확인하는 경우
+        ('SensorRepository.fetch [cold]', fresh_cache, window),
+        ('SensorRepository.fetch [tail]', warm_cache, window),
+        # 세션이 화면을 그릴 때 부르는 함수 (스냅샷에서 구간 자르기)
+        ('app.load_data', None, lambda _: len(app.load_data(WINDOW_HOURS))),
+        ('member_bbs2.get_sensor_data', None, lambda _: len(member_bbs2.get_sensor_data(WINDOW_HOURS))),
+        ('integrated_board.get_sensor_data_simple', None,
+         lambda _: len(integrated_board.get_sensor_data_simple(WINDOW_HOURS))),
+        # 커뮤니티
+        ('member_bbs2.select_comments', None, lambda _: len(member_bbs2.select_comments())),
+        ('member_bbs2.select_replies', None, lambda _: len(member_bbs2.select_replies(comment_ids))),
+        # 공유 댓글 캐시에서 읽는 경우 (첫 호출 뒤로는 조회 없음)
+        ('member_bbs2.get_comments [cached]', None, lambda _: len(member_bbs2.get_comments())),
+        ('integrated_board.fetch_community', None, lambda _: len(integrated_board.fetch_community()[0])),
+        ('SimpleSupabaseClient.select', None, lambda _: len(integrated_board.simple_supabase.select(
+            'user_comments', order='created_at.desc', limit=5
+        ))),
+        ('SimpleSupabaseClient.insert', None, lambda _: integrated_board.simple_supabase.insert('user_comments', {
+            'username': 'bench', 'content': '벤치마크', 'type': 'comment',
+            'created_at': datetime.now(timezone.utc).isoformat()
+        })[0]),
+    ]
+
+
+def measure(url, setup, fn, repeat):
+    latencies, cpu, sent = [], 0.0, 0
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        requests.post(f'{url}/__stats/reset')
+        c0 = time.process_time()
+        t0 = time.perf_counter()
+        fn(arg)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        cpu += (time.process_time() - c0) * 1000
+        sent += requests.get(f'{url}/__stats').json()['bytes_out']
+    return {
+        'latency_ms': round(statistics.median(latencies), 2),
+        'bytes': sent // repeat,
+        'cpu_ms': round(cpu / repeat, 2),
+    }
+
+
+def current_commit():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    sha = git('rev-parse', '--short', 'HEAD') or 'unknown'
+    return sha + ('-dirty' if git('status', '--porcelain', '--untracked-files=no') else '')
+
+
+def load_results(ref):
+    path = ref if os.path.exists(ref) else os.path.join(RESULTS_DIR, f'{ref}.json')
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_table(results, baseline=None):
+    base = {}
+    if baseline:
+        base = {(r['function'], r['rows']): r for r in baseline['results']}
+        print(f"비교 기준: {baseline['commit']}")
+    print(f"{'function':<48} {'rows':>9} {'latency ms':>11} {'KB':>10} {'cpu ms':>9}" + (f" {'vs base':>8}" if base else ''))
+    for r in results:
+        line = f"{r['function']:<48} {r['rows']:>9} {r['latency_ms']:>11.1f} {r['bytes'] / 1024:>10.1f} {r['cpu_ms']:>9.1f}"
+        b = base.get((r['function'], r['rows']))
+        if b and b['latency_ms']:
+            line += f" {r['latency_ms'] / b['latency_ms']:>7.2f}x"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='데이터 조회 함수 벤치마크')
+    parser.add_argument('--sizes', default=','.join(str(n) for n in SIZES))
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--compare', help='비교할 커밋(benchmarks/results/<커밋>.json) 또는 결과 파일 경로')
+    parser.add_argument('--no-save', action='store_true')
+    args = parser.parse_args()
+
+    commit = current_commit()
+    url = f'http://127.0.0.1:{args.port}'
+    workdir = tempfile.mkdtemp(prefix='bench_data_access_')
+    results = []
+    try:
+        modules = None
+        for rows in [int(n) for n in args.sizes.split(',')]:
+            proc = start_server(rows, args.port)
+            try:
+                if modules is None:
+                    modules = import_apps(url, workdir)
+                for name, setup, fn in workloads(*modules, workdir):
+                    result = measure(url, setup, fn, args.repeat)
+                    results.append({'function': name, 'rows': rows, **result})
+                    print(f"  {name:<48} {rows:>9} {result['latency_ms']:>9.1f} ms", flush=True)
+            finally:
+                proc.terminate()
+                proc.wait()
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print_table(results, load_results(args.compare) if args.compare else None)
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f'{commit}.json')
+        with open(path, 'w') as f:
+            json.dump({
+                'commit': commit,
+                'date': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'repeat': args.repeat,
+                'results': results,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {os.path.relpath(path, ROOT)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# PostgREST 응답 디코딩 벤치마크: 기존 방식 vs 컬럼 직접 변환
+#   python benchmarks/bench_decode.py
+import csv
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from sensor_decode import decode_sensor_csv, decode_sensor_json  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000]
+REPEAT = 5
+
+
+def make_rows(n):
+    """maintable2와 같은 모양의 합성 데이터"""
+    start = datetime(2024, 3, 15, tzinfo=timezone.utc)
+    rng = np.random.default_rng(0)
+    temps = 20 + 5 * rng.random(n)
+    hums = 40 + 20 * rng.random(n)
+    lights = rng.integers(0, 100, n)
+    return [
+        {
+            'id': i + 1,
+            'created_at': (start + timedelta(seconds=10 * i, microseconds=i % 1000)).isoformat(),
+            'light': int(lights[i]),
+            'temperature': round(float(temps[i]), 2),
+            'humidity': round(float(hums[i]), 2),
+        }
+        for i in range(n)
+    ]
+
+
+def to_json_bytes(rows):
+    return json.dumps(rows).encode('utf-8')
+
+
+def to_csv_bytes(rows):
+    # PostgREST CSV는 timestamptz를 Postgres 텍스트 형식으로 내보냄
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(rows[0].keys())
+    for r in rows:
+        writer.writerow([
+            r['id'],
+            r['created_at'].replace('T', ' ').replace('+00:00', '+00'),
+            r['light'], r['temperature'], r['humidity'],
+        ])
+    return buf.getvalue().encode('utf-8')
+
+
+def current_path(content):
+    """기존 로더: response.json() -> pd.DataFrame(list[dict]) -> pd.to_datetime"""
+    df = pd.DataFrame(json.loads(content))
+    df['created_at'] = pd.to_datetime(df['created_at'], format='ISO8601')
+    return df
+
+
+def best_of(fn, arg):
+    best = float('inf')
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t)
+    return best * 1000
+
+
+def main():
+    print(f"{'rows':>8} {'json KB':>9} {'csv KB':>8} {'current ms':>11} {'json-col ms':>12} {'csv ms':>8} {'speedup':>8}")
+    for n in SIZES:
+        rows = make_rows(n)
+        json_bytes = to_json_bytes(rows)
+        csv_bytes = to_csv_bytes(rows)
+
+        current = best_of(current_path, json_bytes)
+        json_col = best_of(decode_sensor_json, json_bytes)
+        csv_col = best_of(decode_sensor_csv, csv_bytes)
+
+        print(f"{n:>8} {len(json_bytes) / 1024:>9.0f} {len(csv_bytes) / 1024:>8.0f} "
+              f"{current:>11.1f} {json_col:>12.1f} {csv_col:>8.1f} {current / csv_col:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+# 수집 경로 벤치마크: 장치가 maintable2에 직접 한 행씩 insert vs ingest_gateway 묶음 insert
+#   python benchmarks/bench_ingest.py --readings 5000 --devices 20
+#
+# 두 방식 모두 로컬 PostgREST 대역(fake_postgrest.py)에 씁니다. 게이트웨이는 별도 프로세스로
+# 띄우고, 모든 값이 DB에 들어갈 때까지의 시간과 /metrics의 접수->커밋 지연(p50/p99 버킷)을 봅니다.
+import argparse
+import os
+import subprocess
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PORT = 54331
+GATEWAY_PORT = 54332
+
+
+def start_server(port):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'fake_postgrest.py'), '--rows', '0', '--port', str(port)],
+        stdout=subprocess.PIPE, text=True
+    )
+    line = proc.stdout.readline()
+    if 'ready' not in line:
+        proc.kill()
+        raise RuntimeError(f"fake_postgrest 시작 실패: {line!r}")
+    return proc
+
+
+def start_gateway(url, port, batch_size):
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'ingest_gateway.py'),
+         '--host', '127.0.0.1', '--port', str(port), '--url', url, '--key', 'bench-key'],
+        env={**os.environ, 'INGEST_BATCH_SIZE': str(batch_size)},
+        stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            requests.get(f'http://127.0.0.1:{port}/health', timeout=1)
+            return proc
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    proc.kill()
+    raise RuntimeError("ingest_gateway 시작 실패")
+
+
+def reading(i):
+    return {'light': i % 100, 'temperature': 20 + (i % 50) / 10, 'humidity': 40 + (i % 30)}
+
+
+def run_devices(post, readings, devices):
+    """devices개의 장치가 동시에 readings개를 나눠서 보냄 -> 거절(재시도) 횟수"""
+    def device(ids):
+        session = requests.Session()
+        retries = 0
+        for i in ids:
+            while True:
+                response = post(session, reading(i))
+                if response.status_code != 503:
+                    response.raise_for_status()
+                    break
+                retries += 1
+                time.sleep(float(response.headers.get('Retry-After', 1)) / 10)
+        return retries
+
+    with ThreadPoolExecutor(max_workers=devices) as pool:
+        return sum(pool.map(device, [range(d, readings, devices) for d in range(devices)]))
+
+
+def db_requests(url):
+    return requests.get(f'{url}/__stats').json()['requests']
+
+
+def bench_direct(url, readings, devices):
+    headers = {'apikey': 'bench-key', 'Authorization': 'Bearer bench-key', 'Prefer': 'return=minimal'}
+    requests.post(f'{url}/__stats/reset')
+    start = time.perf_counter()
+    run_devices(lambda s, row: s.post(f'{url}/rest/v1/maintable2', json=row, headers=headers), readings, devices)
+    return time.perf_counter() - start, db_requests(url)
+
+
+def bench_gateway(url, readings, devices, batch_size, port):
+    proc = start_gateway(url, port, batch_size)
+    base = f'http://127.0.0.1:{port}'
+    try:
+        requests.post(f'{url}/__stats/reset')
+        start = time.perf_counter()
+        retries = run_devices(lambda s, row: s.post(f'{base}/readings', json=row), readings, devices)
+        while requests.get(f'{base}/health').json()['committed'] < readings:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        return elapsed, db_requests(url), retries, latency_summary(requests.get(f'{base}/metrics').text)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def latency_summary(metrics_text):
+    """/metrics의 ingest.accept_to_commit 히스토그램에서 p50/p99 버킷 상한"""
+    buckets = [
+        (float(bound), int(n)) for bound, n in
+        re.findall(r'span="ingest\.accept_to_commit",le="([^"]+)"\} (\d+)', metrics_text)
+    ]
+    if not buckets or not buckets[-1][1]:
+        return '-'
+    total = buckets[-1][1]
+    p50 = next(bound for bound, n in buckets if n >= 0.5 * total)
+    p99 = next(bound for bound, n in buckets if n >= 0.99 * total)
+    return f"p50<={p50}s p99<={p99}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='수집 경로 벤치마크')
+    parser.add_argument('--readings', type=int, default=5000)
+    parser.add_argument('--devices', type=int, default=20)
+    parser.add_argument('--batch-sizes', default='50,200,500')
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--gateway-port', type=int, default=GATEWAY_PORT)
+    args = parser.parse_args()
+
+    url = f'http://127.0.0.1:{args.port}'
+    proc = start_server(args.port)
+    try:
+        elapsed, inserts = bench_direct(url, args.readings, args.devices)
+        print(f"{'direct insert':<24} {elapsed:>7.2f}s {args.readings / elapsed:>9.0f} rows/s  DB 요청 {inserts}")
+        for batch_size in [int(n) for n in args.batch_sizes.split(',')]:
+            elapsed, inserts, retries, latency = bench_gateway(
+                url, args.readings, args.devices, batch_size, args.gateway_port
+            )
+            print(f"{f'gateway batch={batch_size}':<24} {elapsed:>7.2f}s {args.readings / elapsed:>9.0f} rows/s"
+                  f"  DB 요청 {inserts}  503 재시도 {retries}  {latency}")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == '__main__':
+    main()
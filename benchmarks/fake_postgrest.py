@@ -0,0 +1,422 @@
+# 벤치마크용 로컬 PostgREST/Auth 대역 (http.server + SQLite)
+#   python benchmarks/fake_postgrest.py --rows 100000 --port 54321 [--devices 8]
+#
+# 앱이 쓰는 만큼만 구현합니다.
+#   GET  /rest/v1/<table>  select, eq/neq/gt/gte/lt/lte/in/is, or=(...), order, limit, offset
+#                          Accept: text/csv 이면 CSV, 아니면 JSON
+#   POST /rest/v1/<table>  insert (Prefer: return=representation 이면 넣은 행 반환)
+#   POST /auth/v1/signup, /auth/v1/token, /auth/v1/logout, GET /auth/v1/user
+#   GET  /__stats, POST /__stats/reset   요청 수/보낸 바이트 (벤치마크 측정용)
+import argparse
+import csv
+import io
+import json
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+TABLES = {
+    'maintable2': ('id', 'created_at', 'light', 'temperature', 'humidity', 'device_id', 'ingest_id', 'measured_at'),
+    'user_comments': ('id', 'user_id', 'username', 'content', 'type', 'created_at'),
+    'comment_replies': ('id', 'comment_id', 'user_id', 'username', 'content', 'created_at'),
+}
+# 쿼리 문자열로 들어온 값이 숫자 컬럼과 비교되도록 SQLite 타입 지정 (나머지는 TEXT)
+COLUMN_TYPES = {
+    'light': 'INTEGER',
+    'temperature': 'REAL',
+    'humidity': 'REAL',
+    'comment_id': 'INTEGER',
+    'device_id': "TEXT NOT NULL DEFAULT 'esp8266'",   # maintable2_devices.sql과 같음
+    'ingest_id': 'TEXT UNIQUE',                       # maintable2_ingest.sql과 같음
+}
+# timestamptz 컬럼은 문자열 대신 epoch(us) 숨은 컬럼으로 비교/정렬
+TIME_COLUMNS = ('created_at',)
+OPERATORS = {'eq': '=', 'neq': '!=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+RESERVED_PARAMS = ('select', 'order', 'limit', 'offset', 'or', 'and', 'on_conflict', 'columns')
+
+SEED_HOURS = 72          # 합성 센서 데이터가 걸치는 구간 (현재 시각까지)
+DEFAULT_DEVICE = 'esp8266'
+SEED_COMMENTS = 200
+MAX_REPLIES = 5
+
+
+def to_epoch_us(value):
+    """ISO 문자열 -> epoch 마이크로초 (시간대가 없으면 UTC로 봄, 앱의 naive 조회 조건과 같음)"""
+    value = value.strip('"').replace('Z', '+00:00').replace(' ', 'T', 1)
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() * 1_000_000)
+
+
+def format_time(us, for_csv=False):
+    """PostgREST 출력 형식 (JSON은 ISO, CSV는 Postgres 텍스트 형식)"""
+    ts = datetime.fromtimestamp(us / 1_000_000, tz=timezone.utc).isoformat()
+    return ts.replace('T', ' ').replace('+00:00', '+00') if for_csv else ts
+
+
+def create_database(path=':memory:'):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    for table, columns in TABLES.items():
+        defs = []
+        for col in columns:
+            if col == 'id':
+                defs.append('id INTEGER PRIMARY KEY AUTOINCREMENT')
+            elif col in TIME_COLUMNS:
+                defs.append(f'{col}_us INTEGER NOT NULL')
+            else:
+                defs.append(f"{col} {COLUMN_TYPES.get(col, 'TEXT')}")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(defs)})")
+    conn.execute("CREATE INDEX IF NOT EXISTS maintable2_created ON maintable2 (created_at_us, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS maintable2_device_created ON maintable2 (device_id, created_at_us, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS user_comments_created ON user_comments (created_at_us, id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS comment_replies_comment ON comment_replies (comment_id, created_at_us)")
+    return conn
+
+
+def device_ids(devices):
+    return [DEFAULT_DEVICE] if devices <= 1 else [f'{DEFAULT_DEVICE}-{k + 1:02d}' for k in range(devices)]
+
+
+def seed(conn, rows, comments=SEED_COMMENTS, hours=SEED_HOURS, seed_value=0, devices=1):
+    """maintable2 rows개를 최근 hours시간에 고르게 (devices개 장치가 번갈아), 댓글/답글도 함께 채움"""
+    rng = np.random.default_rng(seed_value)
+    end_us = int(datetime.now(timezone.utc).timestamp() * 1_000_000)
+    start_us = end_us - hours * 3600 * 1_000_000
+    times = np.linspace(start_us, end_us, rows, dtype=np.int64) if rows else np.array([], dtype=np.int64)
+    temps = np.round(20 + 5 * rng.random(rows), 2)
+    hums = np.round(40 + 20 * rng.random(rows), 2)
+    lights = rng.integers(0, 100, rows)
+    ids = device_ids(devices)
+    conn.executemany(
+        "INSERT INTO maintable2 (created_at_us, light, temperature, humidity, device_id) VALUES (?, ?, ?, ?, ?)",
+        zip(times.tolist(), lights.tolist(), temps.tolist(), hums.tolist(), (ids[i % len(ids)] for i in range(rows)))
+    )
+
+    comment_times = np.linspace(start_us, end_us, comments, dtype=np.int64).tolist()
+    for i, t in enumerate(comment_times):
+        user = f"user{i % 17}"
+        cur = conn.execute(
+            "INSERT INTO user_comments (user_id, username, content, type, created_at_us) VALUES (?, ?, ?, ?, ?)",
+            (str(uuid.UUID(int=i % 17)), user, f"합성 댓글 {i}", 'question' if i % 4 == 0 else 'comment', t)
+        )
+        for j in range(int(rng.integers(0, MAX_REPLIES + 1))):
+            conn.execute(
+                "INSERT INTO comment_replies (comment_id, user_id, username, content, created_at_us) VALUES (?, ?, ?, ?, ?)",
+                (cur.lastrowid, str(uuid.UUID(int=j)), f"user{j}", f"합성 답글 {i}-{j}", t + (j + 1) * 1_000_000)
+            )
+    conn.commit()
+
+
+class QueryError(Exception):
+    pass
+
+
+def _split_top_level(text):
+    """'a,b(c,d),e' -> ['a', 'b(c,d)', 'e'] (괄호/따옴표 안의 쉼표는 무시)"""
+    parts, depth, quoted, buf = [], 0, False, ''
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == '(':
+            depth += 1
+        elif not quoted and ch == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and ch == ',':
+            parts.append(buf)
+            buf = ''
+            continue
+        buf += ch
+    if buf:
+        parts.append(buf)
+    return parts
+
+
+def _column(table, name):
+    name = name.strip()
+    if name not in TABLES[table]:
+        raise QueryError(f'column {table}.{name} does not exist')
+    return f'{name}_us' if name in TIME_COLUMNS else name
+
+
+def _value(name, raw):
+    raw = raw.strip()
+    if name.strip() in TIME_COLUMNS:
+        return to_epoch_us(raw)
+    return raw.strip('"')
+
+
+def _condition(table, column, expr):
+    """컬럼 하나의 'op.value' 조건 -> (SQL, 파라미터)"""
+    op, _, raw = expr.partition('.')
+    negate = op == 'not'
+    if negate:
+        op, _, raw = raw.partition('.')
+    col = _column(table, column)
+    if op in OPERATORS:
+        sql, params = f'{col} {OPERATORS[op]} ?', [_value(column, raw)]
+    elif op == 'in':
+        values = [_value(column, v) for v in _split_top_level(raw.strip('()'))]
+        sql, params = f"{col} IN ({', '.join('?' * len(values))})", values
+    elif op == 'is':
+        sql, params = f"{col} IS {'NULL' if raw == 'null' else raw.upper()}", []
+    else:
+        raise QueryError(f'unsupported operator {op}')
+    return (f'NOT ({sql})' if negate else sql), params
+
+
+def _logic(table, text, joiner):
+    """or=(a.gt.1,and(b.eq.2,c.lt.3)) 형식"""
+    clauses, params = [], []
+    for item in _split_top_level(text.strip()[1:-1]):
+        m = re.match(r'^(and|or)\((.*)\)$', item)
+        if m:
+            sql, p = _logic(table, f'({m.group(2)})', m.group(1).upper())
+        else:
+            column, _, expr = item.partition('.')
+            sql, p = _condition(table, column, expr)
+        clauses.append(f'({sql})')
+        params.extend(p)
+    return f' {joiner} '.join(clauses), params
+
+
+def build_select(table, query):
+    """PostgREST 쿼리 파라미터 -> (SQL, 파라미터, 출력 컬럼)"""
+    if table not in TABLES:
+        raise QueryError(f'relation {table} does not exist')
+
+    select = query.get('select', '*').replace(' ', '')
+    columns = list(TABLES[table]) if select in ('', '*') else [c for c in select.split(',') if c]
+    sql_cols = [_column(table, c) for c in columns]
+
+    where, params = [], []
+    for key, value in query.items():
+        if key in RESERVED_PARAMS:
+            continue
+        sql, p = _condition(table, key, value)
+        where.append(sql)
+        params.extend(p)
+    for joiner in ('or', 'and'):
+        if joiner in query:
+            sql, p = _logic(table, query[joiner], joiner.upper())
+            where.append(f'({sql})')
+            params.extend(p)
+
+    sql = f"SELECT {', '.join(sql_cols)} FROM {table}"
+    if where:
+        sql += ' WHERE ' + ' AND '.join(where)
+    if query.get('order'):
+        terms = []
+        for term in query['order'].split(','):
+            name, *mods = term.split('.')
+            direction = 'DESC' if 'desc' in mods else 'ASC'
+            terms.append(f'{_column(table, name)} {direction}')
+        sql += ' ORDER BY ' + ', '.join(terms)
+    if query.get('limit'):
+        sql += ' LIMIT ?'
+        params.append(int(query['limit']))
+        if query.get('offset'):
+            sql += ' OFFSET ?'
+            params.append(int(query['offset']))
+    return sql, params, columns
+
+
+class FakeSupabase:
+    """SQLite 연결 하나를 잠금으로 보호해서 모든 요청 스레드가 공유"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'bytes_out': 0}
+        self.users = {}
+
+    def select(self, table, query, as_csv):
+        sql, params, columns = build_select(table, query)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        times = [i for i, c in enumerate(columns) if c in TIME_COLUMNS]
+
+        if as_csv:
+            buf = io.StringIO()
+            writer = csv.writer(buf, lineterminator='\n')
+            writer.writerow(columns)
+            for row in rows:
+                if times:
+                    row = list(row)
+                    for i in times:
+                        row[i] = format_time(row[i], for_csv=True)
+                writer.writerow(row)
+            return buf.getvalue().encode('utf-8')
+
+        out = []
+        for row in rows:
+            item = dict(zip(columns, row))
+            for i in times:
+                item[columns[i]] = format_time(row[i])
+            out.append(item)
+        return json.dumps(out, ensure_ascii=False).encode('utf-8')
+
+    def insert(self, table, payload, ignore_duplicates=False):
+        """ignore_duplicates: Prefer resolution=ignore-duplicates (unique 컬럼이 겹치는 행은 건너뜀)"""
+        if table not in TABLES:
+            raise QueryError(f'relation {table} does not exist')
+        items = payload if isinstance(payload, list) else [payload]
+        inserted = []
+        with self.lock:
+            for item in items:
+                item = dict(item)
+                if 'created_at' in TABLES[table] and not item.get('created_at'):
+                    item['created_at'] = datetime.now(timezone.utc).isoformat()
+                columns = [c for c in item if c != 'id']
+                values = [_value(c, item[c]) if c in TIME_COLUMNS else item[c] for c in columns]
+                cur = self.conn.execute(
+                    f"INSERT {'OR IGNORE ' if ignore_duplicates else ''}INTO {table} "
+                    f"({', '.join(_column(table, c) for c in columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    values
+                )
+                item['id'] = cur.lastrowid
+                if 'created_at' in item:
+                    item['created_at'] = format_time(_value('created_at', item['created_at']))
+                inserted.append(item)
+            self.conn.commit()
+        return inserted
+
+    def session(self, email, username=None):
+        user = self.users.get(email)
+        if user is None:
+            user = {
+                'id': str(uuid.uuid4()),
+                'aud': 'authenticated',
+                'role': 'authenticated',
+                'email': email,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'app_metadata': {'provider': 'email'},
+                'user_metadata': {'username': username or email.split('@')[0]},
+            }
+            self.users[email] = user
+        return {
+            'access_token': f'fake-token-{user["id"]}',
+            'token_type': 'bearer',
+            'expires_in': 3600,
+            'expires_at': int(datetime.now(timezone.utc).timestamp()) + 3600,
+            'refresh_token': f'fake-refresh-{user["id"]}',
+            'user': user,
+        }
+
+
+def make_handler(backend):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True   # 헤더/본문을 따로 쓰므로 keep-alive에서 40ms 지연 방지
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body=b'', content_type='application/json'):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if body and self.command != 'HEAD':
+                self.wfile.write(body)
+            with backend.stats_lock:
+                backend.stats['requests'] += 1
+                backend.stats['bytes_out'] += len(body)
+
+        def _json(self, status, obj):
+            self._send(status, json.dumps(obj, ensure_ascii=False).encode('utf-8'))
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'null')
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = dict(parse_qsl(url.query, keep_blank_values=True))
+            try:
+                if url.path == '/__stats':
+                    return self._json(200, dict(backend.stats))
+                if url.path.startswith('/rest/v1/'):
+                    table = url.path[len('/rest/v1/'):]
+                    as_csv = 'text/csv' in self.headers.get('Accept', '')
+                    body = backend.select(table, query, as_csv)
+                    return self._send(200, body, 'text/csv; charset=utf-8' if as_csv else 'application/json')
+                if url.path == '/auth/v1/user':
+                    token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+                    for user in backend.users.values():
+                        if token == f'fake-token-{user["id"]}':
+                            return self._json(200, user)
+                    return self._json(401, {'msg': 'invalid token'})
+            except (QueryError, ValueError) as e:
+                return self._json(400, {'code': 'PGRST100', 'message': str(e)})
+            self._json(404, {'message': 'not found'})
+
+        do_HEAD = do_GET
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            try:
+                if url.path == '/__stats/reset':
+                    with backend.stats_lock:
+                        backend.stats.update(requests=0, bytes_out=0)
+                    return self._send(204)
+                if url.path.startswith('/rest/v1/'):
+                    prefer = self.headers.get('Prefer', '')
+                    inserted = backend.insert(
+                        url.path[len('/rest/v1/'):], self._body(),
+                        ignore_duplicates='resolution=ignore-duplicates' in prefer
+                    )
+                    if 'return=representation' in prefer:
+                        return self._json(201, inserted)
+                    return self._send(201)
+                if url.path == '/auth/v1/signup':
+                    body = self._body()
+                    username = (body.get('data') or {}).get('username')
+                    return self._json(200, backend.session(body['email'], username))
+                if url.path == '/auth/v1/token':
+                    return self._json(200, backend.session(self._body()['email']))
+                if url.path == '/auth/v1/logout':
+                    return self._send(204)
+            except (QueryError, ValueError, KeyError, sqlite3.Error) as e:
+                return self._json(400, {'code': 'PGRST100', 'message': str(e)})
+            self._json(404, {'message': 'not found'})
+
+    return Handler
+
+
+def serve(rows=1000, host='127.0.0.1', port=54321, db_path=':memory:', devices=1):
+    conn = create_database(db_path)
+    if conn.execute("SELECT COUNT(*) FROM maintable2").fetchone()[0] == 0:
+        seed(conn, rows, devices=devices)
+    server = ThreadingHTTPServer((host, port), make_handler(FakeSupabase(conn)))
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 PostgREST/Auth 대역')
+    parser.add_argument('--rows', type=int, default=1000, help='maintable2 합성 행 수')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--db', default=':memory:', help='SQLite 파일 (이미 채워져 있으면 그대로 사용)')
+    parser.add_argument('--devices', type=int, default=1, help='합성 데이터를 나눠 쓰는 장치 수')
+    args = parser.parse_args()
+
+    server = serve(args.rows, args.host, args.port, args.db, args.devices)
+    print(f"http://{args.host}:{server.server_port} ready", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
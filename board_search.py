@@ -0,0 +1,130 @@
+# multi_bbs 게시판 검색 - 게시글/댓글 n-gram 역색인 (글/댓글이 추가될 때마다 증분 갱신)
+#
+# 한국어는 조사가 붙고 띄어쓰기가 일정하지 않아서 단어 단위로 자르면 "센서가"로 "센서"를 못 찾습니다.
+# 그래서 단어마다 글자 1/2/3-gram을 색인해서, 한 글자만 입력해도 그 글자가 들어간 단어를 모두
+# 찾습니다("서"로 "센서"). 검색어는 들어가는 가장 긴 n-gram으로 찾고(세 글자 이상은 더 드문 3-gram),
+# 가장 짧은 색인 목록부터 교집합을 구하므로 게시글 수가 늘어도 검색어가 드문 만큼만 읽습니다.
+# 마지막에 후보만 실제 문자열과 대조해서 n-gram이 우연히 겹친 글을 걸러냅니다.
+# 순위는 BM25 (제목 > 본문 > 댓글 가중치).
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+# 필드별 가중치 (제목에서 찾은 글이 본문/댓글에서 찾은 글보다 위로)
+FIELD_WEIGHTS = {'title': 3.0, 'content': 1.0, 'reply': 0.5}
+BM25_K1 = 1.2
+BM25_B = 0.75
+NGRAMS = (1, 2, 3)
+_WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    """전각/반각, 대소문자 차이를 없앤 검색용 문자열"""
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+def tokenize(text):
+    """문자열 -> 토큰 목록 (단어별 글자 1/2/3-gram)"""
+    tokens = []
+    for word in _WORD.findall(normalize(text)):
+        for n in NGRAMS:
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+def _query_tokens(word):
+    # 들어가는 가장 긴 n-gram으로 (한 글자 검색어는 글자 그대로)
+    n = max(n for n in NGRAMS if n <= len(word))
+    return [word[i:i + n] for i in range(len(word) - n + 1)]
+
+
+class BoardSearchIndex:
+    """게시판 전체(여러 게시판)의 게시글 역색인
+
+    문서 하나 = 게시글 하나 (제목 + 본문 + 댓글). 댓글이 달리면 그 게시글 문서에 더해집니다.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)   # 토큰 -> {게시글 id: 가중 빈도}
+        self.lengths = {}                    # 게시글 id -> 가중 길이
+        self.boards = {}                     # 게시글 id -> 게시판 키
+        self.posts = {}                      # 게시글 id -> 게시글 (세션의 같은 dict)
+        self.texts = {}                      # 게시글 id -> 정규화한 전체 문자열 (후보 확인용)
+        self.total_length = 0.0
+
+    def __len__(self):
+        return len(self.boards)
+
+    def _add_text(self, post_id, field, text):
+        weight = FIELD_WEIGHTS[field]
+        counts = Counter(tokenize(text))
+        for token, count in counts.items():
+            postings = self.postings[token]
+            postings[post_id] = postings.get(post_id, 0.0) + weight * count
+        added = weight * sum(counts.values())
+        self.lengths[post_id] = self.lengths.get(post_id, 0.0) + added
+        self.total_length += added
+        self.texts[post_id] = self.texts.get(post_id, '') + '\n' + normalize(text)
+
+    def add_post(self, board, post):
+        """게시글 추가 (이미 달린 댓글도 함께)"""
+        if post['id'] in self.boards:
+            return
+        self.boards[post['id']] = board
+        self.posts[post['id']] = post
+        self._add_text(post['id'], 'title', post['title'])
+        self._add_text(post['id'], 'content', post['content'])
+        for reply in post.get('replies', []):
+            self.add_reply(post['id'], reply)
+
+    def add_reply(self, post_id, reply):
+        """게시글에 달린 댓글 추가"""
+        if post_id in self.boards:
+            self._add_text(post_id, 'reply', reply['content'])
+
+    def search(self, query, board=None, limit=50):
+        """검색어의 모든 단어를 포함하는 게시글을 점수순으로 (board를 주면 그 게시판만)"""
+        words = _WORD.findall(normalize(query))
+        if not words or not self.boards:
+            return []
+        tokens = list(dict.fromkeys(t for word in words for t in _query_tokens(word)))
+        lists = sorted((self.postings.get(t, {}) for t in tokens), key=len)
+        if not lists[0]:
+            return []
+
+        # 가장 짧은 목록부터 교집합 (목록이 빨리 줄어들수록 나머지는 조금만 확인)
+        candidates = lists[0].keys()
+        for postings in lists[1:]:
+            candidates = candidates & postings.keys()
+            if not candidates:
+                return []
+        # n-gram이 모두 있어도 단어가 실제로 이어져 있지 않을 수 있으므로 후보만 문자열로 확인
+        candidates = [
+            post_id for post_id in candidates
+            if (board is None or self.boards[post_id] == board)
+            and all(word in self.texts[post_id] for word in words)
+        ]
+
+        n = len(self.boards)
+        average = self.total_length / n
+        scores = {}
+        for token in tokens:
+            postings = self.postings[token]
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for post_id in candidates:
+                tf = postings[post_id]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[post_id] / average)
+                scores[post_id] = scores.get(post_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        ranked = heapq.nsmallest(limit, scores, key=lambda post_id: (-scores[post_id], -post_id))
+        return [self.posts[post_id] for post_id in ranked]
+
+
+def build_index(posts_by_board):
+    """{게시판: [게시글]} 전체로 색인 만들기 (세션 처음 한 번, 이후는 add_post/add_reply)"""
+    index = BoardSearchIndex()
+    for board, posts in posts_by_board.items():
+        for post in posts:
+            index.add_post(board, post)
+    return index
@@ -0,0 +1,208 @@
+# user_comments/comment_replies 공유 캐시 (프로세스당 하나, 쓰기는 write-through)
+#
+# 댓글 피드는 최신 댓글부터 빠짐없이 이어진 구간 하나로, 답글은 댓글(스레드)별로 담아 둡니다.
+# 이 앱에서 쓴 행은 insert 응답으로 바로 반영하고, 다른 프로세스에서 쓴 행은 Realtime
+# INSERT 이벤트로 반영하므로, 대부분의 rerun은 커뮤니티 영역을 조회 없이 그립니다.
+# Realtime이 끊겨 있던 적이 있으면 MAX_AGE가 지난 뒤 한 번 비우고 다시 받습니다. 계속 연결되어
+# 있어도 INSERT 외의 변경(수정/삭제)은 이벤트가 없으므로 MAX_TRUSTED_AGE마다는 다시 받습니다.
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import comment_feed
+
+MAX_AGE = float(os.environ.get('COMMENT_CACHE_MAX_AGE', 30))
+MAX_TRUSTED_AGE = float(os.environ.get('COMMENT_CACHE_MAX_TRUSTED_AGE', 600))
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def _position(row):
+    """(created_at, id) 정렬 키 (PostgREST/Realtime/직접 넣은 값의 시간 표기 차이를 맞춤)"""
+    created_at = datetime.fromisoformat(str(row[0] if isinstance(row, tuple) else row['created_at']).replace('Z', '+00:00'))
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at, row[1] if isinstance(row, tuple) else row['id']
+
+
+class CommentCache:
+    """댓글 피드(최신순 연속 구간)와 스레드별 답글 캐시
+
+    comments()/replies()의 fetch는 조회 함수(실패하면 예외)로, 캐시로 답할 수 없는
+    부분만 잠금 밖에서 호출됩니다. 조회하는 동안 들어온 행은 결과를 담은 뒤 다시 반영하고,
+    그 사이 캐시를 비웠거나 Realtime이 다시 연결됐으면 결과를 담지 않습니다 (실패한 조회도).
+    """
+
+    def __init__(self, listener=None, max_age=MAX_AGE, max_trusted_age=MAX_TRUSTED_AGE):
+        self.lock = threading.Lock()
+        self.listener = listener
+        self.max_age = max_age
+        self.max_trusted_age = max_trusted_age
+        self.generation = 0      # 비울 때마다 증가 (진행 중인 조회 결과를 버릴지 판단)
+        self.fetching = 0        # 진행 중인 조회 수
+        self._clear()
+        if listener is not None:
+            listener.on_change(self._on_change)
+
+    def _clear(self):
+        self.feed = []           # 최신순 댓글 (가장 최신부터 이어진 구간)
+        self.complete = False    # feed가 가장 오래된 댓글까지 담고 있음
+        self.threads = {}        # 댓글 id -> 답글 목록 (created_at 오름차순)
+        self.journal = []        # 조회가 진행 중인 동안 들어온 (테이블, 행)
+        self.generation += 1
+        self.loaded_at = time.monotonic()
+        # 비운 뒤로 Realtime이 계속 연결되어 있었으면(재연결 횟수가 그대로면) 놓친 변경이 없음
+        self.connects = self._connects()
+        self.trusted = self.listener is not None and self.listener.connected
+
+    def _connects(self):
+        return self.listener.connects if self.listener is not None else 0
+
+    def _expire(self):
+        if self.listener is None or not self.listener.connected or self._connects() != self.connects:
+            self.trusted = False
+        if time.monotonic() - self.loaded_at > (self.max_trusted_age if self.trusted else self.max_age):
+            self._clear()
+
+    def _begin_fetch(self):
+        self.fetching += 1
+        return self.generation, self._connects(), len(self.journal)
+
+    def _end_fetch(self, started, merge=None):
+        """조회 결과 반영 (merge 뒤에 조회 중 들어온 행을 다시 적용, 그 사이 비웠거나 재연결됐으면 버림)"""
+        generation, connects, start = started
+        if merge is not None and (generation, connects) == (self.generation, self._connects()):
+            merge()
+            for table, row in self.journal[start:]:
+                self._apply(table, row)
+        self.fetching -= 1
+        if not self.fetching:
+            self.journal = []
+
+    # --- 댓글 피드 ---
+
+    def comments(self, fetch, limit=comment_feed.PAGE_SIZE, before=None, until=None):
+        """comment_feed.page_query와 같은 범위의 댓글 (캐시에 있으면 조회 없음)"""
+        with self.lock:
+            self._expire()
+            rows = self._slice(limit, before, until)
+            if rows is not None:
+                return rows
+            started = self._begin_fetch()
+        try:
+            rows = fetch(limit=limit, before=before, until=until)
+        except Exception:
+            with self.lock:
+                self._end_fetch(started)
+            raise
+        with self.lock:
+            self._end_fetch(started, lambda: self._merge(rows, limit, before, until))
+        return rows
+
+    def _slice(self, limit, before, until):
+        if until is not None:
+            if self.complete or (self.feed and _position(self.feed[-1]) <= _position(until)):
+                return [row for row in self.feed if _position(row) >= _position(until)]
+            return None
+        rows = self.feed if before is None else [row for row in self.feed if _position(row) < _position(before)]
+        rows = rows[:limit]
+        return rows if len(rows) == limit or self.complete else None
+
+    def _merge(self, rows, limit, before, until):
+        if before is None:
+            # 최신부터 받은 구간: 기존 구간과 이어지면 뒤를 붙이고, 아니면 새 구간으로
+            joined = bool(rows) and bool(self.feed) and _position(self.feed[-1]) <= _position(rows[-1])
+            tail = [row for row in self.feed if _position(row) < _position(rows[-1])] if joined else []
+            self.complete = (self.complete and joined) or (until is None and len(rows) < limit)
+            self.feed = list(rows) + tail
+        elif self.complete or (self.feed and _position(before) >= _position(self.feed[-1])):
+            # 캐시 구간 안에서 이어 받은 다음 페이지
+            self.feed = [row for row in self.feed if _position(row) >= _position(before)] + list(rows)
+            self.complete = len(rows) < limit
+
+    def _add_comment(self, row):
+        if 'id' not in row or 'created_at' not in row:
+            # 저장된 행을 돌려받지 못함 -> 피드만 다시 받음 (답글은 그대로)
+            self.feed, self.complete = [], False
+            return
+        if any(c['id'] == row['id'] for c in self.feed):
+            return
+        if not self.feed:
+            if self.complete:
+                self.feed = [row]
+            return
+        position = _position(row)
+        if position < _position(self.feed[-1]) and not self.complete:
+            return   # 아직 펼치지 않은 구간 (그 구간을 받을 때 함께 옴)
+        index = next((i for i, c in enumerate(self.feed) if _position(c) < position), len(self.feed))
+        self.feed.insert(index, row)
+
+    # --- 답글 ---
+
+    def replies(self, fetch, comment_ids):
+        """{댓글 id: 답글 목록} (캐시에 없는 스레드만 fetch(ids)로 한 번에 조회)"""
+        with self.lock:
+            self._expire()
+            missing = [i for i in comment_ids if i not in self.threads]
+            if not missing:
+                return {i: list(self.threads[i]) for i in comment_ids}
+            started = self._begin_fetch()
+        try:
+            fetched = fetch(missing)
+        except Exception:
+            with self.lock:
+                self._end_fetch(started)
+            raise
+
+        def merge():
+            for comment_id in missing:
+                self.threads[comment_id] = list(fetched.get(comment_id, []))
+
+        with self.lock:
+            self._end_fetch(started, merge)
+            cached = {i: self.threads.get(i) for i in comment_ids}
+        # 결과를 담지 못했으면 방금 받은 답글로 답함
+        return {i: list(cached[i] if cached[i] is not None else fetched.get(i, [])) for i in comment_ids}
+
+    def _add_reply(self, row):
+        thread = self.threads.get(row.get('comment_id'))
+        if thread is None:
+            return
+        if 'id' not in row:
+            # 저장된 행을 돌려받지 못함 -> 이 스레드만 다시 받음
+            del self.threads[row['comment_id']]
+        elif all(r['id'] != row['id'] for r in thread):
+            thread.append(row)
+
+    # --- 쓰기 반영 ---
+
+    def apply_insert(self, table, row):
+        """새 행 반영 (insert 응답 또는 Realtime 이벤트, id가 없으면 해당 부분만 무효화)"""
+        with self.lock:
+            self._apply(table, row)
+            if self.fetching:
+                self.journal.append((table, row))
+
+    def _apply(self, table, row):
+        if table == 'user_comments':
+            self._add_comment(row)
+        elif table == 'comment_replies':
+            self._add_reply(row)
+
+    def _on_change(self, table, payload):
+        record = (payload.get('data') or {}).get('record')
+        if record:
+            self.apply_insert(table, record)
+
+
+def get_cache(url, listener=None):
+    """Supabase 프로젝트(url)별 공유 캐시 (여러 앱/세션이 같은 캐시를 씀)"""
+    cache = _caches.get(url)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(url)
+            if cache is None:
+                cache = _caches[url] = CommentCache(listener)
+    return cache
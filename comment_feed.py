@@ -0,0 +1,103 @@
+# 댓글 피드 키셋 페이지네이션 - (created_at, id) 커서로 최신순, OFFSET 없음
+#
+# 처음에는 최신 PAGE_SIZE개만 받고, "더 보기"를 누를 때마다 화면의 마지막 댓글 다음부터 한 페이지씩
+# 더 받습니다. 펼친 범위는 세션에 커서(가장 오래된 댓글)로만 남기고, rerun마다 그 커서까지를
+# 한 번에 다시 읽으므로 새 댓글/삭제도 반영되고 조회는 펼친 댓글 max-rows개마다 한 번입니다.
+import os
+
+import streamlit as st
+
+PAGE_SIZE = int(os.environ.get('COMMENT_PAGE_SIZE', 20))
+# 로그인하지 않은 사용자에게 보여주는 최근 댓글 수
+PREVIEW_SIZE = 5
+# Supabase(PostgREST)의 max-rows 기본값과 맞춤 (이보다 크게 요청해도 잘려서 옴)
+MAX_ROWS = int(os.environ.get('SUPABASE_MAX_ROWS', 1000))
+
+
+def cursor(comment):
+    return (comment['created_at'], comment['id'])
+
+
+def page_query(query, limit=PAGE_SIZE, before=None, until=None):
+    """user_comments select 쿼리에 커서 조건/정렬/개수 적용
+
+    before: 이 커서보다 오래된 댓글 limit개 (다음 페이지)
+    until: 최신 댓글부터 이 커서까지 최대 limit개 (이미 펼친 범위를 다시 읽을 때, 전부는 select_page로)
+    """
+    conditions = []
+    if before is not None:
+        created_at, comment_id = before
+        conditions.append(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{comment_id})')
+    if until is not None:
+        created_at, comment_id = until
+        conditions.append(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gte.{comment_id})')
+    if len(conditions) == 1:
+        query = query.or_(conditions[0])
+    elif conditions:
+        query = query.or_('and(' + ','.join(f'or({c})' for c in conditions) + ')')
+    return query.order('created_at', desc=True).order('id', desc=True).limit(limit)
+
+
+def select_page(new_query, limit=PAGE_SIZE, before=None, until=None, page_size=MAX_ROWS):
+    """page_query 범위의 댓글 (new_query: user_comments select 쿼리를 새로 만드는 함수)
+
+    until 범위는 펼친 만큼 길어지고 응답은 max-rows에서 잘리므로, 같은 키셋으로 page_size씩 이어 받습니다.
+    """
+    if until is None:
+        return page_query(new_query(), limit, before).execute().data
+    rows = []
+    while True:
+        page = page_query(new_query(), page_size, before, until).execute().data
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        before = cursor(page[-1])
+
+
+def select_replies(new_query, comment_ids, page_size=MAX_ROWS):
+    """여러 댓글의 답글 전부 -> {댓글 id: 답글 목록} (created_at 오름차순)
+
+    new_query: comment_replies select 쿼리를 새로 만드는 함수. 응답은 max-rows에서 잘리므로
+    (created_at, id) 키셋으로 page_size씩 이어 받습니다.
+    """
+    replies = {}
+    after = None
+    while True:
+        query = new_query().in_('comment_id', list(comment_ids))
+        if after is not None:
+            created_at, reply_id = after
+            query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{reply_id})')
+        page = query.order('created_at').order('id').limit(page_size).execute().data
+        for reply in page:
+            replies.setdefault(reply['comment_id'], []).append(reply)
+        if len(page) < page_size:
+            return replies
+        after = cursor(page[-1])
+
+
+def shown_until(key='comment_feed'):
+    """지금까지 펼친 범위의 끝 커서 (첫 페이지만 보고 있으면 None)"""
+    return st.session_state.get(f'{key}_until')
+
+
+def _load_more(get_page, last, key, page_size):
+    page = get_page(limit=page_size, before=last)
+    if page:
+        st.session_state[f'{key}_until'] = cursor(page[-1])
+    if len(page) < page_size:
+        st.session_state[f'{key}_done'] = True
+
+
+def load_more_button(comments, get_page, key='comment_feed', page_size=PAGE_SIZE):
+    """목록 아래 "더 보기" 버튼 (get_page(limit=, before=)로 다음 페이지를 받아 범위를 넓힘)"""
+    if not comments or st.session_state.get(f'{key}_done'):
+        return
+    if shown_until(key) is None and len(comments) < page_size:
+        return
+    st.button(
+        "⬇️ 이전 댓글 더 보기",
+        key=f'{key}_more',
+        use_container_width=True,
+        on_click=_load_more,
+        args=(get_page, cursor(comments[-1]), key, page_size)
+    )
@@ -0,0 +1,126 @@
+# 댓글/답글 카드 렌더러 - 공용 스타일시트 + 카드 HTML 메모이즈 + 피드를 한 요소로 출력
+#
+# 카드마다 인라인 CSS를 붙여 st.markdown을 따로 부르면 50개 피드에서 요소 100개 이상,
+# 웹소켓으로 수십 KB가 매 rerun마다 나갑니다. 스타일은 클래스로 한 번만 보내고,
+# 카드 HTML은 (종류, id, 내용)별로 한 번 만들어 두고, 보이는 피드 전체를 하나의
+# markdown 요소로 보냅니다. 답글은 카드 안의 <details>로 접어 둡니다.
+import html
+from functools import lru_cache
+
+import streamlit as st
+
+import perf_metrics
+
+STYLESHEET = """
+<style>
+.cf-card {
+    background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
+    padding: 18px;
+    border-radius: 12px;
+    margin: 15px 0;
+    border: 1px solid #e9ecef;
+    border-left: 5px solid #28a745;
+    box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+}
+.cf-card.cf-question { border-left-color: #007bff; }
+.cf-card.cf-compact { padding: 15px; margin: 12px 0; border-left: 4px solid #dee2e6; }
+.cf-head { display: flex; align-items: center; margin-bottom: 10px; }
+.cf-user { font-weight: bold; color: #212529; font-size: 16px; }
+.cf-badge {
+    background: #d4edda; color: #155724; border: 1px solid #c3e6cb;
+    padding: 4px 12px; border-radius: 15px; font-size: 13px; font-weight: 600; margin-left: 12px;
+}
+.cf-question .cf-badge { background: #cce7ff; color: #004085; border-color: #b8daff; }
+.cf-compact .cf-badge { background: #e9ecef; color: #495057; border-color: #dee2e6; }
+.cf-time { color: #6c757d; font-size: 13px; margin-left: auto; font-weight: 500; }
+.cf-body {
+    color: #2c3e50; line-height: 1.6; font-size: 15px;
+    background: rgba(255,255,255,0.7); padding: 12px; border-radius: 8px; border: 1px solid rgba(0,0,0,0.05);
+}
+.cf-thread summary { cursor: pointer; color: #495057; font-size: 14px; margin-top: 10px; }
+.cf-reply {
+    background: linear-gradient(135deg, #ffffff 0%, #fafbfc 100%);
+    padding: 14px; margin: 8px 0; border-radius: 10px;
+    border: 1px solid #e9ecef; border-left: 4px solid #6c757d; box-shadow: 0 1px 4px rgba(0,0,0,0.05);
+}
+.cf-reply .cf-user { color: #495057; font-size: 14px; }
+.cf-reply .cf-time { margin-left: 10px; font-size: 12px; background: #f8f9fa; padding: 2px 6px; border-radius: 8px; }
+.cf-reply .cf-body { font-size: 14px; line-height: 1.5; padding: 8px; margin-top: 8px; border: none; }
+</style>
+"""
+
+# 카드 HTML 메모 개수 (댓글 + 답글, 피드 몇 페이지 분량)
+CARD_CACHE_SIZE = 2048
+
+
+def inject_styles():
+    """페이지에 스타일시트를 한 번 넣음 (피드보다 먼저 호출)"""
+    st.markdown(STYLESHEET, unsafe_allow_html=True)
+
+
+def _time(created_at):
+    return html.escape(str(created_at)[:16].replace('T', ' '))
+
+
+def _text(content):
+    # 빈 줄이 있으면 markdown이 HTML 블록을 끊으므로 줄바꿈은 <br>로
+    return html.escape(content).replace('\n', '<br>')
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def _comment_card(comment_id, username, comment_type, created_at, content, compact):
+    # comment_id는 키로만 씀 (같은 내용이라도 댓글마다 따로)
+    question = comment_type != "comment"
+    classes = 'cf-card' + (' cf-question' if question else '') + (' cf-compact' if compact else '')
+    return (
+        f'<div class="cf-head"><span class="cf-user">{"❓" if question else "💪"} {html.escape(username)}</span>'
+        f'<span class="cf-badge">{"질문" if question else "응원"}</span>'
+        + ('' if compact else f'<span class="cf-time">{_time(created_at)}</span>')
+        + f'</div><div class="cf-body">{_text(content)}</div>',
+        classes
+    )
+
+
+@lru_cache(maxsize=CARD_CACHE_SIZE)
+def _reply_card(reply_id, username, created_at, content):
+    return (
+        f'<div class="cf-reply"><div><span class="cf-user">{html.escape(username)}</span>'
+        f'<span class="cf-time">{_time(created_at)}</span></div>'
+        f'<div class="cf-body">{_text(content)}</div></div>'
+    )
+
+
+def comment_html(comment, replies=None, compact=False):
+    """댓글 카드 하나 (replies를 주면 접을 수 있는 답글 목록 포함)"""
+    head, classes = _comment_card(
+        comment['id'], comment['username'] or '', comment['type'], comment['created_at'],
+        comment['content'] or '', compact
+    )
+    thread = ''
+    if replies is not None:
+        thread = (
+            f'<details class="cf-thread"><summary>💬 답글 ({len(replies)}개)</summary>'
+            + ''.join(_reply_card(r['id'], r['username'] or '', r['created_at'], r['content'] or '') for r in replies)
+            + '</details>'
+        )
+    return f'<div class="{classes}">{head}{thread}</div>'
+
+
+def render_feed(comments, replies_by_comment=None, compact=False):
+    """보이는 댓글 전체를 하나의 markdown 요소로 출력 (replies_by_comment가 없으면 답글 생략)"""
+    with perf_metrics.span('render.comment_feed'):
+        st.markdown(''.join(
+            comment_html(c, replies_by_comment.get(c['id'], []) if replies_by_comment is not None else None, compact)
+            for c in comments
+        ), unsafe_allow_html=True)
+
+
+def reply_form(comments, key='reply_form'):
+    """피드 아래 답글 작성 폼 하나 (댓글마다 입력창을 두지 않음) -> 제출하면 (댓글 id, 내용), 아니면 None"""
+    labels = {c['id']: f"{c['username'] or ''}: {(c['content'] or '')[:30]}" for c in comments}
+    with st.form(key, clear_on_submit=True):
+        comment_id = st.selectbox("답글 달 댓글", list(labels), format_func=labels.get)
+        content = st.text_input("답글 작성", placeholder="답글을 입력하세요...")
+        if st.form_submit_button("답글 달기") and content.strip():
+            return comment_id, content
+    return None
@@ -0,0 +1,167 @@
+# 차트 렌더링 전 시계열 다운샘플링 (LTTB / 구간별 최소·최대)
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# 브라우저로 보내는 점 개수 기준 (차트 가로 픽셀당 점 개수)
+FULL_CHART_WIDTH = 1200
+HALF_CHART_WIDTH = 600
+POINTS_PER_PIXEL = 1
+
+_CACHE_SIZE = 64
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def target_points(width_px=FULL_CHART_WIDTH, points_per_px=POINTS_PER_PIXEL):
+    """차트 너비에 맞는 목표 점 개수"""
+    return max(int(width_px * points_per_px), 3)
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets로 남길 행 위치(index) 계산"""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # 처음/마지막 점을 제외한 나머지를 n_out - 2개 구간으로 나눔
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    # 구간 평균은 누적합으로 한 번에 계산
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.nancumsum(y)))
+    counts = np.maximum(edges[1:] - edges[:-1], 1)
+    avg_x = (cx[edges[1:]] - cx[edges[:-1]]) / counts
+    avg_y = (cy[edges[1:]] - cy[edges[:-1]]) / counts
+
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0] = 0
+    idx[-1] = n - 1
+
+    a = 0
+    n_buckets = n_out - 2
+    for b in range(n_buckets):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 1 < n_buckets:
+            nx, ny = avg_x[b + 1], avg_y[b + 1]
+        else:
+            nx, ny = x[-1], y[-1]
+
+        area = np.abs((x[a] - nx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (ny - y[a]))
+        area = np.where(np.isnan(area), -1.0, area)
+        a = lo + int(np.argmax(area))
+        idx[b + 1] = a
+
+    return idx
+
+
+def minmax_indices(y, n_out):
+    """구간마다 최소/최대 점만 남기는 행 위치 계산 (피크가 사라지지 않음)"""
+    n = len(y)
+    n_buckets = n_out // 2
+    if n <= n_out or n_buckets < 1:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    size = math.ceil(n / n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+
+    nan = np.isnan(buckets)
+    lo = np.where(nan, np.inf, buckets).argmin(axis=1)
+    hi = np.where(nan, -np.inf, buckets).argmax(axis=1)
+
+    base = np.arange(n_buckets) * size
+    idx = np.sort(np.stack([base + lo, base + hi], axis=1), axis=1).ravel()
+    idx = np.minimum(idx, n - 1)
+    return np.unique(np.concatenate(([0], idx, [n - 1])))
+
+
+def envelope_frame(df, col, n_out=None, x_col='created_at'):
+    """집계 프레임({col}_min/{col}_max)을 연속 구간으로 묶은 최저/최고 포락선 (원본 프레임이면 None)
+
+    구간마다 최저값의 최저, 최고값의 최고를 남기므로 평균선에서 사라지는 짧은 피크도 띠에 남습니다.
+    """
+    lo_col, hi_col = f'{col}_min', f'{col}_max'
+    if lo_col not in df or hi_col not in df or df.empty:
+        return None
+    n_out = n_out or target_points()
+    n = len(df)
+    size = max(math.ceil(n / n_out), 1)
+    starts = np.arange(0, n, size)
+    lo = df[lo_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    hi = df[hi_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    # fmin/fmax는 NaN(값이 없는 구간)을 건너뜀
+    return pd.DataFrame({
+        x_col: df[x_col].iloc[starts].reset_index(drop=True),
+        lo_col: np.fmin.reduceat(lo, starts),
+        hi_col: np.fmax.reduceat(hi, starts),
+    })
+
+
+def data_version(df, x_col='created_at'):
+    """프레임 내용이 바뀌었는지 판단하는 가벼운 키 (행 수, 처음/마지막 시각, 마지막 행 값)
+
+    집계 프레임은 새 행이 들어와도 마지막 구간의 값만 바뀌므로 마지막 행 값도 포함합니다.
+    """
+    if df.empty:
+        return (0, None, None, None)
+    # NaN은 자기 자신과도 같지 않아서 키에 남으면 캐시가 맞지 않으므로 None으로
+    last = tuple(None if pd.isna(value) else value for value in df.iloc[-1].tolist())
+    return (len(df), df[x_col].iloc[0], df[x_col].iloc[-1], last)
+
+
+def downsample_frame(df, y_cols, n_out=None, method='lttb', x_col='created_at'):
+    """컬럼별로 다운샘플링한 (x_col, y_col) 프레임 dict
+
+    같은 데이터 버전/점 개수/방식이면 이전 결과를 그대로 돌려줍니다.
+    """
+    n_out = n_out or target_points()
+    version = data_version(df, x_col)
+
+    result = {}
+    for col in y_cols:
+        key = (version, x_col, col, n_out, method)
+        with _cache_lock:
+            cached = _cache.get(key)
+            if cached is not None:
+                _cache.move_to_end(key)
+        if cached is None:
+            cached = _downsample_column(df, x_col, col, n_out, method)
+            with _cache_lock:
+                _cache[key] = cached
+                while len(_cache) > _CACHE_SIZE:
+                    _cache.popitem(last=False)
+        result[col] = cached
+    return result
+
+
+def _downsample_column(df, x_col, col, n_out, method):
+    if len(df) <= n_out:
+        return df[[x_col, col]]
+
+    x = df[x_col]
+    # 내림차순(최신이 맨 앞) 프레임이면 뒤집어서 계산
+    reverse = x.iloc[0] > x.iloc[-1]
+    x_values = x.to_numpy(dtype='datetime64[ns]') if hasattr(x, 'dt') else x.to_numpy()
+    y_values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    if reverse:
+        x_values = x_values[::-1]
+        y_values = y_values[::-1]
+
+    if method == 'minmax':
+        idx = minmax_indices(y_values, n_out)
+    else:
+        x_num = (x_values - x_values[0]).astype('timedelta64[ns]').astype(np.float64)
+        idx = lttb_indices(x_num, y_values, n_out)
+
+    if reverse:
+        idx = (len(df) - 1 - idx)[::-1]
+    return df[[x_col, col]].iloc[idx]
@@ -0,0 +1,76 @@
+# Supabase REST 호출용 공용 HTTP 세션 (커넥션 재사용, 타임아웃, 재시도)
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import perf_metrics
+
+CONNECT_TIMEOUT = float(os.environ.get('SUPABASE_CONNECT_TIMEOUT', 3.05))
+READ_TIMEOUT = float(os.environ.get('SUPABASE_READ_TIMEOUT', 15))
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+MAX_RETRIES = int(os.environ.get('SUPABASE_MAX_RETRIES', 3))
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+# 타임아웃/연결 실패 등 전송 계층 오류
+RequestException = requests.RequestException
+
+POOL_CONNECTIONS = 4   # 유지할 호스트별 풀 개수
+POOL_MAXSIZE = 16      # 호스트당 유지할 최대 연결 수
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def create_session(max_retries=MAX_RETRIES, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+    """keep-alive 커넥션 풀과 재시도 정책을 가진 세션 생성
+
+    조회(GET)는 5xx/429에서 지수 백오프로 재시도하고, POST는 서버에 도달하지 못한
+    연결 오류에서만 재시도합니다 (중복 insert 방지).
+    """
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        read=max_retries,
+        status=max_retries,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        backoff_factor=BACKOFF_FACTOR,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        max_retries=retry,
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=True,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """프로세스 전체가 함께 쓰는 세션"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def get(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    with perf_metrics.span(f"http GET {urlsplit(url).path}"):
+        return get_session().get(url, timeout=timeout, **kwargs)
+
+
+def post(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    with perf_metrics.span(f"http POST {urlsplit(url).path}"):
+        return get_session().post(url, timeout=timeout, **kwargs)
@@ -0,0 +1,315 @@
+# ESP8266 측정값 수집 게이트웨이 - 장치별 요청을 모아서 maintable2에 묶음 insert
+#   SUPABASE_URL=... SUPABASE_KEY=... python ingest_gateway.py --port 8081
+#
+#   POST /readings   {"light": 42, "temperature": 23.1, "humidity": 55.0, "device_id": "esp8266-02"} 또는 그 배열
+#                    (device_id를 빼면 'esp8266', 묶음 insert는 모든 행의 키가 같아야 해서 항상 채움)
+#                    장치가 보낸 created_at(측정 시각)은 measured_at에 넣고, 없으면 접수 시각을 넣음
+#                    202 = 접수됨, 400 = 값이 숫자가 아니거나 created_at이 시각이 아님,
+#                    503 = 큐가 가득 참 (Retry-After 후 다시 전송), 413 = 한 요청이 배치보다 큼
+#   GET  /health     큐 길이/누적 처리 수
+#   GET  /metrics    Prometheus 텍스트 (접수->커밋 지연, 배치 insert 시간, 큐 길이)
+#
+# 행마다 접수할 때 ingest_id(UUID)를 붙이고 on_conflict=ingest_id + ignore-duplicates로 넣으므로,
+# 응답을 못 받은 배치(읽기 타임아웃 등)를 다시 보내도 중복 행이 생기지 않습니다 (maintable2_ingest.sql).
+# Supabase가 4xx로 거절한 배치는 반씩 나눠 다시 보내서 거절되는 행만 버립니다 (큐 앞을 막지 않음).
+# created_at은 보내지 않고 DB가 insert할 때 정합니다. 장치 시각이나 되돌린 배치를 그대로 쓰면 먼저
+# 커밋된 행보다 앞선 created_at이 생겨서, 워터마크 이후만 받는 대시보드 캐시가 그 행을 놓칩니다.
+import argparse
+import json
+import logging
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import http_transport
+import perf_metrics
+from sensor_store import DEFAULT_DEVICE
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = int(os.environ.get('INGEST_BATCH_SIZE', 500))           # 이만큼 모이면 바로 insert
+BATCH_INTERVAL = float(os.environ.get('INGEST_BATCH_INTERVAL', 1.0))  # 첫 행 접수 후 최대 대기(초)
+MAX_QUEUE = int(os.environ.get('INGEST_MAX_QUEUE', 20000))            # 넘치면 503으로 거절
+RETRY_AFTER = 2                                                       # 503 응답의 Retry-After(초)
+MAX_BACKOFF = 30
+READING_FIELDS = ('light', 'temperature', 'humidity')
+# 다시 보내면 결과가 달라질 수 있는 4xx (나머지 4xx는 배치 내용이 잘못된 것)
+TRANSIENT_STATUS = (408, 429)
+# on_conflict에 맞는 unique 인덱스가 없음 (maintable2_ingest.sql을 실행하지 않음) -> 행 문제가 아님
+MISSING_CONFLICT_TARGET = '42P10'
+
+
+class BatchRejected(Exception):
+    """Supabase가 배치 내용을 거절함 (같은 행을 다시 보내도 같은 결과)"""
+
+
+class IngestQueue:
+    """한도가 있는 접수 큐 (요청 하나의 행들은 전부 받거나 전부 거절)"""
+
+    def __init__(self, max_size=MAX_QUEUE, batch_size=BATCH_SIZE, interval=BATCH_INTERVAL):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.items = deque()    # (접수 시각 perf_counter, 행)
+        self.cond = threading.Condition()
+
+    def offer(self, rows):
+        now = time.perf_counter()
+        with self.cond:
+            if len(self.items) + len(rows) > self.max_size:
+                return False
+            was_empty = not self.items
+            self.items.extend((now, row) for row in rows)
+            # 첫 행이 들어오면 배치 타이머 시작, batch_size가 차면 바로 insert
+            if was_empty or len(self.items) >= self.batch_size:
+                self.cond.notify()
+            return True
+
+    def take_batch(self):
+        """batch_size개가 모이거나 가장 오래된 행이 interval만큼 기다렸으면 꺼냄"""
+        with self.cond:
+            while not self.items:
+                self.cond.wait()
+            deadline = self.items[0][0] + self.interval
+            while len(self.items) < self.batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+            count = min(self.batch_size, len(self.items))
+            return [self.items.popleft() for _ in range(count)]
+
+    def put_back(self, batch):
+        """insert에 실패한 배치를 순서를 유지해서 맨 앞에 되돌림 (한도와 무관)"""
+        with self.cond:
+            self.items.extendleft(reversed(batch))
+
+    def __len__(self):
+        return len(self.items)
+
+
+class IngestGateway:
+    def __init__(self, url, key, table='maintable2', queue=None):
+        self.endpoint = f"{url.rstrip('/')}/rest/v1/{table}"
+        self.params = {'on_conflict': 'ingest_id'}
+        self.headers = {
+            'apikey': key,
+            'Authorization': f'Bearer {key}',
+            'Content-Type': 'application/json',
+            # 넣은 행을 돌려받지 않고, 이미 들어간 ingest_id는 건너뜀 (재전송해도 중복 없음)
+            'Prefer': 'return=minimal,resolution=ignore-duplicates',
+        }
+        self.queue = queue if queue is not None else IngestQueue()
+        self.committed = 0
+        self.rejected = 0      # 큐가 가득 차서 접수하지 않은 행
+        self.dropped = 0       # Supabase가 거절해서 버린 행
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run_forever, name='ingest-batcher', daemon=True)
+            self.thread.start()
+        return self
+
+    def accept(self, rows):
+        if self.queue.offer(rows):
+            return True
+        self.rejected += len(rows)
+        return False
+
+    def _run_forever(self):
+        backoff = 1
+        while True:
+            if self.flush(self.queue.take_batch(), backoff):
+                backoff = 1
+            else:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, MAX_BACKOFF)
+
+    def flush(self, batch, backoff=0):
+        """배치 하나를 insert -> 성공 여부 (일시 오류면 끝나지 않은 행을 순서대로 큐 앞에 되돌림)"""
+        done = []       # 들어갔거나 거절되어 버린 (접수 시각, 행)
+        try:
+            self._commit(batch, done)
+            return True
+        except Exception as e:
+            # 네트워크/5xx/타임아웃: 응답을 못 받은 행은 이미 들어갔더라도 ingest_id로 걸러지므로 다시 보냄
+            finished = {id(item) for item in done}
+            rest = [item for item in batch if id(item) not in finished]
+            logger.warning(f"배치 insert 실패 ({len(rest)}행), {backoff}초 후 재시도: {e}")
+            self.queue.put_back(rest)
+            return False
+
+    def _commit(self, batch, done):
+        """배치 insert (거절되면 반씩 나눠 다시 보내서 거절된 행만 버림), 끝난 항목은 done에 추가"""
+        try:
+            self._insert([row for _, row in batch])
+        except BatchRejected as e:
+            if len(batch) > 1:
+                middle = len(batch) // 2
+                self._commit(batch[:middle], done)
+                self._commit(batch[middle:], done)
+                return
+            logger.error(f"거절된 행을 버림: {batch[0][1]} ({e})")
+            self.dropped += 1
+            done.extend(batch)
+            return
+        committed_at = time.perf_counter()
+        for accepted_at, _ in batch:
+            perf_metrics.record('ingest.accept_to_commit', committed_at - accepted_at)
+        self.committed += len(batch)
+        done.extend(batch)
+
+    def _insert(self, rows):
+        with perf_metrics.span('ingest.batch_insert'):
+            response = http_transport.post(self.endpoint, params=self.params, headers=self.headers, json=rows)
+        if response.status_code in (200, 201, 204):
+            return
+        message = f"{response.status_code} {response.text[:200]}"
+        if 400 <= response.status_code < 500 and response.status_code not in TRANSIENT_STATUS:
+            if MISSING_CONFLICT_TARGET not in response.text:
+                raise BatchRejected(message)
+            logger.error("maintable2.ingest_id unique 인덱스가 없습니다 (maintable2_ingest.sql 실행 필요)")
+        raise RuntimeError(message)
+
+    def metrics_text(self):
+        return perf_metrics.prometheus_text() + (
+            '# TYPE ingest_queue_depth gauge\n'
+            f'ingest_queue_depth {len(self.queue)}\n'
+            '# TYPE ingest_rows_committed_total counter\n'
+            f'ingest_rows_committed_total {self.committed}\n'
+            '# TYPE ingest_rows_rejected_total counter\n'
+            f'ingest_rows_rejected_total {self.rejected}\n'
+            '# TYPE ingest_rows_dropped_total counter\n'
+            f'ingest_rows_dropped_total {self.dropped}\n'
+        )
+
+
+def _number(item, field):
+    value = item[field]
+    # bool은 int의 하위 타입이지만 측정값이 아님, NaN/Infinity는 json.loads가 받아 줌
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{field}는 숫자여야 합니다: {value!r}")
+    return value
+
+
+def _timestamp(value):
+    if not isinstance(value, str):
+        raise ValueError(f"created_at은 ISO 8601 문자열이어야 합니다: {value!r}")
+    try:
+        ts = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"created_at은 ISO 8601 시각이어야 합니다: {value!r}") from None
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)   # PostgREST와 같이 시간대가 없으면 UTC
+    return ts.isoformat()
+
+
+def parse_readings(body):
+    """요청 본문 -> maintable2 행 목록 (measured_at = 장치의 created_at 또는 접수 시각, 잘못된 값이 하나라도 있으면 ValueError)"""
+    payload = json.loads(body)
+    items = payload if isinstance(payload, list) else [payload]
+    now = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for item in items:
+        if not isinstance(item, dict) or not all(field in item for field in READING_FIELDS):
+            raise ValueError(f"필수 값 누락: {', '.join(READING_FIELDS)}")
+        row = {field: _number(item, field) for field in READING_FIELDS}
+        device_id = item.get('device_id') or DEFAULT_DEVICE
+        if not isinstance(device_id, str):
+            raise ValueError(f"device_id는 문자열이어야 합니다: {device_id!r}")
+        row['device_id'] = device_id
+        row['measured_at'] = _timestamp(item['created_at']) if item.get('created_at') else now
+        row['ingest_id'] = str(uuid.uuid4())
+        rows.append(row)
+    return rows
+
+
+def make_handler(gateway, token=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, obj=None, content_type='application/json', headers=None):
+            body = b'' if obj is None else (
+                obj.encode('utf-8') if isinstance(obj, str) else json.dumps(obj, ensure_ascii=False).encode('utf-8')
+            )
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                return self._send(200, {
+                    'queue': len(gateway.queue),
+                    'committed': gateway.committed,
+                    'rejected': gateway.rejected,
+                    'dropped': gateway.dropped,
+                })
+            if self.path == '/metrics':
+                return self._send(200, gateway.metrics_text(), 'text/plain; version=0.0.4; charset=utf-8')
+            self._send(404, {'message': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/readings':
+                return self._send(404, {'message': 'not found'})
+            if token and self.headers.get('Authorization') != f'Bearer {token}':
+                return self._send(401, {'message': 'invalid token'})
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                rows = parse_readings(self.rfile.read(length))
+            except (ValueError, TypeError) as e:
+                return self._send(400, {'message': str(e)})
+            if len(rows) > gateway.queue.batch_size:
+                # 큐가 비어 있어도 한 배치에 못 담는 크기는 재시도해도 소용없으므로 413
+                return self._send(413, {'message': f'한 요청에 최대 {gateway.queue.batch_size}개'})
+
+            if not gateway.accept(rows):
+                # 장치는 Retry-After 뒤에 같은 값을 다시 보내면 됨 (접수되지 않았으므로 중복 없음)
+                return self._send(503, {'message': 'queue full'}, headers={'Retry-After': str(RETRY_AFTER)})
+            self._send(202, {'accepted': len(rows)})
+
+    return Handler
+
+
+def serve(url, key, host='0.0.0.0', port=8081, token=None, batch_size=BATCH_SIZE):
+    gateway = IngestGateway(url, key, queue=IngestQueue(batch_size=batch_size)).start()
+    server = ThreadingHTTPServer((host, port), make_handler(gateway, token))
+    server.daemon_threads = True
+    return server, gateway
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ESP8266 측정값 묶음 insert 게이트웨이')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--url', default=os.environ.get('SUPABASE_URL'), help='Supabase(또는 로컬 대역) URL')
+    parser.add_argument('--key', default=os.environ.get('SUPABASE_KEY'))
+    parser.add_argument('--token', default=os.environ.get('INGEST_TOKEN'), help='설정하면 장치가 Bearer 토큰을 보내야 함')
+    args = parser.parse_args()
+    if not args.url or not args.key:
+        parser.error("SUPABASE_URL/SUPABASE_KEY (또는 --url/--key)가 필요합니다")
+
+    logging.basicConfig(level=logging.INFO)
+    server, _ = serve(args.url, args.key, args.host, args.port, args.token)
+    logger.info(f"수집 게이트웨이 시작: http://{args.host}:{server.server_port}/readings")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,63 +1,25 @@
 # 통합 센서 모니터링 + 커뮤니티 대시보드 (상하 분할)
 import streamlit as st
-import pandas as pd
-import requests
+import http_transport
 import json
-from datetime import datetime, timedelta
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from datetime import datetime
 import plotly.express as px
-from supabase import create_client, Client
-import time
+from supabase import create_client, Client, ClientOptions
+from supabase_rest import SimpleSupabaseClient
+from sensor_repository import get_repository
+from downsample import target_points
+from sensor_charts import build_sensor_figure
+import parallel_fetch
+import comment_feed
+import comment_cache
+import comment_render
+import perf_metrics
+from realtime_listener import ChangeListener, realtime_url, watch_changes
 
 # =============================================================================
 # Supabase 설정 및 클라이언트들
 # =============================================================================
 
-# Simple REST API 클라이언트 (app.py 방식)
-class SimpleSupabaseClient:
-    def __init__(self, url, key):
-        self.url = url.rstrip('/')
-        self.key = key
-        self.headers = {
-            'apikey': key,
-            'Authorization': f'Bearer {key}',
-            'Content-Type': 'application/json',
-            'Prefer': 'return=representation'
-        }
-    
-    def select(self, table, columns="*", filters=None, order=None, limit=None):
-        endpoint = f"{self.url}/rest/v1/{table}"
-        params = {'select': columns}
-        
-        if filters:
-            for key, value in filters.items():
-                params[key] = value
-        
-        if order:
-            params['order'] = order
-            
-        if limit:
-            params['limit'] = limit
-        
-        response = requests.get(endpoint, headers=self.headers, params=params)
-        
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"데이터 조회 실패: {response.status_code}")
-            return []
-    
-    def insert(self, table, data):
-        endpoint = f"{self.url}/rest/v1/{table}"
-        response = requests.post(endpoint, headers=self.headers, json=data)
-        
-        if response.status_code in [200, 201]:
-            return True, response.json()
-        else:
-            return False, response.text
-
-
 try:
     supabase_url = st.secrets["SUPABASE_URL"]
     supabase_key = st.secrets["SUPABASE_KEY"]
@@ -70,73 +32,60 @@ except Exception:
 
 @st.cache_resource
 def init_supabase(url, key):
-    simple_client = SimpleSupabaseClient(url, key)
-    auth_client = create_client(url, key)
+    # 간단 댓글 insert도 댓글 캐시에 바로 반영
+    simple_client = SimpleSupabaseClient(
+        url, key, on_insert=lambda table, row: get_comment_cache().apply_insert(table, row)
+    )
+    auth_client = create_client(url, key, options=ClientOptions(
+        postgrest_client_timeout=http_transport.READ_TIMEOUT
+    ))
     return simple_client, auth_client
 
 simple_supabase, auth_supabase = init_supabase(supabase_url, supabase_key)
 
+@st.cache_resource
+def get_change_listener(url, key):
+    # 프로세스당 하나, 센서/댓글 테이블 INSERT를 Realtime으로 받음
+    return ChangeListener(realtime_url(url), key).start()
+
+change_listener = get_change_listener(supabase_url, supabase_key)
+
+def get_comment_cache():
+    # 프로세스당 하나, 세션들이 같은 댓글/답글 캐시를 공유 (Realtime INSERT로 갱신)
+    return comment_cache.get_cache(supabase_url, listener=change_listener)
+
 # =============================================================================
 # 센서 데이터 관련 함수들 (app.py 기반)
 # =============================================================================
 
-def get_sensor_data_simple(hours=24):
-    """센서 데이터 조회 (Simple REST API)"""
-    try:
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=hours)
-        
-        data = simple_supabase.select(
-            'maintable2',
-            columns='id,created_at,light,temperature,humidity',
-            filters={
-                'created_at': f'gte.{start_time.isoformat()}',
-            },
-            order='created_at.desc',
-            limit=1000
-        )
-        
-        if data:
-            if len(data) == 1000:
-                st.warning("⚠️ 데이터가 너무 많아 1000개만 표시합니다. 더 짧은 기간을 선택해주세요.")
-            df = pd.DataFrame(data)
-            df['created_at'] = pd.to_datetime(df['created_at'])
-            return df
-        else:
-            return pd.DataFrame()
-            
-    except Exception as e:
-        st.error(f"센서 데이터 조회 오류: {e}")
-        return pd.DataFrame()
+def get_sensor_repository(device_id=None):
+    # 프로세스당 하나(장치를 고르면 장치별로 하나), 다른 앱과 같은 수집/캐시/스냅샷을 공유
+    return get_repository(supabase_url, supabase_key, listener=change_listener, device_id=device_id)
+
+def get_sensor_data_simple(hours=24, device_id=None):
+    """센서 데이터 조회 (created_at 오름차순, 최신 데이터는 iloc[-1])"""
+    repo = get_sensor_repository(device_id)
+    if repo.error() is not None:
+        st.error(f"센서 데이터 조회 오류: {repo.error()}")
+    return repo.window(hours)
 
 
 
-def get_sensor_stats(df):
-    """센서 데이터 통계 계산"""
-    if df.empty:
-        return None
+def get_sensor_stats(hours=24, device_id=None):
+    """센서 데이터 통계 (행이 들어오고 나갈 때 증분 갱신된 값, 프레임을 다시 훑지 않음)"""
+    return get_sensor_repository(device_id).stats(hours)
+
+def prepare_sensor_view(hours, device_id=None):
+    """센서 데이터 조회 + 통계 + 차트 생성 (스크립트 스레드 밖에서 실행 가능)"""
+    df_sensor = get_sensor_data_simple(hours, device_id)
+    if df_sensor.empty:
+        return df_sensor, None, None
     
-    stats = {
-        "온도": {
-            "현재": df.iloc[0]['temperature'],
-            "평균": df['temperature'].mean(),
-            "최고": df['temperature'].max(),
-            "최저": df['temperature'].min()
-        },
-        "습도": {
-            "현재": df.iloc[0]['humidity'],
-            "평균": df['humidity'].mean(),
-            "최고": df['humidity'].max(),
-            "최저": df['humidity'].min()
-        },
-        "조도": {
-            "현재": df.iloc[0]['light'],
-            "평균": df['light'].mean(),
-            "최고": df['light'].max(),
-            "최저": df['light'].min()
-        }
-    }
-    return stats
+    # 긴 구간은 원본 대신 로컬 집계 테이블(1분/10분/1시간)로 차트를 그림
+    chart_source = get_sensor_repository(device_id).chart_frame(hours, target_points())
+    if chart_source is None:
+        chart_source = df_sensor
+    return df_sensor, get_sensor_stats(hours, device_id), build_sensor_figure(chart_source)
 
 # =============================================================================
 # 커뮤니티 관련 함수들 (member_bbs.py 기반)
@@ -170,6 +119,7 @@ def sign_in(email, password):
 def sign_out():
     auth_supabase.auth.sign_out()
 
+@perf_metrics.timed('supabase.insert user_comments')
 def add_comment(user_id, username, content, comment_type="comment"):
     try:
         data = {
@@ -181,20 +131,28 @@ def add_comment(user_id, username, content, comment_type="comment"):
         }
         
         response = auth_supabase.table('user_comments').insert(data).execute()
+        # 저장된 행을 캐시에 바로 반영 (다음 rerun도 조회 없이 새 댓글이 보임)
+        get_comment_cache().apply_insert('user_comments', response.data[0] if response.data else data)
         return True, None
     except Exception as e:
         return False, str(e)
 
-def get_comments():
+@perf_metrics.timed('supabase.select user_comments')
+def select_comments(limit=comment_feed.PAGE_SIZE, before=None, until=None):
+    """최신순 댓글 한 페이지 조회 (before/until 커서는 comment_feed.page_query 참고)"""
+    return comment_feed.select_page(
+        lambda: auth_supabase.table('user_comments').select("*"), limit, before, until
+    )
+
+def get_comments(limit=comment_feed.PAGE_SIZE, before=None, until=None):
+    """최신순 댓글 한 페이지 (공유 캐시에 있으면 조회 없음)"""
     try:
-        response = auth_supabase.table('user_comments').select("*").order(
-            'created_at', desc=True
-        ).limit(50).execute()
-        return response.data
+        return get_comment_cache().comments(select_comments, limit, before, until)
     except Exception as e:
         st.error(f"댓글 조회 오류: {e}")
         return []
 
+@perf_metrics.timed('supabase.insert comment_replies')
 def add_reply(comment_id, user_id, username, content):
     try:
         data = {
@@ -206,18 +164,34 @@ def add_reply(comment_id, user_id, username, content):
         }
         
         response = auth_supabase.table('comment_replies').insert(data).execute()
+        # 이 댓글의 스레드만 갱신
+        get_comment_cache().apply_insert('comment_replies', response.data[0] if response.data else data)
         return True, None
     except Exception as e:
         return False, str(e)
 
-def get_replies(comment_id):
+@perf_metrics.timed('supabase.select comment_replies')
+def select_replies(comment_ids):
+    """여러 댓글의 답글을 조회 -> {댓글 id: 답글 목록} (max-rows를 넘으면 키셋 페이지로 이어 받음)"""
+    return comment_feed.select_replies(
+        lambda: auth_supabase.table('comment_replies').select("*"), comment_ids
+    )
+
+def get_replies(comment_ids):
+    """여러 댓글의 답글 -> {댓글 id: 답글 목록} (캐시에 없는 스레드만 한 번에 조회)"""
     try:
-        response = auth_supabase.table('comment_replies').select("*").eq(
-            'comment_id', comment_id
-        ).order('created_at', desc=False).execute()
-        return response.data
+        return get_comment_cache().replies(select_replies, comment_ids)
     except Exception as e:
-        return []
+        return {comment_id: [] for comment_id in comment_ids}
+
+def get_recent_simple_comments():
+    """센서 간단 댓글용 최근 댓글 5개 (커뮤니티 피드와 같은 캐시에서)"""
+    return get_comments(limit=5)
+
+def fetch_community(until=None):
+    """화면에 펼친 댓글과 그 답글을 함께 조회 (페이지/댓글 수와 상관없이 조회 2번)"""
+    comments = get_comments(until=until)
+    return comments, get_replies([c['id'] for c in comments])
 
 # =============================================================================
 # 메인 앱
@@ -229,6 +203,7 @@ def main():
         layout="wide",
         initial_sidebar_state="expanded"
     )
+    perf_metrics.begin_run('integrated_board')
     
     # 세션 상태 초기화
     if 'user' not in st.session_state:
@@ -322,6 +297,14 @@ def main():
         if st.button("🔄 전체 새로고침", use_container_width=True):
             st.rerun()
     
+    # 커뮤니티 조회는 센서 조회/렌더링과 동시에 미리 시작
+    community_future = None
+    if community_section:
+        if st.session_state.user:
+            community_future = parallel_fetch.submit(fetch_community, comment_feed.shown_until())
+        else:
+            community_future = parallel_fetch.submit(get_comments, comment_feed.PREVIEW_SIZE)
+    
     # 메인 타이틀
     st.title("🌱 통합 센서 모니터링 & 커뮤니티")
     st.caption("ESP8266 센서 데이터 실시간 모니터링 + 커뮤니티 소통 플랫폼")
@@ -334,6 +317,12 @@ def main():
     if sensor_section:
         st.header("📊 실시간 센서 모니터링")
         
+        # 장치가 여럿이면 한 장치만 (여러 장치를 한 선/한 통계로 섞지 않도록)
+        device_id = None
+        devices = get_sensor_repository().devices()
+        if len(devices) > 1:
+            device_id = st.selectbox("📟 장치", devices)
+        
         # 시간 범위 선택
         col1, col2, col3 = st.columns([2, 1, 1])
         with col1:
@@ -347,15 +336,20 @@ def main():
         
         with col3:
             if st.button("📊 센서 데이터 새로고침"):
+                get_sensor_repository(device_id).refresh()
                 st.rerun()
         
-        # 센서 데이터 조회
+        # 센서 데이터 조회 (차트 준비까지 백그라운드에서)
+        sensor_future = parallel_fetch.submit(prepare_sensor_view, hours, device_id)
+        recent_future = None
+        if st.session_state.username_simple:
+            recent_future = parallel_fetch.submit(get_recent_simple_comments)
+        
         with st.spinner("센서 데이터를 불러오는 중..."):
-            df_sensor = get_sensor_data_simple(hours)
+            df_sensor, stats, fig = sensor_future.result()
         
         if not df_sensor.empty:
             # 현재 상태 표시
-            stats = get_sensor_stats(df_sensor)
             
             col1, col2, col3, col4 = st.columns(4)
             
@@ -384,62 +378,11 @@ def main():
                 st.metric(
                     "📊 데이터 개수", 
                     f"{len(df_sensor)}개",
-                    delta=f"마지막 업데이트: {df_sensor.iloc[0]['created_at'].strftime('%H:%M:%S')}"
+                    delta=f"마지막 업데이트: {df_sensor.iloc[-1]['created_at'].strftime('%H:%M:%S')}"
                 )
             
-            # 센서 데이터 차트
-            fig = make_subplots(
-                rows=3, cols=1,
-                subplot_titles=('🌡️ 온도 (°C)', '💧 습도 (%)', '☀️ 조도'),
-                vertical_spacing=0.08,
-                shared_xaxes=True
-            )
-            
-            # 온도 차트
-            fig.add_trace(
-                go.Scatter(
-                    x=df_sensor['created_at'], 
-                    y=df_sensor['temperature'],
-                    name='온도',
-                    line=dict(color='#ff6b6b', width=2),
-                    fill='tonexty'
-                ),
-                row=1, col=1
-            )
-            
-            # 습도 차트
-            fig.add_trace(
-                go.Scatter(
-                    x=df_sensor['created_at'], 
-                    y=df_sensor['humidity'],
-                    name='습도',
-                    line=dict(color='#4ecdc4', width=2),
-                    fill='tonexty'
-                ),
-                row=2, col=1
-            )
-            
-            # 조도 차트
-            fig.add_trace(
-                go.Scatter(
-                    x=df_sensor['created_at'], 
-                    y=df_sensor['light'],
-                    name='조도',
-                    line=dict(color='#ffe66d', width=2),
-                    fill='tonexty'
-                ),
-                row=3, col=1
-            )
-            
-            fig.update_layout(
-                height=600,
-                title_text="📈 센서 데이터 시계열 차트",
-                showlegend=False
-            )
-            
-            fig.update_xaxes(title_text="시간", row=3, col=1)
-            
-            st.plotly_chart(fig, use_container_width=True)
+            with perf_metrics.span('render.plotly_chart'):
+                st.plotly_chart(fig, use_container_width=True)
             
             # 센서 데이터에 대한 간단 댓글 시스템 (app.py 스타일)
             st.subheader("💭 센서 데이터 간단 댓글")
@@ -467,11 +410,7 @@ def main():
                             st.warning("내용을 입력해주세요.")
                 
                 # 최근 댓글들
-                recent_comments = simple_supabase.select(
-                    'user_comments',
-                    order='created_at.desc',
-                    limit=5
-                )
+                recent_comments = recent_future.result()
                 
                 if recent_comments:
                     for comment in recent_comments:
@@ -490,17 +429,13 @@ def main():
             st.warning("🔭 센서 데이터가 없습니다. ESP8266이 정상적으로 데이터를 전송하고 있는지 확인해주세요.")
         
         st.markdown("---")
-
-        # 자동 새로고침
-        if auto_refresh:
-            time.sleep(10)
-            st.rerun()
     
     # =============================================================================
     # 하단: 커뮤니티 섹션 (member_bbs.py 기반)
     # =============================================================================
     
     if community_section:
+        comment_render.inject_styles()
         st.header("💬 커뮤니티")
         st.caption("센서 데이터에 대한 응원이나 궁금한 점을 자유롭게 나누어보세요!")
         
@@ -556,135 +491,30 @@ def main():
                             st.warning("⚠️ 내용을 입력해주세요.")
 
             # 댓글 목록 - 가독성 개선 버전
-            comments = get_comments()
+            comments, replies_by_comment = community_future.result()
 
             if comments:
                 st.subheader("💭 최근 댓글들")
 
-                for comment in comments:
-                    # 댓글 타입에 따른 아이콘
-                    icon = "💪" if comment['type'] == "comment" else "❓"
-                    type_text = "응원" if comment['type'] == "comment" else "질문"
-
-                    with st.container():
-                        st.markdown(f"""
-                        <div style="
-                            background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
-                            padding: 18px;
-                            border-radius: 12px;
-                            margin: 15px 0;
-                            border-left: 5px solid {'#28a745' if comment['type'] == 'comment' else '#007bff'};
-                            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-                            border: 1px solid #e9ecef;
-                        ">
-                            <div style="display: flex; align-items: center; margin-bottom: 10px;">
-                                <span style="
-                                    font-weight: bold; 
-                                    color: #212529;
-                                    font-size: 16px;
-                                ">
-                                    {icon} {comment['username']}
-                                </span>
-                                <span style="
-                                    background: {'#d4edda' if comment['type'] == 'comment' else '#cce7ff'};
-                                    color: {'#155724' if comment['type'] == 'comment' else '#004085'};
-                                    padding: 4px 12px;
-                                    border-radius: 15px;
-                                    font-size: 13px;
-                                    font-weight: 600;
-                                    margin-left: 12px;
-                                    border: 1px solid {'#c3e6cb' if comment['type'] == 'comment' else '#b8daff'};
-                                ">
-                                    {type_text}
-                                </span>
-                                <span style="
-                                    color: #6c757d; 
-                                    font-size: 13px; 
-                                    margin-left: auto;
-                                    font-weight: 500;
-                                ">
-                                    {comment['created_at'][:16].replace('T', ' ')}
-                                </span>
-                            </div>
-                            <div style="
-                                color: #2c3e50;
-                                line-height: 1.6;
-                                font-size: 15px;
-                                padding: 8px 0;
-                                background: rgba(255,255,255,0.7);
-                                padding: 12px;
-                                border-radius: 8px;
-                                border: 1px solid rgba(0,0,0,0.05);
-                            ">
-                                {comment['content']}
-                            </div>
-                        </div>
-                        """, unsafe_allow_html=True)
-
-                        # 답글 기능
-                        with st.expander(f"💬 답글 ({len(get_replies(comment['id']))}개)", expanded=False):
-                            # 기존 답글들 표시
-                            replies = get_replies(comment['id'])
-                            for reply in replies:
-                                st.markdown(f"""
-                                <div style="
-                                    background: linear-gradient(135deg, #ffffff 0%, #fafbfc 100%);
-                                    padding: 14px;
-                                    margin: 8px 0;
-                                    border-radius: 10px;
-                                    border-left: 4px solid #6c757d;
-                                    border: 1px solid #e9ecef;
-                                    box-shadow: 0 1px 4px rgba(0,0,0,0.05);
-                                ">
-                                    <div style="margin-bottom: 6px;">
-                                        <strong style="color: #495057; font-size: 14px;">{reply['username']}</strong>
-                                        <span style="
-                                            color: #6c757d; 
-                                            font-size: 12px; 
-                                            margin-left: 10px;
-                                            background: #f8f9fa;
-                                            padding: 2px 6px;
-                                            border-radius: 8px;
-                                        ">
-                                            {reply['created_at'][:16].replace('T', ' ')}
-                                        </span>
-                                    </div>
-                                    <div style="
-                                        margin-top: 8px;
-                                        color: #2c3e50;
-                                        line-height: 1.5;
-                                        font-size: 14px;
-                                        background: rgba(255,255,255,0.8);
-                                        padding: 8px;
-                                        border-radius: 6px;
-                                    ">
-                                        {reply['content']}
-                                    </div>
-                                </div>
-                                """, unsafe_allow_html=True)
-
-                            # 새 답글 작성
-                            reply_content = st.text_input(
-                                f"답글 작성",
-                                key=f"reply_{comment['id']}",
-                                placeholder="답글을 입력하세요...",
-                                help="답글을 작성하고 Enter를 눌러주세요"
-                            )
-
-                            if st.button(f"답글 달기", key=f"reply_btn_{comment['id']}"):
-                                if reply_content.strip():
-                                    username = st.session_state.user.user_metadata.get('username', '익명')
-                                    success, error = add_reply(
-                                        comment['id'],
-                                        st.session_state.user.id,
-                                        username,
-                                        reply_content
-                                    )
-                                    if success:
-                                        st.success("답글이 등록되었습니다!")
-                                        st.rerun()
-                                    else:
-                                        st.error(f"답글 등록 실패: {error}")
+                comment_render.render_feed(comments, replies_by_comment)
+                comment_feed.load_more_button(comments, get_comments)
+
+                # 답글 작성은 피드 아래 폼 하나로
+                submitted = comment_render.reply_form(comments)
+                if submitted:
+                    comment_id, reply_content = submitted
+                    username = st.session_state.user.user_metadata.get('username', '익명')
+                    success, error = add_reply(
+                        comment_id,
+                        st.session_state.user.id,
+                        username,
+                        reply_content
+                    )
+                    if success:
+                        st.success("답글이 등록되었습니다!")
+                        st.rerun()
+                    else:
+                        st.error(f"답글 등록 실패: {error}")
             else:
                 st.info("💭 아직 댓글이 없습니다. 첫 번째 댓글을 남겨보세요!")
 
@@ -692,64 +522,24 @@ def main():
             st.info("💡 댓글을 남기려면 로그인이 필요합니다. 사이드바에서 로그인하거나 회원가입해주세요!")
 
             # 비로그인 사용자도 기존 댓글은 볼 수 있게
-            comments = get_comments()
+            comments = community_future.result()
             if comments:
                 st.subheader("💭 커뮤니티 댓글들")
-                for comment in comments[:5]:  # 최근 5개만 표시
-                    icon = "💪" if comment['type'] == "comment" else "❓"
-                    type_text = "응원" if comment['type'] == "comment" else "질문"
-
-                    st.markdown(f"""
-                    <div style="
-                        background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 100%);
-                        padding: 15px;
-                        border-radius: 10px;
-                        margin: 12px 0;
-                        border-left: 4px solid #dee2e6;
-                        border: 1px solid #e9ecef;
-                        box-shadow: 0 2px 6px rgba(0,0,0,0.08);
-                    ">
-                        <div style="display: flex; align-items: center; margin-bottom: 8px;">
-                            <span style="font-weight: bold; color: #495057; font-size: 15px;">
-                                {icon} {comment['username']}
-                            </span>
-                            <span style="
-                                background: #e9ecef;
-                                color: #495057;
-                                padding: 3px 8px;
-                                border-radius: 12px;
-                                font-size: 12px;
-                                font-weight: 600;
-                                margin-left: 10px;
-                                border: 1px solid #dee2e6;
-                            ">
-                                {type_text}
-                            </span>
-                        </div>
-                        <div style="
-                            color: #2c3e50;
-                            line-height: 1.5;
-                            font-size: 14px;
-                            background: rgba(255,255,255,0.8);
-                            padding: 10px;
-                            border-radius: 6px;
-                            border: 1px solid rgba(0,0,0,0.05);
-                        ">
-                            {comment['content']}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
+                comment_render.render_feed(comments, compact=True)
+    
+    # 이번 rerun의 구간별 처리 시간 (사이드바에서 켰을 때만)
+    perf_metrics.debug_panel()
     
-    # 자동 새로고침
-    if sensor_section and auto_refresh:
-        st.rerun()
-
     # 푸터
     st.markdown("---")
     st.markdown(
         "<div style='text-align: center; color: gray;'>🌱 통합 센서 모니터링 & 커뮤니티 시스템 | 실시간 업데이트</div>", 
         unsafe_allow_html=True
     )
+    
+    # 자동 새로고침 (Realtime 연결 중이면 바뀐 세션만, 센서 값 변경은 10초에 한 번까지, 끊기면 10초 폴링 - 둘 다 sleep 없는 fragment 타이머)
+    if sensor_section and auto_refresh:
+        watch_changes(change_listener, change_listener.tables, 'integrated', poll_interval=10)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,8 @@
+-- maintable2에 장치 구분 컬럼 추가 (Supabase SQL Editor에서 한 번 실행)
+-- 기존 행과 device_id를 보내지 않는 펌웨어의 값은 'esp8266'으로 들어감
+ALTER TABLE public.maintable2
+    ADD COLUMN IF NOT EXISTS device_id text NOT NULL DEFAULT 'esp8266';
+
+-- 장치별 구간 조회 (device_id=eq.X & created_at=gte.Y, order=created_at,id) 인덱스
+CREATE INDEX IF NOT EXISTS maintable2_device_created_idx
+    ON public.maintable2 (device_id, created_at, id);
@@ -0,0 +1,14 @@
+-- ingest_gateway.py 재전송 중복 방지용 키 (Supabase SQL Editor에서 한 번 실행)
+-- 게이트웨이는 행마다 ingest_id를 붙여 on_conflict=ingest_id로 넣으므로, 응답을 못 받은 배치를
+-- 다시 보내도 이미 들어간 행은 건너뜀. 장치가 직접 넣은 행은 NULL (unique 인덱스에서 서로 겹치지 않음)
+ALTER TABLE public.maintable2
+    ADD COLUMN IF NOT EXISTS ingest_id uuid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS maintable2_ingest_id_key
+    ON public.maintable2 (ingest_id);
+
+-- created_at은 DB가 insert할 때 정함 (게이트웨이는 보내지 않음), 장치가 잰 시각은 measured_at에
+ALTER TABLE public.maintable2
+    ALTER COLUMN created_at SET DEFAULT now();
+ALTER TABLE public.maintable2
+    ADD COLUMN IF NOT EXISTS measured_at timestamptz;
@@ -0,0 +1,17 @@
+-- Realtime INSERT 이벤트 켜기 (Supabase SQL Editor에서 한 번 실행)
+-- 대시보드는 realtime_listener로 maintable2/user_comments/comment_replies INSERT를 구독합니다.
+-- 테이블이 supabase_realtime publication에 없으면 연결은 되어도 이벤트가 오지 않으므로, 새 행은
+-- SENSOR_TOKEN_MAX_AGE/COMMENT_CACHE_MAX_TRUSTED_AGE마다의 조회로만 보이게 됩니다.
+DO $$
+DECLARE
+    t text;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['maintable2', 'user_comments', 'comment_replies'] LOOP
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_publication_tables
+            WHERE pubname = 'supabase_realtime' AND schemaname = 'public' AND tablename = t
+        ) THEN
+            EXECUTE format('ALTER PUBLICATION supabase_realtime ADD TABLE public.%I', t);
+        END IF;
+    END LOOP;
+END $$;
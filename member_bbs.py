@@ -1,21 +1,33 @@
 # 센서 모니터링 + 회원제 댓글 시스템 (maintable2 기반)
 import streamlit as st
-import pandas as pd
-from supabase import create_client, Client
-from datetime import datetime, timedelta
-import plotly.graph_objects as go
+from supabase import create_client, Client, ClientOptions
+from datetime import datetime
+import http_transport
 import plotly.express as px
-from plotly.subplots import make_subplots
+from sensor_repository import get_repository
+import perf_metrics
+from downsample import target_points
+from sensor_charts import build_sensor_figure
+import comment_feed
+import comment_cache
+import comment_render
 
 # Supabase 설정
 @st.cache_resource
 def init_connection():
     url = st.secrets["SUPABASE_URL"]
     key = st.secrets["SUPABASE_KEY"]
-    return create_client(url, key)
+    # supabase-py는 자체 httpx 커넥션 풀을 쓰므로 타임아웃만 맞춤
+    return create_client(url, key, options=ClientOptions(
+        postgrest_client_timeout=http_transport.READ_TIMEOUT
+    ))
 
 supabase = init_connection()
 
+def get_comment_cache():
+    # 프로세스당 하나, 세션들이 같은 댓글/답글 캐시를 공유 (Realtime 없이 COMMENT_CACHE_MAX_AGE마다 다시 받음)
+    return comment_cache.get_cache(st.secrets["SUPABASE_URL"])
+
 # 1. 사용자 인증 함수들
 def sign_up(email, password, username):
     try:
@@ -46,29 +58,19 @@ def sign_out():
     supabase.auth.sign_out()
 
 # 2. 센서 데이터 조회 (maintable2에서)
-def get_sensor_data(hours=24):
-    try:
-        # 최근 N시간의 센서 데이터 조회
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=hours)
-        
-        response = supabase.table('maintable2').select(
-            "id, created_at, light, temperature, humidity"
-        ).gte(
-            'created_at', start_time.isoformat()
-        ).order('created_at', desc=True).execute()
-        
-        if response.data:
-            df = pd.DataFrame(response.data)
-            df['created_at'] = pd.to_datetime(df['created_at'])
-            return df
-        else:
-            return pd.DataFrame()
-    except Exception as e:
-        st.error(f"센서 데이터 조회 오류: {e}")
-        return pd.DataFrame()
+def get_sensor_repository(device_id=None):
+    # 프로세스당 하나(장치를 고르면 장치별로 하나), 다른 앱과 같은 수집/캐시/스냅샷을 공유
+    return get_repository(st.secrets["SUPABASE_URL"], st.secrets["SUPABASE_KEY"], device_id=device_id)
+
+def get_sensor_data(hours=24, device_id=None):
+    # 최근 N시간의 센서 데이터 (created_at 오름차순, 최신 데이터는 iloc[-1])
+    repo = get_sensor_repository(device_id)
+    if repo.error() is not None:
+        st.error(f"센서 데이터 조회 오류: {repo.error()}")
+    return repo.window(hours)
 
 # 3. 댓글/질문 관련 함수들
+@perf_metrics.timed('supabase.insert user_comments')
 def add_comment(user_id, username, content, comment_type="comment"):
     try:
         data = {
@@ -80,20 +82,28 @@ def add_comment(user_id, username, content, comment_type="comment"):
         }
         
         response = supabase.table('user_comments').insert(data).execute()
+        # 저장된 행을 캐시에 바로 반영 (다음 rerun도 조회 없이 새 댓글이 보임)
+        get_comment_cache().apply_insert('user_comments', response.data[0] if response.data else data)
         return True, None
     except Exception as e:
         return False, str(e)
 
-def get_comments():
+@perf_metrics.timed('supabase.select user_comments')
+def select_comments(limit=comment_feed.PAGE_SIZE, before=None, until=None):
+    """최신순 댓글 한 페이지 조회 (before/until 커서는 comment_feed.page_query 참고)"""
+    return comment_feed.select_page(
+        lambda: supabase.table('user_comments').select("*"), limit, before, until
+    )
+
+def get_comments(limit=comment_feed.PAGE_SIZE, before=None, until=None):
+    """최신순 댓글 한 페이지 (공유 캐시에 있으면 조회 없음)"""
     try:
-        response = supabase.table('user_comments').select("*").order(
-            'created_at', desc=True
-        ).limit(50).execute()
-        return response.data
+        return get_comment_cache().comments(select_comments, limit, before, until)
     except Exception as e:
         st.error(f"댓글 조회 오류: {e}")
         return []
 
+@perf_metrics.timed('supabase.insert comment_replies')
 def add_reply(comment_id, user_id, username, content):
     try:
         data = {
@@ -105,45 +115,30 @@ def add_reply(comment_id, user_id, username, content):
         }
         
         response = supabase.table('comment_replies').insert(data).execute()
+        # 이 댓글의 스레드만 갱신
+        get_comment_cache().apply_insert('comment_replies', response.data[0] if response.data else data)
         return True, None
     except Exception as e:
         return False, str(e)
 
-def get_replies(comment_id):
+@perf_metrics.timed('supabase.select comment_replies')
+def select_replies(comment_ids):
+    """여러 댓글의 답글을 조회 -> {댓글 id: 답글 목록} (max-rows를 넘으면 키셋 페이지로 이어 받음)"""
+    return comment_feed.select_replies(
+        lambda: supabase.table('comment_replies').select("*"), comment_ids
+    )
+
+def get_replies(comment_ids):
+    """여러 댓글의 답글 -> {댓글 id: 답글 목록} (캐시에 없는 스레드만 한 번에 조회)"""
     try:
-        response = supabase.table('comment_replies').select("*").eq(
-            'comment_id', comment_id
-        ).order('created_at', desc=False).execute()
-        return response.data
+        return get_comment_cache().replies(select_replies, comment_ids)
     except Exception as e:
-        return []
+        return {comment_id: [] for comment_id in comment_ids}
 
 # 4. 센서 데이터 통계
-def get_sensor_stats(df):
-    if df.empty:
-        return None
-    
-    stats = {
-        "온도": {
-            "현재": df.iloc[0]['temperature'],
-            "평균": df['temperature'].mean(),
-            "최고": df['temperature'].max(),
-            "최저": df['temperature'].min()
-        },
-        "습도": {
-            "현재": df.iloc[0]['humidity'],
-            "평균": df['humidity'].mean(),
-            "최고": df['humidity'].max(),
-            "최저": df['humidity'].min()
-        },
-        "조도": {
-            "현재": df.iloc[0]['light'],
-            "평균": df['light'].mean(),
-            "최고": df['light'].max(),
-            "최저": df['light'].min()
-        }
-    }
-    return stats
+def get_sensor_stats(hours=24, device_id=None):
+    """센서 데이터 통계 (행이 들어오고 나갈 때 증분 갱신된 값, 프레임을 다시 훑지 않음)"""
+    return get_sensor_repository(device_id).stats(hours)
 
 # 5. 메인 앱
 def main():
@@ -152,6 +147,7 @@ def main():
         layout="wide",
         initial_sidebar_state="expanded"
     )
+    perf_metrics.begin_run('member_bbs')
     
     # 세션 상태 초기화
     if 'user' not in st.session_state:
@@ -217,6 +213,12 @@ def main():
     # 센서 데이터 섹션
     st.header("📊 실시간 센서 데이터")
     
+    # 장치가 여럿이면 한 장치만 (여러 장치를 한 선/한 통계로 섞지 않도록)
+    device_id = None
+    devices = get_sensor_repository().devices()
+    if len(devices) > 1:
+        device_id = st.selectbox("📟 장치", devices)
+    
     # 시간 범위 선택
     col1, col2, col3 = st.columns([2, 1, 1])
     with col1:
@@ -230,15 +232,16 @@ def main():
     
     with col3:
         if st.button("🔄 데이터 새로고침"):
+            get_sensor_repository(device_id).refresh()
             st.rerun()
     
     # 센서 데이터 조회
     with st.spinner("센서 데이터를 불러오는 중..."):
-        df = get_sensor_data(hours)
+        df = get_sensor_data(hours, device_id)
     
     if not df.empty:
         # 현재 상태 표시
-        stats = get_sensor_stats(df)
+        stats = get_sensor_stats(hours, device_id)
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -267,67 +270,23 @@ def main():
             st.metric(
                 "📊 데이터 개수", 
                 f"{len(df)}개",
-                delta=f"마지막 업데이트: {df.iloc[0]['created_at'].strftime('%H:%M:%S')}"
+                delta=f"마지막 업데이트: {df.iloc[-1]['created_at'].strftime('%H:%M:%S')}"
             )
         
-        # 센서 데이터 차트
-        fig = make_subplots(
-            rows=3, cols=1,
-            subplot_titles=('🌡️ 온도 (°C)', '💧 습도 (%)', '☀️ 조도'),
-            vertical_spacing=0.08,
-            shared_xaxes=True
-        )
-        
-        # 온도 차트
-        fig.add_trace(
-            go.Scatter(
-                x=df['created_at'], 
-                y=df['temperature'],
-                name='온도',
-                line=dict(color='#ff6b6b', width=2),
-                fill='tonexty'
-            ),
-            row=1, col=1
-        )
-        
-        # 습도 차트
-        fig.add_trace(
-            go.Scatter(
-                x=df['created_at'], 
-                y=df['humidity'],
-                name='습도',
-                line=dict(color='#4ecdc4', width=2),
-                fill='tonexty'
-            ),
-            row=2, col=1
-        )
-        
-        # 조도 차트
-        fig.add_trace(
-            go.Scatter(
-                x=df['created_at'], 
-                y=df['light'],
-                name='조도',
-                line=dict(color='#ffe66d', width=2),
-                fill='tonexty'
-            ),
-            row=3, col=1
-        )
+        # 센서 데이터 차트 (차트 너비에 맞게 다운샘플링)
+        # 긴 구간은 원본 대신 로컬 집계 테이블(1분/10분/1시간)을 사용
+        chart_source = get_sensor_repository(device_id).chart_frame(hours, target_points())
+        if chart_source is None:
+            chart_source = df
+        fig = build_sensor_figure(chart_source)
         
-        fig.update_layout(
-            height=600,
-            title_text="📈 센서 데이터 시계열 차트",
-            showlegend=False
-        )
-        
-        fig.update_xaxes(title_text="시간", row=3, col=1)
-        
-        st.plotly_chart(fig, use_container_width=True)
+        with perf_metrics.span('render.plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
         
         # 데이터 테이블 (접기 가능)
         with st.expander("📋 상세 데이터 보기"):
             st.dataframe(
-                df[['created_at', 'temperature', 'humidity', 'light']].rename(columns={
+                df[['created_at', 'temperature', 'humidity', 'light']].iloc[::-1].rename(columns={
                     'created_at': '측정 시간',
                     'temperature': '온도(°C)',
                     'humidity': '습도(%)',
@@ -342,6 +301,7 @@ def main():
     st.divider()
     
     # 커뮤니티 섹션
+    comment_render.inject_styles()
     st.header("💬 커뮤니티")
     st.caption("센서 데이터에 대한 응원이나 궁금한 점을 자유롭게 나눠보세요!")
     
@@ -377,92 +337,32 @@ def main():
                     else:
                         st.warning("⚠️ 내용을 입력해주세요.")
         
-        # 댓글 목록
-        comments = get_comments()
+        # 댓글 목록 (답글은 보이는 댓글 전체를 한 번에)
+        comments = get_comments(until=comment_feed.shown_until())
+        replies_by_comment = get_replies([c['id'] for c in comments])
         
         if comments:
             st.subheader("💭 최근 댓글들")
             
-            for comment in comments:
-                # 댓글 타입에 따른 아이콘
-                icon = "💪" if comment['type'] == "comment" else "❓"
-                type_text = "응원" if comment['type'] == "comment" else "질문"
-                
-                with st.container():
-                    st.markdown(f"""
-                    <div style="
-                        background: linear-gradient(90deg, #f8f9fa 0%, #e9ecef 100%);
-                        padding: 15px;
-                        border-radius: 10px;
-                        margin: 10px 0;
-                        border-left: 4px solid {'#28a745' if comment['type'] == 'comment' else '#007bff'};
-                    ">
-                        <div style="display: flex; align-items: center; margin-bottom: 8px;">
-                            <span style="font-weight: bold; color: #495057;">
-                                {icon} {comment['username']}
-                            </span>
-                            <span style="
-                                background: {'#d4edda' if comment['type'] == 'comment' else '#cce7ff'};
-                                color: {'#155724' if comment['type'] == 'comment' else '#004085'};
-                                padding: 2px 8px;
-                                border-radius: 12px;
-                                font-size: 12px;
-                                margin-left: 10px;
-                            ">
-                                {type_text}
-                            </span>
-                            <span style="color: #6c757d; font-size: 12px; margin-left: auto;">
-                                {comment['created_at'][:16].replace('T', ' ')}
-                            </span>
-                        </div>
-                        <div style="color: #212529; line-height: 1.5;">
-                            {comment['content']}
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # 답글 기능 (간단하게)
-                    with st.expander(f"💬 답글 ({len(get_replies(comment['id']))}개)"):
-                        # 기존 답글들 표시
-                        replies = get_replies(comment['id'])
-                        for reply in replies:
-                            st.markdown(f"""
-                            <div style="
-                                background: #ffffff;
-                                padding: 10px;
-                                margin: 5px 0;
-                                border-radius: 8px;
-                                border-left: 3px solid #6c757d;
-                            ">
-                                <strong>{reply['username']}</strong>
-                                <span style="color: #6c757d; font-size: 12px; margin-left: 10px;">
-                                    {reply['created_at'][:16].replace('T', ' ')}
-                                </span>
-                                <div style="margin-top: 5px;">{reply['content']}</div>
-                            </div>
-                            """, unsafe_allow_html=True)
-                        
-                        # 새 답글 작성
-                        reply_content = st.text_input(
-                            f"답글 작성", 
-                            key=f"reply_{comment['id']}",
-                            placeholder="답글을 입력하세요..."
-                        )
-                        
-                        if st.button(f"답글 달기", key=f"reply_btn_{comment['id']}"):
-                            if reply_content.strip():
-                                username = st.session_state.user.user_metadata.get('username', '익명')
-                                success, error = add_reply(
-                                    comment['id'],
-                                    st.session_state.user.id,
-                                    username,
-                                    reply_content
-                                )
-                                if success:
-                                    st.success("답글이 등록되었습니다!")
-                                    st.rerun()
-                                else:
-                                    st.error(f"답글 등록 실패: {error}")
+            comment_render.render_feed(comments, replies_by_comment)
+            comment_feed.load_more_button(comments, get_comments)
+
+            # 답글 작성은 피드 아래 폼 하나로
+            submitted = comment_render.reply_form(comments)
+            if submitted:
+                comment_id, reply_content = submitted
+                username = st.session_state.user.user_metadata.get('username', '익명')
+                success, error = add_reply(
+                    comment_id,
+                    st.session_state.user.id,
+                    username,
+                    reply_content
+                )
+                if success:
+                    st.success("답글이 등록되었습니다!")
+                    st.rerun()
+                else:
+                    st.error(f"답글 등록 실패: {error}")
         else:
             st.info("💭 아직 댓글이 없습니다. 첫 번째 댓글을 남겨보세요!")
     
@@ -470,34 +370,13 @@ def main():
         st.info("💡 댓글을 남기려면 로그인이 필요합니다. 사이드바에서 로그인하거나 회원가입해주세요!")
         
         # 비로그인 사용자도 기존 댓글은 볼 수 있게
-        comments = get_comments()
+        comments = get_comments(limit=comment_feed.PREVIEW_SIZE)
         if comments:
             st.subheader("💭 커뮤니티 댓글들")
-            for comment in comments[:5]:  # 최근 5개만 표시
-                icon = "💪" if comment['type'] == "comment" else "❓"
-                type_text = "응원" if comment['type'] == "comment" else "질문"
-                
-                st.markdown(f"""
-                <div style="
-                    background: #f8f9fa;
-                    padding: 10px;
-                    border-radius: 8px;
-                    margin: 8px 0;
-                    border-left: 3px solid #dee2e6;
-                ">
-                    <div style="display: flex; align-items: center; margin-bottom: 5px;">
-                        <span><strong>{icon} {comment['username']}</strong></span>
-                        <span style="
-                            background: #e9ecef;
-                            padding: 2px 6px;
-                            border-radius: 10px;
-                            font-size: 11px;
-                            margin-left: 8px;
-                        ">{type_text}</span>
-                    </div>
-                    <div>{comment['content']}</div>
-                </div>
-                """, unsafe_allow_html=True)
+            comment_render.render_feed(comments, compact=True)
+    
+    # 이번 rerun의 구간별 처리 시간 (사이드바에서 켰을 때만)
+    perf_metrics.debug_panel()
     
     # 자동 새로고침
     if auto_refresh:
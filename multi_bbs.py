@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import hashlib
+import board_search
 
 # 페이지 설정
 st.set_page_config(
@@ -84,6 +85,10 @@ if 'posts' not in st.session_state:
         ]
     }
 
+# 검색 색인 (세션 처음 한 번 만들고, 게시글/댓글이 추가될 때 함께 갱신)
+if 'search_index' not in st.session_state:
+    st.session_state.search_index = board_search.build_index(st.session_state.posts)
+
 # 게시판 설정
 BOARDS = {
     'learning': {'name': '📚 학습 게시판', 'description': '과제, 자료공유, Q&A'},
@@ -197,20 +202,27 @@ def main_page():
     
     with tab1:
         # 검색
-        search_term = st.text_input("🔍 검색", placeholder="제목 또는 내용으로 검색...")
+        search_term = st.text_input("🔍 검색", placeholder="제목, 내용, 댓글로 검색...")
+        search_all = st.checkbox("모든 게시판에서 검색")
         
         # 게시글 목록
         posts = st.session_state.posts.get(board_choice, [])
         
         if search_term:
-            posts = [p for p in posts if search_term.lower() in p['title'].lower() or search_term.lower() in p['content'].lower()]
+            # 색인에서 관련도순으로 (제목 > 본문 > 댓글)
+            posts = st.session_state.search_index.search(search_term, board=None if search_all else board_choice)
         
         if not posts:
-            st.info("아직 게시글이 없습니다. 첫 번째 게시글을 작성해보세요!")
+            if search_term:
+                st.info("검색 결과가 없습니다.")
+            else:
+                st.info("아직 게시글이 없습니다. 첫 번째 게시글을 작성해보세요!")
         else:
-            for post in sorted(posts, key=lambda x: x['id'], reverse=True):
+            for post in (posts if search_term else sorted(posts, key=lambda x: x['id'], reverse=True)):
                 with st.container():
                     st.markdown(f"### {post['title']}")
+                    if search_term and search_all:
+                        st.caption(BOARDS[st.session_state.search_index.boards[post['id']]]['name'])
                     st.markdown(f"**작성자:** {post['author']} | **작성시간:** {post['timestamp']} | **댓글:** {len(post['replies'])}")
                     
                     # 내용 미리보기 (100자 제한)
@@ -264,6 +276,7 @@ def main_page():
                                 for post in board_posts:
                                     if post['id'] == selected_post['id']:
                                         post['replies'].append(comment)
+                                        st.session_state.search_index.add_reply(post['id'], comment)
                                         break
                             
                             st.success("댓글이 등록되었습니다!")
@@ -321,6 +334,7 @@ def main_page():
                         st.session_state.posts[board_choice] = []
                     
                     st.session_state.posts[board_choice].append(new_post)
+                    st.session_state.search_index.add_post(board_choice, new_post)
                     
                     st.success("게시글이 등록되었습니다!")
                     st.balloons()
@@ -0,0 +1,26 @@
+# 한 번의 rerun에서 서로 독립적인 조회를 동시에 실행하는 스레드 풀
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # streamlit 없이 실행할 때 (벤치마크 등)
+    add_script_run_ctx = get_script_run_ctx = None
+
+MAX_WORKERS = 16
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='fetch')
+
+
+def _run_with_ctx(ctx, fn, args, kwargs):
+    # 작업 스레드에서도 st.error/st.cache_* 등을 현재 세션에 연결해서 사용
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+    return fn(*args, **kwargs)
+
+
+def submit(fn, *args, **kwargs):
+    """fn을 백그라운드에서 시작하고 Future 반환"""
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    return _executor.submit(_run_with_ctx, ctx, fn, args, kwargs)
+
@@ -0,0 +1,217 @@
+# 구간별 처리 시간 측정 (span), 지연 히스토그램, 느린 조회 로그, Prometheus 텍스트 출력
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # streamlit 없이 실행할 때 (벤치마크 등)
+    st = None
+    get_script_run_ctx = None
+
+logger = logging.getLogger('perf')
+
+# 이 시간(ms)보다 오래 걸린 조회(http/supabase span)는 경고 로그로 남김
+SLOW_QUERY_MS = float(os.environ.get('PERF_SLOW_QUERY_MS', 500))
+# 설정하면 이 포트에서 /metrics (Prometheus 텍스트 형식)를 제공
+METRICS_PORT = os.environ.get('PERF_METRICS_PORT')
+METRICS_HOST = os.environ.get('PERF_METRICS_HOST', '127.0.0.1')
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SLOW_PREFIXES = ('http ', 'supabase.')
+MAX_RUN_SPANS = 500
+MAX_SESSIONS = 1000
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 모양)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self):
+        running = 0
+        for bound, n in zip(self.buckets, self.counts):
+            running += n
+            yield bound, running
+
+
+class RunTrace:
+    """한 번의 rerun 동안 기록된 span 목록 (디버그 패널용)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []     # (이름, 시작 오프셋 ms, 걸린 시간 ms, 스레드)
+
+
+_lock = threading.Lock()
+_histograms = {}
+_runs = {}              # 세션 id -> RunTrace
+_server = None
+
+
+def _session_id():
+    ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+    return ctx.session_id if ctx is not None else None
+
+
+def begin_run(name):
+    """현재 세션의 rerun 기록을 새로 시작 (진입점 main() 맨 앞에서 호출)"""
+    start_metrics_server()
+    session_id = _session_id()
+    if session_id is not None:
+        _runs.pop(session_id, None)
+        if len(_runs) >= MAX_SESSIONS:
+            # 가장 오래전에 시작한 세션 기록부터 버림
+            _runs.pop(next(iter(_runs)), None)
+        _runs[session_id] = RunTrace(name)
+
+
+def record(name, seconds):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = Histogram()
+        hist.observe(seconds)
+
+    if seconds * 1000 >= SLOW_QUERY_MS and name.startswith(SLOW_PREFIXES):
+        logger.warning(f"느린 조회 {name}: {seconds * 1000:.0f}ms")
+
+    session_id = _session_id()
+    run = _runs.get(session_id) if session_id is not None else None
+    if run is not None and len(run.spans) < MAX_RUN_SPANS:
+        end = time.perf_counter()
+        run.spans.append((
+            name,
+            (end - seconds - run.started) * 1000,
+            seconds * 1000,
+            threading.current_thread().name,
+        ))
+
+
+@contextmanager
+def span(name):
+    """with span('figure.build'): ... 구간 시간을 히스토그램과 현재 rerun 기록에 남김"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """함수 전체를 span으로 감싸는 데코레이터"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_run():
+    session_id = _session_id()
+    return _runs.get(session_id) if session_id is not None else None
+
+
+def debug_panel():
+    """사이드바에 이번 rerun의 구간별 시간 표시 (체크했을 때만, 진입점 main() 맨 끝에서 호출)"""
+    if st is None:
+        return
+    with st.sidebar:
+        if not st.checkbox("⏱️ 성능 측정 보기", key="_perf_debug_panel"):
+            return
+        run = current_run()
+        if run is None or not run.spans:
+            st.caption("기록된 구간이 없습니다.")
+            return
+        total = (time.perf_counter() - run.started) * 1000
+        st.caption(f"{run.name} rerun 전체 {total:.0f}ms")
+
+        # 같은 이름은 합쳐서 보여주고, 개별 span은 펼쳐서 확인
+        summary = {}
+        for name, _, ms, _ in run.spans:
+            count, total_ms = summary.get(name, (0, 0.0))
+            summary[name] = (count + 1, total_ms + ms)
+        st.dataframe(
+            [{"구간": name, "횟수": count, "합계(ms)": round(ms, 1)}
+             for name, (count, ms) in sorted(summary.items(), key=lambda x: -x[1][1])],
+            use_container_width=True, hide_index=True
+        )
+        with st.expander("개별 구간"):
+            st.dataframe(
+                [{"구간": name, "시작(ms)": round(start, 1), "시간(ms)": round(ms, 1), "스레드": thread}
+                 for name, start, ms, thread in sorted(run.spans, key=lambda s: s[1])],
+                use_container_width=True, hide_index=True
+            )
+
+
+def prometheus_text():
+    """모든 히스토그램을 Prometheus 텍스트 형식으로"""
+    lines = [
+        '# HELP dashboard_span_seconds 구간별 처리 시간',
+        '# TYPE dashboard_span_seconds histogram',
+    ]
+    with _lock:
+        items = sorted(_histograms.items())
+        for name, hist in items:
+            label = name.replace('\\', '\\\\').replace('"', '\\"')
+            for bound, n in hist.cumulative():
+                lines.append(f'dashboard_span_seconds_bucket{{span="{label}",le="{bound}"}} {n}')
+            lines.append(f'dashboard_span_seconds_bucket{{span="{label}",le="+Inf"}} {hist.count}')
+            lines.append(f'dashboard_span_seconds_sum{{span="{label}"}} {hist.total}')
+            lines.append(f'dashboard_span_seconds_count{{span="{label}"}} {hist.count}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port=None, host=METRICS_HOST):
+    """PERF_METRICS_PORT(또는 port)가 있으면 프로세스당 한 번 /metrics 서버 시작"""
+    global _server
+    port = port or METRICS_PORT
+    if _server is not None or not port:
+        return _server
+    with _lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                logger.warning(f"메트릭 서버 시작 실패: {e}")
+                _server = False     # 매 rerun마다 다시 시도하지 않음
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name='perf-metrics', daemon=True).start()
+    return _server
@@ -0,0 +1,177 @@
+# Supabase Realtime INSERT 구독 (프로세스당 리스너 하나) + 세션 갱신 알림
+import asyncio
+import logging
+import os
+import threading
+import time
+
+import streamlit as st
+
+try:
+    from realtime import AsyncRealtimeClient
+except ImportError:
+    AsyncRealtimeClient = None
+
+logger = logging.getLogger(__name__)
+
+WATCHED_TABLES = ('maintable2', 'user_comments', 'comment_replies')
+CHECK_INTERVAL = 2      # 세션이 버전 번호를 확인하는 주기(초), 메모리만 읽음
+RECONNECT_DELAY = 5
+# 계속 값이 들어오는 테이블은 이 주기(초)보다 자주 화면 전체를 다시 그리지 않음 (폴링 때의 새로고침 주기)
+RERUN_INTERVALS = {'maintable2': 10}
+
+
+def realtime_url(supabase_url):
+    """Realtime 엔드포인트 (로컬 웹소켓 대역은 SUPABASE_REALTIME_URL로 지정)"""
+    return os.environ.get('SUPABASE_REALTIME_URL') or f"{supabase_url.rstrip('/')}/realtime/v1"
+
+
+class ChangeListener:
+    """테이블별 INSERT 이벤트를 받아 버전 번호를 올리는 백그라운드 리스너
+
+    세션들은 DB 대신 이 버전 번호만 비교하므로, 데이터가 바뀌지 않으면
+    조회도 rerun도 일어나지 않습니다.
+    """
+
+    def __init__(self, url, key, tables=WATCHED_TABLES):
+        self.url = url
+        self.key = key
+        self.tables = tables
+        self.lock = threading.Lock()
+        self.versions = {t: 0 for t in tables}
+        self.connected = False
+        self.connects = 0       # 구독에 성공한 횟수 (값이 바뀌었으면 그 사이 끊긴 적이 있음)
+        self.callbacks = []
+        self.thread = None
+
+    def start(self):
+        if AsyncRealtimeClient is None or self.thread is not None:
+            return self
+        self.thread = threading.Thread(target=self._run_forever, name='realtime-listener', daemon=True)
+        self.thread.start()
+        return self
+
+    def on_change(self, callback):
+        """callback(table, payload)을 이벤트마다 호출 (리스너 스레드에서 실행됨)"""
+        self.callbacks.append(callback)
+
+    def off_change(self, callback):
+        if callback in self.callbacks:
+            self.callbacks.remove(callback)
+
+    def version(self, *tables):
+        with self.lock:
+            return tuple(self.versions[t] for t in (tables or self.tables))
+
+    def token(self, *tables):
+        """연결되어 있으면 (구독 횟수, 버전...), 끊겨 있으면 None (None이면 호출 측은 폴링으로 동작)
+
+        끊겼다가 다시 구독하면 그 사이의 INSERT는 이벤트로 오지 않으므로, 버전이 그대로여도
+        값이 달라지게 구독 횟수를 함께 넣습니다.
+        """
+        if not self.connected:
+            return None
+        with self.lock:
+            return (self.connects,) + tuple(self.versions[t] for t in (tables or self.tables))
+
+    def _run_forever(self):
+        while True:
+            try:
+                asyncio.run(self._listen())
+            except Exception as e:
+                logger.warning(f"Realtime 연결 끊김: {e}")
+            self.connected = False
+            time.sleep(RECONNECT_DELAY)
+
+    async def _listen(self):
+        client = AsyncRealtimeClient(self.url, self.key, auto_reconnect=True)
+        await client.connect()
+
+        channel = client.channel('dashboard-changes')
+        for table in self.tables:
+            channel.on_postgres_changes(
+                'INSERT', schema='public', table=table,
+                callback=lambda payload, table=table: self._handle(table, payload)
+            )
+
+        def on_subscribe(status, err):
+            subscribed = err is None and str(status).endswith('SUBSCRIBED')
+            if subscribed:
+                # 자동 재연결로 다시 구독해도 세어서, 잠깐 끊겼다 붙은 것도 구독 측이 알 수 있게
+                with self.lock:
+                    self.connects += 1
+            self.connected = subscribed
+            if err is not None:
+                logger.warning(f"Realtime 구독 실패: {err}")
+
+        await channel.subscribe(on_subscribe)
+        await client.listen()
+        # 버전에 따라 listen()이 바로 끝나므로 연결이 살아 있는 동안 대기
+        while client.is_connected:
+            await asyncio.sleep(1)
+
+    def _handle(self, table, payload):
+        with self.lock:
+            self.versions[table] += 1
+        for callback in list(self.callbacks):
+            try:
+                callback(table, payload)
+            except Exception as e:
+                logger.warning(f"Realtime 콜백 오류: {e}")
+
+
+def _rerun_due(seen, current, tables, rerun_intervals, rerun_at, now):
+    """토큰(구독 횟수, 테이블별 버전...)이 바뀌었을 때 지금 rerun할지
+
+    바뀐 테이블이 모두 rerun_intervals에 있으면 마지막 rerun에서 그 주기가 지났을 때만 True
+    (다른 테이블이 바뀌었거나 다시 구독했으면 바로 True).
+    """
+    if seen is None or seen == current:
+        return False
+    if seen[0] != current[0]:
+        return True
+    changed = [t for t, before, after in zip(tables, seen[1:], current[1:]) if before != after]
+    if not all(t in rerun_intervals for t in changed):
+        return True
+    return now - rerun_at >= max(rerun_intervals[t] for t in changed)
+
+
+def watch_changes(listener, tables, key, interval=CHECK_INTERVAL, poll_interval=None, rerun_intervals=RERUN_INTERVALS):
+    """구독한 테이블이 바뀐 세션만 다시 그리도록 알림 (바뀌지 않으면 아무 일도 없음)
+
+    poll_interval을 주면 Realtime이 끊겨 있는 동안 그 주기(초)마다 rerun합니다.
+    rerun_intervals({테이블: 초})의 테이블만 바뀌었으면 마지막 rerun에서 그 주기가 지난 뒤에
+    한 번 rerun합니다 (센서 값이 계속 들어와도 화면 전체를 몇 초마다 다시 그리지 않음).
+    어느 쪽이든 fragment 타이머라서 스크립트 스레드를 sleep으로 붙잡지 않습니다.
+    """
+    tables = tables or listener.tables
+    seen_key = f"_seen_changes_{key}"
+    polled_key = f"_polled_at_{key}"
+    rerun_key = f"_rerun_at_{key}"
+    # fragment가 아니라 여기까지 왔으면 방금 화면 전체를 그렸음
+    st.session_state[rerun_key] = time.monotonic()
+
+    @st.fragment(run_every=interval)
+    def _watch():
+        if not listener.connected:
+            if poll_interval is None:
+                return
+            now = time.monotonic()
+            polled = st.session_state.setdefault(polled_key, now)
+            if now - polled >= poll_interval:
+                st.session_state[polled_key] = now
+                st.rerun()
+            return
+
+        current = listener.token(*tables)
+        if current is None:
+            return      # 방금 끊김 (다음 확인부터 폴링)
+        seen = st.session_state.get(seen_key)
+        if seen is None:
+            st.session_state[seen_key] = current
+        elif _rerun_due(seen, current, tables, rerun_intervals, st.session_state[rerun_key], time.monotonic()):
+            # 아직 때가 안 된 변경은 seen을 그대로 둬서 다음 확인 때 다시 봄
+            st.session_state[seen_key] = current
+            st.rerun()
+
+    _watch()
@@ -0,0 +1,254 @@
+# maintable2 보관소 - 지난 날짜를 날짜별 Parquet(zstd)로 내보내고, 긴 구간은 여기서 읽음
+#   python sensor_archive.py             # 어제까지 아직 보관하지 않은 날짜를 모두 내보냄 (하루 한 번 cron)
+#                                        # 최근 RECHECK_DAYS일은 보관한 뒤 들어온 행이 있으면 다시 내보냄
+#   python sensor_archive.py --days 30   # 최근 30일 중 빠진 날짜만
+#   python sensor_archive.py --device esp8266-02   # 한 장치만 (<보관 경로>/device=<장치>/ 아래에)
+#
+# 파일 구조: <보관 경로>/date=YYYY-MM-DD/part-0.parquet (UTC 기준 하루, created_at/id 오름차순)
+#           <보관 경로>/tiles_<단위>/date=YYYY-MM-DD/part-0.parquet (sensor_rollup 단위별 집계)
+import argparse
+import logging
+import os
+import re
+import threading
+from datetime import datetime, time, timedelta, timezone
+
+import pandas as pd
+
+import perf_metrics
+import sensor_rollup
+from sensor_decode import ARROW_TYPES
+from sensor_store import SENSOR_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pa_fs
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = os.environ.get('SENSOR_ARCHIVE_DIR', 'sensor_archive')
+COMPRESSION = 'zstd'
+# 행 그룹마다 created_at 최소/최대 통계가 남으므로, 구간 조건에 맞지 않는 그룹은 읽지 않음
+# (너무 잘게 나누면 그룹별 오버헤드가 커짐: 한 달 읽기 4096행 95ms -> 32768행 65ms)
+ROW_GROUP_SIZE = 32768
+# 날짜가 바뀐 뒤 늦게 도착하는 값(게이트웨이 배치 등)을 기다리는 시간
+CLOSE_GRACE = timedelta(hours=1)
+# 그보다 늦게 커밋된 행(장치가 직접 넣은 과거 시각 등)은 이 기간 안이면 다음 실행 때 그날을 다시 내보냄
+RECHECK_DAYS = int(os.environ.get('SENSOR_ARCHIVE_RECHECK_DAYS', 7))
+
+if pa is not None:
+    SCHEMA = pa.schema([(col, ARROW_TYPES[col]) for col in SENSOR_COLUMNS])
+    TILE_SCHEMA = pa.schema(
+        [('created_at', pa.timestamp('us', tz='UTC')), ('count', pa.int64())]
+        + [(f'{m}{suffix}', pa.float64())
+           for m in sensor_rollup.METRICS for suffix in ('', '_min', '_max', '_last')]
+    )
+
+
+def available():
+    return pa is not None
+
+
+def device_archive_path(device_id, path=DEFAULT_ARCHIVE_DIR):
+    """장치별 보관 경로 (전체 보관소 아래 device=<장치>)"""
+    if device_id is None:
+        return path
+    return os.path.join(path, f"device={re.sub(r'[^A-Za-z0-9_.-]', '_', device_id)}")
+
+
+def _utc(value):
+    ts = pd.Timestamp(value)
+    return ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+
+
+class SensorArchive:
+    """날짜별 Parquet 파일 묶음 (쓰기는 하루 단위로 통째로, 읽기는 메모리 맵 + 시간 조건 푸시다운)"""
+
+    def __init__(self, path=DEFAULT_ARCHIVE_DIR):
+        self.path = path
+        self.fs = pa_fs.LocalFileSystem(use_mmap=True)
+
+    def day_path(self, day, level=None):
+        base = self.path if level is None else os.path.join(self.path, f'tiles_{level}')
+        return os.path.join(base, f'date={day.isoformat()}', 'part-0.parquet')
+
+    def days(self):
+        """보관된 날짜 목록 (오름차순)"""
+        if not os.path.isdir(self.path):
+            return []
+        found = []
+        for name in os.listdir(self.path):
+            if name.startswith('date=') and os.path.exists(os.path.join(self.path, name, 'part-0.parquet')):
+                found.append(datetime.strptime(name[5:], '%Y-%m-%d').date())
+        return sorted(found)
+
+    def has_day(self, day):
+        return os.path.exists(self.day_path(day))
+
+    def write_day(self, day, frame):
+        """하루치 프레임 저장 (빈 날도 빈 파일로 남겨서 다시 내보내지 않음)"""
+        if frame.empty:
+            table = SCHEMA.empty_table()
+        else:
+            frame = frame.sort_values(['created_at', 'id'], kind='stable')
+            table = pa.Table.from_pandas(frame.reindex(columns=SENSOR_COLUMNS), schema=SCHEMA, preserve_index=False)
+
+        # 집계 단위별 타일을 먼저 쓰고 원본을 마지막에 씀 (원본이 있으면 그날은 완료)
+        source = table.to_pandas()
+        for level in sensor_rollup.ROLLUP_LEVELS:
+            self._write(self.day_path(day, level), pa.Table.from_pandas(
+                sensor_rollup.aggregate_frame(source, level), schema=TILE_SCHEMA, preserve_index=False
+            ))
+        self._write(self.day_path(day), table)
+        return table.num_rows
+
+    def _write(self, path, table):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+        pq.write_table(table, tmp, compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp, path)   # 읽는 쪽이 반쯤 쓴 파일을 보지 않도록
+
+    @perf_metrics.timed('archive.read')
+    def read(self, start, end=None, columns=None):
+        """start <= created_at < end 인 행 (created_at 오름차순 DataFrame, Supabase 조회 없음)"""
+        return self._read(None, SCHEMA, start, end, columns)
+
+    @perf_metrics.timed('archive.read_tiles')
+    def read_tiles(self, level, start, end=None):
+        """start <= 구간 시작 < end 인 집계 구간 (sensor_rollup.read_rollup 모양)"""
+        return self._read(level, TILE_SCHEMA, start, end, None)
+
+    def _read(self, level, schema, start, end, columns):
+        start = _utc(start)
+        end = _utc(end) if end is not None else pd.Timestamp.now(tz='UTC')
+        day, last_day = start.date(), end.date()
+        files = []
+        while day <= last_day:
+            path = self.day_path(day, level)
+            if level is not None and not os.path.exists(path) and self.has_day(day):
+                # 타일이 생기기 전에 보관한 날은 원본에서 한 번 만들어 둠
+                self._write(path, pa.Table.from_pandas(
+                    sensor_rollup.aggregate_frame(self.read_day(day), level), schema=TILE_SCHEMA, preserve_index=False
+                ))
+            if os.path.exists(path):
+                files.append(path)
+            day += timedelta(days=1)
+        if not files:
+            return pd.DataFrame(columns=columns or schema.names)
+
+        dataset = ds.dataset(files, schema=schema, format='parquet', filesystem=self.fs)
+        table = dataset.to_table(
+            columns=columns,
+            filter=(ds.field('created_at') >= start.to_pydatetime()) & (ds.field('created_at') < end.to_pydatetime())
+        )
+        df = table.to_pandas()
+        if 'created_at' in df and not df['created_at'].is_monotonic_increasing:
+            df = df.sort_values('created_at', kind='stable', ignore_index=True)
+        return df
+
+    def read_day(self, day):
+        return pq.read_table(self.day_path(day), memory_map=True).to_pandas()
+
+    def max_id(self, day):
+        """보관한 날짜의 가장 큰 id (빈 날이면 None)"""
+        ids = pq.read_table(self.day_path(day), columns=['id'], memory_map=True).column('id')
+        return pc.max(ids).as_py() if len(ids) else None
+
+
+def closed_until(now=None):
+    """보관해도 되는 마지막 날짜 (날짜가 끝나고 CLOSE_GRACE가 지난 날)"""
+    now = now or datetime.now(timezone.utc)
+    return (now - CLOSE_GRACE).date() - timedelta(days=1)
+
+
+def _device_filter(device_id):
+    return {'device_id': f'eq.{device_id}'} if device_id is not None else {}
+
+
+def first_day(client, device_id=None):
+    """maintable2의 가장 오래된 행의 날짜 (행이 없으면 None)"""
+    rows = client.select(
+        'maintable2', columns='created_at', filters=_device_filter(device_id), order='created_at.asc', limit=1
+    )
+    return _utc(rows[0]['created_at']).date() if rows else None
+
+
+def _day_filter(day, device_id):
+    start = datetime.combine(day, time(), tzinfo=timezone.utc)
+    end = start + timedelta(days=1)
+    return {
+        'created_at': f'gte.{start.isoformat()}',
+        'and': f'(created_at.lt."{end.isoformat()}")',
+        **_device_filter(device_id),
+    }
+
+
+def fetch_day(client, day, page_size=1000, device_id=None):
+    """하루치(UTC) 행을 키셋 페이지로 받아 하나의 DataFrame으로"""
+    pages = list(client.select_pages(
+        'maintable2',
+        columns=','.join(SENSOR_COLUMNS),
+        filters=_day_filter(day, device_id),
+        page_size=page_size,
+        as_frame=True
+    ))
+    return pd.concat(pages, ignore_index=True) if pages else pd.DataFrame(columns=SENSOR_COLUMNS)
+
+
+def has_late_rows(client, archive, day, device_id=None):
+    """보관한 뒤 그 날짜로 새로 커밋된 행이 있는지 (보관본의 가장 큰 id보다 큰 id)"""
+    filters = _day_filter(day, device_id)
+    last_id = archive.max_id(day)
+    if last_id is not None:
+        filters['id'] = f'gt.{last_id}'
+    return bool(client.select('maintable2', columns='id', filters=filters, limit=1))
+
+
+def export_closed_days(client, archive, days=None, page_size=1000, device_id=None):
+    """아직 보관하지 않은 지난 날짜와, 최근 RECHECK_DAYS일 중 늦게 들어온 행이 있는 날짜를 내보냄 -> [(날짜, 행 수)]"""
+    last = closed_until()
+    first = last - timedelta(days=days - 1) if days else first_day(client, device_id)
+    if first is None:
+        return []
+
+    recheck_from = last - timedelta(days=RECHECK_DAYS - 1)
+    written = []
+    day = first
+    while day <= last:
+        archived = archive.has_day(day)
+        if not archived or (day >= recheck_from and has_late_rows(client, archive, day, device_id)):
+            count = archive.write_day(day, fetch_day(client, day, page_size, device_id))
+            logger.info(f"{day} {'다시 ' if archived else ''}보관: {count}행")
+            written.append((day, count))
+        day += timedelta(days=1)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description='maintable2 지난 날짜를 Parquet로 보관')
+    parser.add_argument('--url', default=os.environ.get('SUPABASE_URL'))
+    parser.add_argument('--key', default=os.environ.get('SUPABASE_KEY'))
+    parser.add_argument('--path', default=DEFAULT_ARCHIVE_DIR)
+    parser.add_argument('--days', type=int, help='최근 N일만 (기본: 가장 오래된 행부터)')
+    parser.add_argument('--device', help='이 장치의 행만 장치별 보관 경로에')
+    args = parser.parse_args()
+    if not args.url or not args.key:
+        parser.error("SUPABASE_URL/SUPABASE_KEY (또는 --url/--key)가 필요합니다")
+    if not available():
+        parser.error("pyarrow가 필요합니다 (pip install pyarrow)")
+
+    from supabase_rest import SimpleSupabaseClient
+
+    logging.basicConfig(level=logging.INFO)
+    archive = SensorArchive(device_archive_path(args.device, args.path))
+    written = export_closed_days(SimpleSupabaseClient(args.url, args.key), archive, args.days, device_id=args.device)
+    print(f"{len(written)}일 보관, {sum(count for _, count in written)}행")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,250 @@
+# maintable2 증분 조회 캐시 (워터마크 기반)
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import perf_metrics
+from sensor_stats import RollingStats, empty_stats
+from sensor_store import to_epoch_ms
+
+PRUNE_INTERVAL = 3600   # 로컬 저장소에서 오래된 행을 지우는 주기(초)
+# 꼬리 조회는 워터마크보다 이만큼 앞부터 다시 받음 (먼저 시작한 트랜잭션이 늦게 커밋되면
+# created_at이 워터마크보다 앞선 행이 나중에 보임, 이미 받은 id는 버림)
+TAIL_OVERLAP = timedelta(seconds=int(os.environ.get('SENSOR_TAIL_OVERLAP', 30)))
+# Realtime 토큰이 그대로여도 이 시간(초)이 지나면 꼬리를 조회 (이벤트가 안 오는 설정에서도 멈추지 않게)
+TOKEN_MAX_AGE = float(os.environ.get('SENSOR_TOKEN_MAX_AGE', 60))
+
+
+class SensorWindowCache:
+    """마지막으로 받은 created_at(워터마크) 이후의 행만 받아 기존 프레임에 이어 붙이는 캐시
+
+    꼬리 조회는 워터마크보다 TAIL_OVERLAP만큼 앞부터 받고 이미 가진 id는 버리므로, 늦게
+    커밋되어 워터마크보다 앞선 created_at으로 나타난 행도 그 안이면 빠지지 않습니다.
+
+    fetch_since(since_iso)는 created_at >= since_iso 인 행을 created_at 오름차순
+    list[dict] 또는 DataFrame(sensor_decode)으로 돌려주는 함수입니다.
+    (supabase-py, REST 어느 쪽이든 상관없음) 페이지를 차례로 yield하는 이터레이터를
+    돌려주면 페이지가 도착하는 대로 프레임으로 변환합니다.
+
+    store(SensorStore)를 주면 받은 행을 로컬에도 저장하고, 처음 조회할 때는 로컬에
+    있는 구간을 먼저 읽은 뒤 빠진 꼬리만 네트워크로 받습니다.
+
+    change_token()이 None이 아닌 값을 돌려주면(Realtime 연결 중) 그 값이 마지막
+    조회 때와 같을 때는 꼬리 조회도 생략합니다. 단 TOKEN_MAX_AGE가 지나면 조회합니다
+    (maintable2가 supabase_realtime publication에 없으면 연결되어 있어도 이벤트가 오지 않음).
+
+    로컬 저장소는 PRUNE_INTERVAL마다 수집 구간(max_hours)보다 오래된 날짜를 지웁니다.
+    (보관소는 Supabase에서 내보내므로 로컬 행을 남겨 둘 필요가 없음)
+    """
+
+    def __init__(self, fetch_since, max_hours=72, store=None, change_token=None):
+        self.fetch_since = fetch_since
+        self.max_hours = max_hours
+        self.store = store
+        self.change_token = change_token
+        self.pruned_at = None         # 마지막으로 로컬 저장소를 정리한 시각 (monotonic)
+        self.fetched_token = None     # 마지막 꼬리 조회 때의 change_token 값
+        self.fetched_at = None        # 마지막 꼬리 조회 시각 (monotonic)
+        self.lock = threading.Lock()
+        self.df = pd.DataFrame()
+        self.covered_since = None     # 캐시가 빠짐없이 담고 있는 구간의 시작 시각
+        self.last_created_at = None   # 워터마크 (마지막 행의 created_at, UTC Timestamp)
+        self.version = 0              # 데이터가 바뀔 때마다 증가
+        self.window_stats = {}        # hours -> RollingStats (새 행이 올 때만 갱신)
+
+    def get(self, hours=24):
+        """최근 N시간 데이터 (created_at 오름차순)"""
+        start_time = datetime.now() - timedelta(hours=hours)
+
+        with self.lock:
+            # 조회 전에 읽어 둬야 조회 도중 들어온 변경을 놓치지 않음
+            token = self.change_token() if self.change_token else None
+            if self.covered_since is None or start_time < self.covered_since:
+                if self.store is not None and self.store.covers(start_time):
+                    # 로컬 저장소에서 읽고 그 이후 꼬리만 조회
+                    self._load_from_store(start_time)
+                    self._append_tail(start_time)
+                else:
+                    # 처음이거나 더 긴 구간을 요청한 경우에만 전체 구간 조회
+                    self._reset(self.fetch_since(start_time.isoformat()), start_time)
+                    if self.store is not None:
+                        self.store.mark_covered(start_time)
+                self._fetched(token)
+            elif token is not None and token == self.fetched_token and time.monotonic() - self.fetched_at < TOKEN_MAX_AGE:
+                # Realtime으로 변경이 없다는 것을 알고 있으므로 조회 생략
+                pass
+            elif self.last_created_at is not None:
+                self._append_tail()
+                self._fetched(token)
+            else:
+                # 아직 데이터가 한 건도 없었던 경우
+                self._reset(self.fetch_since(self.covered_since.isoformat()), self.covered_since)
+                self._fetched(token)
+
+            self._trim(datetime.now() - timedelta(hours=max(hours, self.max_hours)))
+            return self._slice(start_time)
+
+    def stats(self, hours=24):
+        """최근 N시간 통계 (현재/평균/최고/최저), 프레임을 다시 훑지 않음"""
+        start_time = datetime.now() - timedelta(hours=hours)
+        with self.lock:
+            if self.df.empty:
+                return empty_stats()
+            rolling = self.window_stats.get(hours)
+            if rolling is None:
+                # 이 구간을 처음 요청할 때 한 번만 전체 구간으로 초기화
+                rolling = RollingStats()
+                rolling.append_frame(self._slice(start_time))
+                self.window_stats[hours] = rolling
+            rolling.evict_before(self._as_column_time(start_time).value)
+            return rolling.snapshot()
+
+    def chart_frame(self, hours, target_points):
+        """긴 구간이면 로컬 집계 테이블에서 차트용 프레임 (해당 없으면 None -> 원본 사용)"""
+        if self.store is None:
+            return None
+        start_time = datetime.now() - timedelta(hours=hours)
+        return self.store.chart_frame(start_time, hours, target_points)
+
+    def _fetched(self, token):
+        self.fetched_token = token
+        self.fetched_at = time.monotonic()
+
+    def clear(self):
+        with self.lock:
+            self.df = pd.DataFrame()
+            self.covered_since = None
+            self.last_created_at = None
+            self.window_stats = {}
+            self.version += 1
+
+    def _reset(self, result, start_time):
+        self.last_created_at = None
+        frames = self._collect(result)
+        with perf_metrics.span('frame.build'):
+            self.df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        self.covered_since = start_time
+        self.window_stats = {}
+        self.version += 1
+
+    def _load_from_store(self, start_time):
+        self.df = self.store.read_frame(start_time)
+        self.covered_since = start_time
+        self.window_stats = {}
+        last = self.store.watermark()
+        self.last_created_at = pd.Timestamp(last) if last is not None else None
+        self.version += 1
+
+    def _append_tail(self, start_time=None):
+        """워터마크 - TAIL_OVERLAP 이후를 조회해서 처음 보는 id만 이어 붙임 (워터마크가 없으면 start_time부터)"""
+        if self.last_created_at is None:
+            self._append(self.fetch_since(start_time.isoformat()), set())
+            return
+        since = self.last_created_at - TAIL_OVERLAP
+        known = set()
+        if not self.df.empty:
+            start = self.df['created_at'].searchsorted(self._as_column_time(since))
+            known = set(self.df['id'].iloc[start:].tolist())
+        self._append(self.fetch_since(since.isoformat()), known)
+
+    def _append(self, result, known):
+        last = self.last_created_at
+        frames = self._collect(result, known)
+        if not frames:
+            return
+
+        late = last is not None and min(frame['created_at'].iloc[0] for frame in frames) < last
+        if late:
+            # 워터마크보다 앞선 행이 왔음 -> 정렬을 다시 맞추고 윈도우 통계는 다음 요청 때 새로 계산
+            self.window_stats = {}
+        for rolling in self.window_stats.values():
+            for frame in frames:
+                rolling.append_frame(frame)
+
+        if not self.df.empty:
+            frames.insert(0, self.df)
+        with perf_metrics.span('frame.build'):
+            self.df = pd.concat(frames, ignore_index=True)
+            if late:
+                self.df = self.df.sort_values(['created_at', 'id'], kind='stable', ignore_index=True)
+        self.version += 1
+
+    def _collect(self, result, known=None):
+        """페이지별로 프레임 변환 (겹쳐 조회한 구간에서 이미 가진 id(known)는 제외)"""
+        pages = [result] if isinstance(result, (list, pd.DataFrame)) else result
+        frames = []
+        for page in pages:
+            if isinstance(page, pd.DataFrame):
+                frame = page
+            else:
+                with perf_metrics.span('frame.build'):
+                    frame = self._to_frame(page)
+            if frame.empty:
+                continue
+            if known:
+                seen = frame['id'].isin(known)
+                if seen.any():
+                    frame = frame[~seen].reset_index(drop=True)
+                    if frame.empty:
+                        continue
+            if self.store is not None:
+                with perf_metrics.span('store.write'):
+                    self.store.write(frame)
+            frames.append(frame)
+            self._update_watermark(frame)
+        return frames
+
+    def _trim(self, cutoff):
+        """윈도우 밖으로 밀려난 오래된 행 제거"""
+        if self.covered_since is not None and cutoff > self.covered_since:
+            self.covered_since = cutoff
+        if self.store is not None and self.covered_since is not None:
+            self._prune_store(self.covered_since)
+        if self.df.empty:
+            return
+
+        keep = self.df['created_at'] >= self._as_column_time(cutoff)
+        if not keep.all():
+            self.df = self.df[keep].reset_index(drop=True)
+            self.version += 1
+
+    def _prune_store(self, covered_since):
+        """캐시 구간 밖 날짜의 로컬 행/집계 삭제"""
+        now = time.monotonic()
+        if self.pruned_at is not None and now - self.pruned_at < PRUNE_INTERVAL:
+            return
+        self.pruned_at = now
+        # covered_since와 같은 기준(store.covers/mark_covered)으로, 날짜 경계로 잘라서
+        # 집계 구간(최대 1일)이 반쯤 지워지지 않게
+        before = pd.Timestamp(to_epoch_ms(covered_since), unit='ms', tz='UTC').floor('D')
+        with perf_metrics.span('store.prune'):
+            self.store.prune(before)
+
+    def _slice(self, start_time):
+        if self.df.empty:
+            return self.df
+        return self.df[self.df['created_at'] >= self._as_column_time(start_time)]
+
+    def _update_watermark(self, frame):
+        last = frame['created_at'].iloc[-1]
+        if self.last_created_at is None or last > self.last_created_at:
+            self.last_created_at = last
+
+    def _as_column_time(self, value):
+        # Supabase의 created_at은 timestamptz(UTC)이고, 조회 조건은 기존처럼 naive 시각을 씀
+        ts = pd.Timestamp(value)
+        tz = self.df['created_at'].dt.tz
+        if tz is not None and ts.tzinfo is None:
+            ts = ts.tz_localize(tz)
+        return ts
+
+    @staticmethod
+    def _to_frame(rows):
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame(rows)
+        df['created_at'] = pd.to_datetime(df['created_at'], format='ISO8601', utc=True)
+        return df
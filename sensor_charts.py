@@ -0,0 +1,208 @@
+# app.py 센서 차트 엔진: 시간축을 한 번만 만들어 모든 트레이스가 공유, 점이 많으면 WebGL
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+import perf_metrics
+from downsample import (
+    FULL_CHART_WIDTH, HALF_CHART_WIDTH, data_version, downsample_frame, envelope_frame, target_points
+)
+
+# 트레이스 점 개수가 이보다 많으면 SVG 대신 WebGL(Scattergl)로 그림
+WEBGL_THRESHOLD = 1000
+# 집계 프레임의 최저~최고 띠 불투명도
+BAND_OPACITY = 0.2
+
+# 컬럼: (이름, 차트 제목, 선 색)
+SERIES = {
+    'temperature': ('온도 (°C)', "온도 추이", 'red'),
+    'humidity': ('습도 (%)', "습도 추이", 'blue'),
+    'light': ('조도 (%)', "조도 추이", 'orange'),
+}
+
+# 게시판 앱 세로 3단 센서 차트 - 컬럼: (subplot 제목, 이름, 선 색)
+BOARD_SERIES = {
+    'temperature': ('🌡️ 온도 (°C)', '온도', '#ff6b6b'),
+    'humidity': ('💧 습도 (%)', '습도', '#4ecdc4'),
+    'light': ('☀️ 조도', '조도', '#ffe66d'),
+}
+
+_CACHE_SIZE = 32     # 장치별 격자 차트도 함께 들어가므로 장치 수보다 넉넉하게
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def scatter_class(n_points):
+    return go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+
+
+def shared_axis(df, n_out):
+    """컬럼별 LTTB로 고른 행의 합집합 -> (epoch ms 시간축, 해당 행 프레임)
+
+    지표마다 따로 다운샘플링하면 x 배열이 트레이스마다 달라지므로, 남길 행을 합쳐
+    하나의 시간축을 만들고 모든 트레이스가 같은 배열을 참조하게 합니다.
+    합집합이 n_out을 넘지 않도록 지표마다 n_out / 지표 수만큼 고릅니다.
+    """
+    if len(df) <= n_out:
+        return _epoch_ms(df['created_at']), df
+    picked = downsample_frame(df, list(SERIES), max(n_out // len(SERIES), 3))
+    labels = np.unique(np.concatenate([frame.index.to_numpy() for frame in picked.values()]))
+    rows = df.loc[labels]
+    return _epoch_ms(rows['created_at']), rows
+
+
+def _epoch_ms(created):
+    # 날짜 문자열 대신 epoch ms 숫자로 보내고 x축 type='date'로 해석 (직렬화가 가벼움)
+    if created.dt.tz is not None:
+        created = created.dt.tz_convert('UTC').dt.tz_localize(None)
+    return created.to_numpy(dtype='datetime64[ms]').astype(np.int64)
+
+
+def band_traces(df, col, color, n_out, name=None):
+    """집계 프레임이면 구간별 최저~최고 띠 트레이스 2개 (평균선만 그리면 짧은 피크가 사라짐), 원본이면 []"""
+    band = envelope_frame(df, col, n_out)
+    if band is None:
+        return []
+    x = _epoch_ms(band['created_at'])
+    trace = scatter_class(len(x))
+    return [
+        trace(x=x, y=band[f'{col}_max'].to_numpy(), mode='lines', line=dict(width=0),
+              hoverinfo='skip', showlegend=False),
+        trace(x=x, y=band[f'{col}_min'].to_numpy(), mode='lines', line=dict(width=0), fill='tonexty',
+              fillcolor=color, opacity=BAND_OPACITY, name=f"{name or col} 최저~최고", hoverinfo='skip', showlegend=False),
+    ]
+
+
+@perf_metrics.timed('figure.build')
+def build_sensor_figure(df):
+    """게시판 앱용 센서 데이터 시계열 차트 (온도/습도/조도 3단, 차트 너비에 맞게 다운샘플링)"""
+    n_out = target_points()
+    chart_df = downsample_frame(df, list(BOARD_SERIES), n_out)
+    fig = make_subplots(
+        rows=3, cols=1,
+        subplot_titles=tuple(title for title, _, _ in BOARD_SERIES.values()),
+        vertical_spacing=0.08,
+        shared_xaxes=True
+    )
+    for row, (col, (_, name, color)) in enumerate(BOARD_SERIES.items(), start=1):
+        fig.add_trace(
+            go.Scatter(x=chart_df[col]['created_at'], y=chart_df[col][col], name=name,
+                       line=dict(color=color, width=2), fill='tonexty'),
+            row=row, col=1
+        )
+    # 집계 프레임이면 평균선 위에 구간별 최저~최고 띠 (짧은 피크가 평균에 묻히지 않게)
+    for row, (col, (_, name, color)) in enumerate(BOARD_SERIES.items(), start=1):
+        for trace in band_traces(df, col, color, n_out, name):
+            fig.add_trace(trace, row=row, col=1)
+
+    fig.update_layout(height=600, title_text="📈 센서 데이터 시계열 차트", showlegend=False)
+    fig.update_xaxes(title_text="시간", row=3, col=1)
+    return fig
+
+
+def _line_figure(df, x, rows, col):
+    name, title, color = SERIES[col]
+    trace = scatter_class(len(x))(x=x, y=rows[col].to_numpy(), mode='lines', name=name, line=dict(color=color))
+    fig = go.Figure(band_traces(df, col, color, len(x), name) + [trace])
+    fig.update_layout(title=title, xaxis_title="시간", yaxis_title=name, xaxis_type='date')
+    return fig
+
+
+def build_figures(df, half_points, full_points):
+    half_x, half_rows = shared_axis(df, half_points)
+    full_x, full_rows = shared_axis(df, full_points)
+
+    figures = {
+        'temperature': _line_figure(df, half_x, half_rows, 'temperature'),
+        'humidity': _line_figure(df, half_x, half_rows, 'humidity'),
+        'light': _line_figure(df, full_x, full_rows, 'light'),
+    }
+
+    combined = go.Figure(_combined_traces(df, full_x, full_rows))
+    combined.update_layout(title="환경 데이터 종합", xaxis_title="시간", yaxis_title="값", xaxis_type='date')
+    figures['combined'] = combined
+    return figures
+
+
+def _combined_traces(df, x, rows):
+    # 띠를 먼저 깔고 평균선을 위에 (띠끼리 tonexty가 엉키지 않도록 지표별로 최고/최저를 붙여서)
+    trace = scatter_class(len(x))
+    bands = [t for col, (name, _, color) in SERIES.items() for t in band_traces(df, col, color, len(x), name)]
+    return bands + [
+        trace(x=x, y=rows[col].to_numpy(), mode='lines', name=name, line=dict(color=color))
+        for col, (name, _, color) in SERIES.items()
+    ]
+
+
+def explore_figure(df, points=None):
+    """기간 탐색용 종합 차트 (드래그하면 box select -> 그 구간으로 다시 조회)
+
+    sensor_figures와 같은 캐시를 쓰며, 반환된 Figure는 수정하지 말아야 합니다.
+    """
+    points = points or target_points(FULL_CHART_WIDTH)
+    key = ('explore', data_version(df), points)
+    with _cache_lock:
+        fig = _cache.get(key)
+        if fig is not None:
+            _cache.move_to_end(key)
+            return fig
+
+    x, rows = shared_axis(df, points)
+    fig = go.Figure(_combined_traces(df, x, rows))
+    fig.update_layout(xaxis_title="시간", yaxis_title="값", xaxis_type='date', dragmode='select')
+    with _cache_lock:
+        _cache[key] = fig
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return fig
+
+
+def device_figure(df, points):
+    """장치별 격자(small multiples)용 작은 종합 차트 (같은 데이터 버전이면 그대로 반환)"""
+    key = ('device', data_version(df), points)
+    with _cache_lock:
+        fig = _cache.get(key)
+        if fig is not None:
+            _cache.move_to_end(key)
+            return fig
+
+    x, rows = shared_axis(df, points)
+    trace = scatter_class(len(x))
+    fig = go.Figure([
+        trace(x=x, y=rows[col].to_numpy(), mode='lines', name=name, line=dict(color=color, width=1))
+        for col, (name, _, color) in SERIES.items()
+    ])
+    fig.update_layout(
+        height=220, margin=dict(l=10, r=10, t=10, b=10), showlegend=False, xaxis_type='date'
+    )
+    with _cache_lock:
+        _cache[key] = fig
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return fig
+
+
+def sensor_figures(df, half_points=None, full_points=None):
+    """온도/습도/조도/종합 Figure dict (같은 데이터 버전이면 만들어 둔 Figure를 그대로 반환)
+
+    반환된 Figure는 여러 세션이 공유하므로 수정하지 말아야 합니다.
+    """
+    half_points = half_points or target_points(HALF_CHART_WIDTH)
+    full_points = full_points or target_points(FULL_CHART_WIDTH)
+    key = (data_version(df), half_points, full_points)
+
+    with _cache_lock:
+        figures = _cache.get(key)
+        if figures is not None:
+            _cache.move_to_end(key)
+            return figures
+
+    figures = build_figures(df, half_points, full_points)
+    with _cache_lock:
+        _cache[key] = figures
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return figures
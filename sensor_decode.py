@@ -0,0 +1,81 @@
+# PostgREST 응답을 행(dict) 없이 바로 타입이 정해진 컬럼으로 변환
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+import perf_metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# PostgREST에 CSV로 달라고 요청 (JSON 대비 크기도 작고 C 파서로 바로 읽을 수 있음)
+CSV_ACCEPT = 'text/csv'
+
+# 센서값은 모두 float64 (조도가 소수로 오거나 null이어도 페이지마다 타입이 같고,
+# float32처럼 40.1이 40.099998로 바뀌어 로컬 저장소에 남지 않게)
+SENSOR_DTYPES = {
+    'id': np.int64,
+    'temperature': np.float64,
+    'humidity': np.float64,
+    'light': np.float64,
+}
+
+if pa is not None:
+    ARROW_TYPES = {
+        'id': pa.int64(),
+        'created_at': pa.timestamp('us', tz='UTC'),
+        'temperature': pa.float64(),
+        'humidity': pa.float64(),
+        'light': pa.float64(),
+        'device_id': pa.string(),
+    }
+
+
+@perf_metrics.timed('decode.csv')
+def decode_sensor_csv(content):
+    """CSV 응답(bytes/str) -> DataFrame (created_at은 UTC datetime64, 센서값은 float64)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    if not content.strip():
+        return pd.DataFrame()
+
+    if pa is not None:
+        table = pa_csv.read_csv(
+            io.BytesIO(content),
+            convert_options=pa_csv.ConvertOptions(column_types=ARROW_TYPES)
+        )
+        return table.to_pandas()
+
+    # pyarrow가 없으면 pandas C 파서
+    df = pd.read_csv(io.BytesIO(content))
+    return _finish_frame(df)
+
+
+@perf_metrics.timed('decode.json')
+def decode_sensor_json(content):
+    """JSON 배열 응답 -> DataFrame (orjson이 있으면 orjson으로 파싱)"""
+    rows = orjson.loads(content) if orjson is not None else json.loads(content)
+    if not rows:
+        return pd.DataFrame()
+
+    columns = {key: [r[key] for r in rows] for key in rows[0]}
+    return _finish_frame(pd.DataFrame(columns))
+
+
+def _finish_frame(df):
+    if 'created_at' in df:
+        df['created_at'] = pd.to_datetime(df['created_at'], format='ISO8601', utc=True)
+    for col, dtype in SENSOR_DTYPES.items():
+        if col in df:
+            df[col] = df[col].astype(dtype)
+    return df
@@ -0,0 +1,151 @@
+# 프로세스당 하나의 maintable2 수집기 - 모든 세션이 같은 스냅샷을 읽음
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from sensor_store import DEFAULT_DEVICE
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = 10          # 꼬리 조회 주기(초), Realtime 이벤트가 오면 바로 깨어남
+FIRST_SNAPSHOT_TIMEOUT = 30 # 첫 스냅샷을 기다리는 최대 시간(초)
+
+
+class SensorSnapshot:
+    """한 번의 수집 결과 (발행된 뒤로는 바뀌지 않음)
+
+    df는 수집 구간 전체(created_at 오름차순)이고, 세션은 window(hours)로 필요한
+    구간만 잘라 씁니다. 호출 측은 돌려받은 프레임을 수정하지 말아야 합니다.
+    """
+
+    def __init__(self, df, stats, version, fetched_at, error=None):
+        self.df = df
+        self.stats = stats              # hours -> 통계 dict (SensorWindowCache.stats와 같은 모양)
+        self.version = version
+        self.fetched_at = fetched_at
+        self.error = error              # 마지막 수집이 실패했으면 그 오류 (데이터는 직전 것)
+        self._windows = {}
+        self._devices = {}
+
+    def window(self, hours=24):
+        """최근 N시간 데이터 (created_at 오름차순)"""
+        cached = self._windows.get(hours)
+        if cached is not None:
+            return cached
+        df = self.df
+        if not df.empty:
+            cutoff = pd.Timestamp(datetime.now() - timedelta(hours=hours))
+            tz = df['created_at'].dt.tz
+            if tz is not None:
+                cutoff = cutoff.tz_localize(tz)
+            df = df[df['created_at'] >= cutoff]
+        # 같은 스냅샷 안에서는 결과가 같으므로 여러 세션이 경쟁해도 어느 값이든 무방
+        self._windows[hours] = df
+        return df
+
+    def by_device(self, hours=24):
+        """장치별 최근 N시간 데이터 {device_id: 프레임} (한 번의 수집 결과를 나눠 씀)"""
+        cached = self._devices.get(hours)
+        if cached is not None:
+            return cached
+        df = self.window(hours)
+        if df.empty:
+            cached = {}
+        elif 'device_id' not in df:
+            cached = {DEFAULT_DEVICE: df}
+        else:
+            # device_id 컬럼이 생기기 전에 저장한 행은 기본 장치로 봄
+            devices = df['device_id'].fillna(DEFAULT_DEVICE)
+            cached = {
+                device: frame.reset_index(drop=True)
+                for device, frame in df.groupby(devices, sort=True)
+            }
+        self._devices[hours] = cached
+        return cached
+
+
+EMPTY_SNAPSHOT = SensorSnapshot(pd.DataFrame(), {}, -1, None)
+
+
+class SensorPoller:
+    """SensorWindowCache를 혼자 소유하고 주기적으로 꼬리를 받아 스냅샷을 발행하는 스레드
+
+    세션 수와 관계없이 프로세스당 한 번만 Supabase를 조회합니다. 세션은 snapshot()으로
+    현재 스냅샷 참조만 읽으므로 렌더링 경로에서 잠금을 기다리지 않습니다.
+    """
+
+    def __init__(self, cache, interval=POLL_INTERVAL, listener=None):
+        self.cache = cache
+        self.interval = interval
+        self.hours = cache.max_hours
+        self.stats_hours = set()
+        self.wake = threading.Event()
+        self.ready = threading.Event()
+        self.poll_lock = threading.Lock()
+        self.current = EMPTY_SNAPSHOT
+        self.thread = None
+        self.stopped = False
+        self.listener = listener
+        if listener is not None:
+            listener.on_change(self._on_change)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run_forever, name='sensor-poller', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """수집 스레드를 멈춤 (진행 중인 조회는 끝까지 하고 종료)"""
+        self.stopped = True
+        if self.listener is not None:
+            self.listener.off_change(self._on_change)
+        self.wake.set()
+
+    def snapshot(self, timeout=FIRST_SNAPSHOT_TIMEOUT):
+        """현재 스냅샷 (프로세스 시작 직후라면 첫 수집이 끝날 때까지 대기)"""
+        if not self.ready.is_set():
+            self.ready.wait(timeout)
+        return self.current
+
+    def stats(self, hours=24):
+        """최근 N시간 통계 (처음 요청한 구간은 다음 수집부터 스냅샷에 포함)"""
+        snapshot = self.snapshot()
+        if hours in snapshot.stats:
+            return snapshot.stats[hours]
+        self.stats_hours.add(hours)
+        return self.cache.stats(hours)
+
+    def refresh(self, clear=False):
+        """지금 바로 수집 (clear=True면 캐시를 비우고 전체 구간을 다시 받음)"""
+        if clear:
+            self.cache.clear()
+        self._poll()
+        return self.current
+
+    def _on_change(self, table, payload):
+        if table == 'maintable2':
+            self.wake.set()
+
+    def _run_forever(self):
+        while not self.stopped:
+            self._poll()
+            self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def _poll(self):
+        with self.poll_lock:
+            try:
+                df = self.cache.get(self.hours)
+                # 새 행이 없어도 다시 발행 (시간이 지나 윈도우 밖으로 나간 행을 반영)
+                stats = {hours: self.cache.stats(hours) for hours in list(self.stats_hours)}
+                self.current = SensorSnapshot(df, stats, self.cache.version, time.time())
+            except Exception as e:
+                logger.warning(f"센서 데이터 수집 실패: {e}")
+                last = self.current
+                self.current = SensorSnapshot(last.df, last.stats, last.version, last.fetched_at, error=e)
+            finally:
+                self.ready.set()
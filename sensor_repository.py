@@ -0,0 +1,181 @@
+# maintable2 센서 데이터 저장소 - 모든 앱(app/member_bbs/member_bbs2/integrated_board)이 같은 경로로 조회
+import os
+import threading
+import time
+
+import pandas as pd
+
+import sensor_archive
+import sensor_tiles
+from sensor_cache import SensorWindowCache
+from sensor_poller import SensorPoller
+from sensor_store import SensorStore, device_store_path
+from supabase_rest import SimpleSupabaseClient
+
+SENSOR_SELECT = 'id,created_at,light,temperature,humidity,device_id'
+# Supabase(PostgREST)의 max-rows 기본값과 맞춤 (이보다 크게 요청해도 잘려서 옴)
+PAGE_SIZE = int(os.environ.get('SUPABASE_MAX_ROWS', 1000))
+# 장치별 저장소는 이 시간(초) 동안 아무 세션도 읽지 않으면 수집을 멈추고 버림
+DEVICE_IDLE_SECONDS = int(os.environ.get('DEVICE_IDLE_SECONDS', 600))
+MAX_DEVICE_REPOSITORIES = int(os.environ.get('MAX_DEVICE_REPOSITORIES', 16))
+SWEEP_INTERVAL = 60
+
+_repositories = {}
+_retired = []           # 멈춘 장치별 저장소 (수집 스레드가 끝나고 SWEEP_INTERVAL이 지나면 파일을 닫음)
+_repositories_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+class SensorRepository:
+    """REST 키셋 페이지 + CSV 컬럼 변환 -> SensorWindowCache(+SensorStore) -> SensorPoller 스냅샷
+
+    수집 구간(cache.max_hours)보다 긴 구간은 앞부분을 Parquet 보관소(sensor_archive)에서 읽어
+    이어 붙입니다. window(hours)는 항상 created_at 오름차순이라 최신 값은 iloc[-1]입니다.
+
+    device_id를 주면 그 장치의 행만 조회하고((device_id, created_at) 인덱스), 로컬 저장소와
+    보관소도 장치별 파일을 씁니다. 없으면 모든 장치를 한 번에 받고 by_device로 나눠 씁니다.
+    돌려받은 프레임은 여러 세션이 공유하므로 수정하지 말고, 화면에서 최신순이
+    필요하면 iloc[::-1]로 뒤집어서 씁니다.
+    """
+
+    def __init__(self, url, key, listener=None, store=None, page_size=PAGE_SIZE, archive=None, device_id=None):
+        self.client = SimpleSupabaseClient(url, key)
+        self.page_size = page_size
+        self.device_id = device_id
+        self.last_used = time.monotonic()
+        if archive is None and sensor_archive.available():
+            archive = sensor_archive.SensorArchive(sensor_archive.device_archive_path(device_id))
+        self.archive = archive
+        self._history = {}      # hours -> (스냅샷, 보관소 + 스냅샷 프레임)
+        change_token = (lambda: listener.token('maintable2')) if listener is not None else None
+        self.cache = SensorWindowCache(
+            self.fetch_since,
+            store=store if store is not None else SensorStore(device_store_path(device_id)),
+            change_token=change_token
+        )
+        self.poller = SensorPoller(self.cache, listener=listener)
+
+    def start(self):
+        self.poller.start()
+        return self
+
+    def stop(self):
+        """수집을 멈춤 (이미 받아 간 세션은 마지막 스냅샷을 계속 읽을 수 있음, 파일은 close()로)"""
+        self.poller.stop()
+
+    def close(self):
+        self.cache.store.close()
+
+    def fetch_since(self, since_iso):
+        """created_at >= since_iso 인 행을 페이지 단위 DataFrame으로 (오름차순)"""
+        filters = {'created_at': f'gte.{since_iso}'}
+        if self.device_id is not None:
+            filters['device_id'] = f'eq.{self.device_id}'
+        return self.client.select_pages(
+            'maintable2',
+            columns=SENSOR_SELECT,
+            filters=filters,
+            page_size=self.page_size,
+            as_frame=True
+        )
+
+    def snapshot(self):
+        return self.poller.snapshot()
+
+    def window(self, hours=24):
+        """최근 N시간 데이터 (created_at 오름차순, 네트워크 조회 없음)"""
+        snapshot = self.poller.snapshot()
+        if hours <= self.cache.max_hours or self.archive is None:
+            return snapshot.window(hours)
+
+        cached = self._history.get(hours)
+        if cached is not None and cached[0] is snapshot:
+            return cached[1]
+        live = snapshot.df
+        live_start = live['created_at'].iloc[0] if not live.empty else pd.Timestamp.now(tz='UTC')
+        # 보관소는 UTC 날짜로 나뉘므로 naive 현지 시각이 아닌 UTC 기준으로 잘라야 함
+        archived = self.archive.read(pd.Timestamp.now(tz='UTC') - pd.Timedelta(hours=hours), live_start)
+        df = pd.concat([archived, live], ignore_index=True) if len(archived) else live
+        # 같은 스냅샷 안에서는 결과가 같으므로 여러 세션이 경쟁해도 어느 값이든 무방
+        self._history[hours] = (snapshot, df)
+        return df
+
+    def tiles(self, start, end, max_points=sensor_tiles.MAX_POINTS):
+        """임의 구간(start~end)을 구간 길이에 맞는 해상도로 -> (단위, created_at 오름차순 프레임)"""
+        self.poller.snapshot()      # 프로세스 시작 직후라면 로컬 저장소가 채워질 때까지 대기
+        return sensor_tiles.read_tiles(start, end, self.cache.store, self.archive, self.cache.version, max_points)
+
+    def by_device(self, hours=24):
+        """장치별 최근 N시간 데이터 {device_id: 프레임} (한 번의 수집 결과를 나눠 씀)"""
+        return self.poller.snapshot().by_device(hours)
+
+    def devices(self):
+        """수집 구간 안에 값을 보낸 장치 목록"""
+        return list(self.by_device(self.cache.max_hours))
+
+    def archived_days(self):
+        return self.archive.days() if self.archive is not None else []
+
+    def error(self):
+        """마지막 수집이 실패했으면 그 오류 (없으면 None)"""
+        return self.poller.snapshot().error
+
+    def stats(self, hours=24):
+        """최근 N시간 통계 (현재/평균/최고/최저)"""
+        return self.poller.stats(hours)
+
+    def chart_frame(self, hours, target_points):
+        """긴 구간이면 로컬 집계 테이블에서 차트용 프레임 (해당 없으면 None -> window 사용)"""
+        if hours > self.cache.max_hours:
+            # 로컬 집계는 수집 구간만 담고 있으므로 보관소 구간은 window로 그림
+            return None
+        return self.cache.chart_frame(hours, target_points)
+
+    def refresh(self, clear=False):
+        """지금 바로 수집 (clear=True면 캐시를 비우고 전체 구간을 다시 받음)"""
+        return self.poller.refresh(clear=clear)
+
+
+def get_repository(url, key, listener=None, device_id=None):
+    """프로세스 전체가 함께 쓰는 저장소 (url/key/장치별 하나, 처음 만들 때 수집 시작)
+
+    장치별 저장소는 각자 따로 버려집니다: DEVICE_IDLE_SECONDS 동안 읽히지 않았거나
+    MAX_DEVICE_REPOSITORIES를 넘으면 가장 오래 안 읽힌 것부터 수집을 멈춥니다.
+    멈춘 저장소는 목록에서 빠지므로 다음 호출은 새 저장소를 받습니다. 세션은 저장소를
+    rerun 사이에 들고 있지 말고 매번 이 함수로 받아야 합니다.
+    """
+    global _last_sweep
+    now = time.monotonic()
+    repo = _repositories.get((url, key, device_id))
+    if repo is None or now - _last_sweep > SWEEP_INTERVAL:
+        with _repositories_lock:
+            _last_sweep = now
+            _evict_devices(now)
+            repo = _repositories.get((url, key, device_id))
+            if repo is None:
+                repo = SensorRepository(url, key, listener=listener, device_id=device_id).start()
+                _repositories[(url, key, device_id)] = repo
+    repo.last_used = now
+    return repo
+
+
+def _evict_devices(now):
+    """오래 안 읽힌 장치별 저장소를 멈추고 목록에서 뺌 (새 장치 하나 들어올 자리도 남김)
+
+    이번 rerun에서 이미 받아 간 세션이 있을 수 있으므로 SQLite 파일은 바로 닫지 않고,
+    수집 스레드가 끝난 뒤 다음 정리 때 닫습니다.
+    """
+    for retired_at, repo in list(_retired):
+        thread = repo.poller.thread
+        if now - retired_at > SWEEP_INTERVAL and (thread is None or not thread.is_alive()):
+            repo.close()
+            _retired.remove((retired_at, repo))
+
+    idle = sorted(
+        (repo.last_used, k) for k, repo in _repositories.items() if k[2] is not None
+    )
+    for i, (last_used, k) in enumerate(idle):
+        if now - last_used > DEVICE_IDLE_SECONDS or len(idle) - i >= MAX_DEVICE_REPOSITORIES:
+            repo = _repositories.pop(k)
+            repo.stop()
+            _retired.append((now, repo))
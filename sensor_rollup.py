@@ -0,0 +1,168 @@
+# 시간 구간(1분/10분/1시간/1일) 집계 테이블과 차트 해상도에 맞는 조회
+import numpy as np
+import pandas as pd
+
+# 이름: 구간 길이(초), 가는 것부터 굵은 순서
+ROLLUP_LEVELS = {
+    '1m': 60,
+    '10m': 600,
+    '1h': 3600,
+    '1d': 86400,
+}
+METRICS = ('temperature', 'humidity', 'light')
+# 원본 대신 한 단계 가는 집계에서 다시 묶는 단위 (1일 구간을 원본으로 다시 훑지 않도록)
+DERIVED_FROM = {'1d': '1h'}
+
+
+def rollup_table(level):
+    return f"maintable2_rollup_{level}"
+
+
+def create_rollup_tables(conn):
+    """집계 테이블 생성 (없을 때만), 새로 만든 경우 기존 원본 데이터로 채움
+
+    지표별 행 수({m}_count) 컬럼이 없는 예전 테이블은 지우고 원본에서 다시 만듭니다.
+    """
+    for level in ROLLUP_LEVELS:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({rollup_table(level)})")}
+        exists = bool(columns)
+        if exists and f"{METRICS[0]}_count" not in columns:
+            conn.execute(f"DROP TABLE {rollup_table(level)}")
+            exists = False
+        # {m}_count: 값이 NULL이 아닌 행 수 (굵은 구간 평균의 가중치), {m}_last: NULL이 아닌 마지막 값
+        metric_cols = ',\n'.join(
+            f"{m}_min REAL, {m}_max REAL, {m}_mean REAL, {m}_last REAL, {m}_count INTEGER" for m in METRICS
+        )
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {rollup_table(level)} (
+                bucket_ms INTEGER PRIMARY KEY,
+                count INTEGER NOT NULL,
+                {metric_cols}
+            )
+        """)
+        if not exists:
+            _rebuild(conn, level, None, None)
+
+
+def update_rollups(conn, min_ms, max_ms):
+    """min_ms~max_ms 사이에 행이 추가/변경되었을 때 해당 구간만 다시 집계"""
+    for level in ROLLUP_LEVELS:
+        _rebuild(conn, level, min_ms, max_ms)
+
+
+def _rebuild(conn, level, min_ms, max_ms):
+    if level in DERIVED_FROM:
+        return _rebuild_derived(conn, level, DERIVED_FROM[level], min_ms, max_ms)
+    size = ROLLUP_LEVELS[level] * 1000
+    where = ""
+    params = ()
+    if min_ms is not None:
+        # 영향을 받은 구간 전체를 원본에서 다시 계산 (upsert로 값이 바뀌어도 정확)
+        lo = min_ms - min_ms % size
+        hi = max_ms - max_ms % size + size
+        where = "WHERE created_ms >= ? AND created_ms < ?"
+        params = (lo, hi)
+
+    aggregates = ',\n'.join(
+        f"MIN({m}), MAX({m}), AVG({m}), "
+        f"(SELECT {m} FROM maintable2 l "
+        f" WHERE l.created_ms >= b.bucket_ms AND l.created_ms < b.bucket_ms + {size} AND l.{m} IS NOT NULL "
+        f" ORDER BY l.created_ms DESC, l.id DESC LIMIT 1), "
+        f"COUNT({m})"
+        for m in METRICS
+    )
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {rollup_table(level)} (bucket_ms, count, {_metric_columns()})
+        SELECT b.bucket_ms, COUNT(*), {aggregates}
+        FROM (
+            SELECT *, created_ms - created_ms % {size} AS bucket_ms
+            FROM maintable2 {where}
+        ) b
+        GROUP BY b.bucket_ms
+    """, params)
+
+
+def _rebuild_derived(conn, level, source, min_ms, max_ms):
+    """source 집계 구간을 묶어서 level 구간 계산 (평균은 지표별 NULL이 아닌 행 수 가중 평균)"""
+    size = ROLLUP_LEVELS[level] * 1000
+    where = ""
+    params = ()
+    if min_ms is not None:
+        lo = min_ms - min_ms % size
+        hi = max_ms - max_ms % size + size
+        where = "WHERE bucket_ms >= ? AND bucket_ms < ?"
+        params = (lo, hi)
+
+    aggregates = ',\n'.join(
+        f"MIN({m}_min), MAX({m}_max), SUM({m}_mean * {m}_count) / SUM({m}_count), "
+        f"(SELECT {m}_last FROM {rollup_table(source)} l "
+        f" WHERE l.bucket_ms >= b.bucket AND l.bucket_ms < b.bucket + {size} AND l.{m}_last IS NOT NULL "
+        f" ORDER BY l.bucket_ms DESC LIMIT 1), "
+        f"SUM({m}_count)"
+        for m in METRICS
+    )
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {rollup_table(level)} (bucket_ms, count, {_metric_columns()})
+        SELECT b.bucket, SUM(count), {aggregates}
+        FROM (
+            SELECT *, bucket_ms - bucket_ms % {size} AS bucket
+            FROM {rollup_table(source)} {where}
+        ) b
+        GROUP BY b.bucket
+    """, params)
+
+
+def _metric_columns():
+    # 집계 SELECT의 지표별 순서와 같음
+    return ', '.join(f"{m}_min, {m}_max, {m}_mean, {m}_last, {m}_count" for m in METRICS)
+
+
+def choose_level(hours, target_points):
+    """차트 점 개수(target_points)를 채우는 가장 굵은 집계 단위 (없으면 None = 원본)"""
+    window = hours * 3600
+    chosen = None
+    for level, seconds in ROLLUP_LEVELS.items():
+        if window / seconds >= target_points:
+            chosen = level
+    return chosen
+
+
+def read_rollup(conn, level, since_ms, until_ms=None):
+    """집계 구간 DataFrame (created_at = 구간 시작, 각 지표는 평균, _min/_max/_last 포함)"""
+    cols = ', '.join(
+        f"{m}_mean AS {m}, {m}_min, {m}_max, {m}_last" for m in METRICS
+    )
+    where, params = "bucket_ms >= ?", (since_ms,)
+    if until_ms is not None:
+        where, params = "bucket_ms >= ? AND bucket_ms < ?", (since_ms, until_ms)
+    df = pd.read_sql_query(
+        f"SELECT bucket_ms, count, {cols} FROM {rollup_table(level)} "
+        f"WHERE {where} ORDER BY bucket_ms",
+        conn,
+        params=params
+    )
+    df.insert(0, 'created_at', pd.to_datetime(df.pop('bucket_ms'), unit='ms', utc=True))
+    return df
+
+
+def aggregate_frame(frame, level):
+    """원본 프레임(created_at 오름차순) -> read_rollup과 같은 모양의 집계 프레임 (pandas로 계산)"""
+    columns = ['created_at', 'count'] + [
+        f"{m}{suffix}" for m in METRICS for suffix in ('', '_min', '_max', '_last')
+    ]
+    if frame.empty:
+        return pd.DataFrame(columns=columns)
+
+    bucket = frame['created_at'].dt.floor(f"{ROLLUP_LEVELS[level]}s")
+    grouped = frame.groupby(bucket, sort=True)
+    out = {'count': grouped.size().astype(np.int64)}
+    # mean/last는 NaN을 건너뜀 (SQL의 AVG, NULL이 아닌 마지막 값과 같음)
+    for m in METRICS:
+        values = grouped[m]
+        out[m] = values.mean().astype(np.float64)
+        out[f"{m}_min"] = values.min().astype(np.float64)
+        out[f"{m}_max"] = values.max().astype(np.float64)
+        out[f"{m}_last"] = values.last().astype(np.float64)
+    df = pd.DataFrame(out)
+    df.index.name = 'created_at'
+    return df.reset_index()[columns]
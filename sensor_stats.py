@@ -0,0 +1,100 @@
+# 슬라이딩 윈도우 센서 통계 (행 추가/만료 시 O(1) 분할상환 갱신)
+import math
+from collections import deque
+
+import numpy as np
+
+# 화면에 쓰는 이름: 컬럼
+METRICS = {
+    "온도": 'temperature',
+    "습도": 'humidity',
+    "조도": 'light',
+}
+
+
+class RollingStats:
+    """running count/sum과 단조 deque(min/max)로 유지하는 윈도우 통계
+
+    행은 created_at 순서로 append되고, 윈도우 밖으로 나간 행은 evict_before로
+    빼냅니다. 통계 조회는 윈도우 크기와 상관없이 O(1)입니다.
+    """
+
+    def __init__(self, columns=tuple(METRICS.values())):
+        self.columns = columns
+        self.rows = deque()                             # (ts, seq, 값들)
+        self.count = {c: 0 for c in columns}
+        self.total = {c: 0.0 for c in columns}
+        self.mins = {c: deque() for c in columns}       # 값이 증가하는 (seq, 값)
+        self.maxs = {c: deque() for c in columns}       # 값이 감소하는 (seq, 값)
+        self.last = {c: None for c in columns}
+        self.seq = 0
+
+    def append_frame(self, df):
+        """created_at 오름차순 프레임의 행들을 추가"""
+        if df.empty:
+            return
+        ts = df['created_at'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        values = [df[c].to_numpy(dtype=np.float64, na_value=np.nan).tolist() for c in self.columns]
+        for i, t in enumerate(ts.tolist()):
+            self.append(t, [v[i] for v in values])
+
+    def append(self, ts, values):
+        seq = self.seq
+        self.seq += 1
+        self.rows.append((ts, seq, values))
+        for c, v in zip(self.columns, values):
+            if math.isnan(v):
+                continue
+            self.count[c] += 1
+            self.total[c] += v
+            self.last[c] = v
+
+            mins = self.mins[c]
+            while mins and mins[-1][1] >= v:
+                mins.pop()
+            mins.append((seq, v))
+
+            maxs = self.maxs[c]
+            while maxs and maxs[-1][1] <= v:
+                maxs.pop()
+            maxs.append((seq, v))
+
+    def evict_before(self, ts):
+        """ts(ns)보다 오래된 행을 통계에서 제외"""
+        rows = self.rows
+        while rows and rows[0][0] < ts:
+            _, seq, values = rows.popleft()
+            for c, v in zip(self.columns, values):
+                if math.isnan(v):
+                    continue
+                self.count[c] -= 1
+                self.total[c] -= v
+                if self.mins[c] and self.mins[c][0][0] == seq:
+                    self.mins[c].popleft()
+                if self.maxs[c] and self.maxs[c][0][0] == seq:
+                    self.maxs[c].popleft()
+                if self.count[c] == 0:
+                    # 부동소수 누적 오차 제거
+                    self.total[c] = 0.0
+                    self.last[c] = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def snapshot(self):
+        """get_sensor_stats와 같은 모양의 통계 dict (값이 없는 지표는 NaN, 기존 pandas 계산과 같음)"""
+        stats = {}
+        for name, c in METRICS.items():
+            n = self.count.get(c, 0)
+            stats[name] = {
+                "현재": self.last[c] if n else math.nan,
+                "평균": self.total[c] / n if n else math.nan,
+                "최고": self.maxs[c][0][1] if n else math.nan,
+                "최저": self.mins[c][0][1] if n else math.nan,
+            }
+        return stats
+
+
+def empty_stats():
+    """데이터가 없을 때의 통계 dict (모든 값 NaN, 화면의 :.1f 포맷이 그대로 동작)"""
+    return RollingStats().snapshot()
@@ -0,0 +1,188 @@
+# maintable2 로컬 저장소 (SQLite, created_at 인덱스)
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import sensor_rollup
+
+DEFAULT_STORE_PATH = os.environ.get('SENSOR_STORE_PATH', 'sensor_store.sqlite3')
+SENSOR_COLUMNS = ['id', 'created_at', 'light', 'temperature', 'humidity', 'device_id']
+# device_id 컬럼이 생기기 전의 행/펌웨어 값 (maintable2_devices.sql의 기본값)
+DEFAULT_DEVICE = 'esp8266'
+_EPOCH = pd.Timestamp(0, tz='UTC')
+
+
+def to_epoch_ms(value):
+    """ISO 문자열/datetime -> UTC epoch(ms). 시간대가 없으면 UTC로 간주 (PostgREST와 동일)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+def device_store_path(device_id, path=DEFAULT_STORE_PATH):
+    """장치별 저장소 파일 (sensor_store.sqlite3 -> sensor_store.<장치>.sqlite3)"""
+    if device_id is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{re.sub(r'[^A-Za-z0-9_.-]', '_', device_id)}{ext}"
+
+
+class SensorStore:
+    """Supabase maintable2를 그대로 옮겨 둔 로컬 SQLite 저장소
+
+    재시작/재배포 후에도 이미 받은 기록은 로컬에서 읽고, 네트워크는 빠진 꼬리만 조회합니다.
+    covered_from_ms 이후 구간은 빠짐없이 채워져 있다는 것을 보장합니다.
+    행을 저장할 때마다 1분/10분/1시간/1일 집계(sensor_rollup)도 해당 구간만 갱신합니다.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS maintable2 (
+                id INTEGER PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                created_ms INTEGER NOT NULL,
+                light NUMERIC,
+                temperature NUMERIC,
+                humidity NUMERIC,
+                device_id TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_maintable2_created_ms
+                ON maintable2 (created_ms, id);
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER
+            );
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(maintable2)")}
+        if 'device_id' not in columns:
+            # device_id 컬럼이 생기기 전에 만든 저장소
+            self.conn.execute("ALTER TABLE maintable2 ADD COLUMN device_id TEXT")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_maintable2_device_created_ms ON maintable2 (device_id, created_ms, id)"
+        )
+        sensor_rollup.create_rollup_tables(self.conn)
+        self.conn.commit()
+
+    def write(self, rows):
+        """조회한 행(list[dict] 또는 DataFrame) 저장 (같은 id는 덮어씀)"""
+        frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+        if frame.empty:
+            return
+        created = pd.to_datetime(frame['created_at'], format='ISO8601', utc=True)
+        created_ms = (created - _EPOCH) // pd.Timedelta(milliseconds=1)
+        values = [
+            frame[col].tolist() if col in frame else [None] * len(frame)
+            for col in ('light', 'temperature', 'humidity', 'device_id')
+        ]
+        records = list(zip(
+            frame['id'].tolist(),
+            [ts.isoformat() for ts in created],
+            created_ms.tolist(),
+            *values
+        ))
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO maintable2 "
+                "(id, created_at, created_ms, light, temperature, humidity, device_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                records
+            )
+            sensor_rollup.update_rollups(self.conn, int(created_ms.min()), int(created_ms.max()))
+            self.conn.commit()
+
+    def covered_from(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM store_meta WHERE key = 'covered_from_ms'"
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark_covered(self, since):
+        """since 이후 구간을 빠짐없이 받았음을 기록"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('covered_from_ms', ?)",
+                (to_epoch_ms(since),)
+            )
+            self.conn.commit()
+
+    def covers(self, since):
+        covered = self.covered_from()
+        return covered is not None and covered <= to_epoch_ms(since)
+
+    def read_frame(self, since):
+        """since 이후 행을 created_at 오름차순 DataFrame으로 (인덱스 범위 스캔)"""
+        with self.lock:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(SENSOR_COLUMNS)} FROM maintable2 "
+                "WHERE created_ms >= ? ORDER BY created_ms, id",
+                self.conn,
+                params=(to_epoch_ms(since),)
+            )
+        if not df.empty:
+            df['created_at'] = pd.to_datetime(df['created_at'], format='ISO8601', utc=True)
+        return df
+
+    def read_range(self, start, end):
+        """start <= created_at < end 인 행 (created_at 오름차순)"""
+        with self.lock:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(SENSOR_COLUMNS)} FROM maintable2 "
+                "WHERE created_ms >= ? AND created_ms < ? ORDER BY created_ms, id",
+                self.conn,
+                params=(to_epoch_ms(start), to_epoch_ms(end))
+            )
+        if not df.empty:
+            df['created_at'] = pd.to_datetime(df['created_at'], format='ISO8601', utc=True)
+        return df
+
+    def read_tiles(self, level, start, end):
+        """start <= 구간 시작 < end 인 집계 구간 (sensor_rollup.read_rollup 모양)"""
+        with self.lock:
+            return sensor_rollup.read_rollup(self.conn, level, to_epoch_ms(start), to_epoch_ms(end))
+
+    def watermark(self):
+        """저장된 마지막 created_at 문자열 (없으면 None)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT created_at FROM maintable2 ORDER BY created_ms DESC, id DESC LIMIT 1"
+            ).fetchone()
+        return row[0] if row else None
+
+    def chart_frame(self, since, hours, target_points):
+        """차트 해상도를 채우는 가장 굵은 집계 프레임 (원본이 더 적합하면 None)"""
+        level = sensor_rollup.choose_level(hours, target_points)
+        if level is None:
+            return None
+        with self.lock:
+            return sensor_rollup.read_rollup(self.conn, level, to_epoch_ms(since))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def prune(self, before):
+        """before 이전 행 삭제 (보관 기간 관리)"""
+        cutoff = to_epoch_ms(before)
+        with self.lock:
+            self.conn.execute("DELETE FROM maintable2 WHERE created_ms < ?", (cutoff,))
+            for level in sensor_rollup.ROLLUP_LEVELS:
+                self.conn.execute(
+                    f"DELETE FROM {sensor_rollup.rollup_table(level)} WHERE bucket_ms < ?", (cutoff,)
+                )
+            self.conn.execute(
+                "UPDATE store_meta SET value = MAX(value, ?) WHERE key = 'covered_from_ms'",
+                (cutoff,)
+            )
+            self.conn.commit()
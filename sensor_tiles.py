@@ -0,0 +1,104 @@
+# 임의 구간 조회용 해상도 피라미드: 원본 -> 1분 -> 10분 -> 1시간 -> 1일 집계 중 구간에 맞는 단위 선택
+#
+# 구간이 한 달이든 1분이든 브라우저로 보내는 점이 MAX_POINTS 안쪽이 되도록 가장 가는 단위를 고릅니다.
+# 지난 날짜는 Parquet 보관소(sensor_archive)의 타일에서, 그 이후는 로컬 저장소(sensor_store)의
+# 집계 테이블에서 읽어 이어 붙입니다. 어느 쪽이든 Supabase는 조회하지 않습니다.
+import threading
+from collections import OrderedDict
+from datetime import datetime, time, timedelta, timezone
+
+import pandas as pd
+
+import perf_metrics
+from sensor_rollup import ROLLUP_LEVELS
+
+# 한 번에 돌려주는 최대 구간(점) 개수 - 차트에서 LTTB로 한 번 더 줄임
+MAX_POINTS = 2000
+
+LEVEL_LABELS = {
+    'raw': '원본',
+    '1m': '1분 평균',
+    '10m': '10분 평균',
+    '1h': '1시간 평균',
+    '1d': '1일 평균',
+}
+
+TIME_DTYPE = 'datetime64[us, UTC]'
+
+_CACHE_SIZE = 16
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def choose_level(start, end, max_points=MAX_POINTS):
+    """구간 개수가 max_points 이하가 되는 가장 가는 집계 단위 (원본 여부는 읽어 본 뒤 결정)"""
+    span = (end - start).total_seconds()
+    for level, seconds in ROLLUP_LEVELS.items():
+        if span / seconds <= max_points:
+            return level
+    return list(ROLLUP_LEVELS)[-1]
+
+
+def _split_point(archive):
+    """보관소가 책임지는 구간의 끝 (마지막 보관 날짜 다음 날 0시, 보관소가 없으면 None)"""
+    days = archive.days() if archive is not None else []
+    if not days:
+        return None
+    return pd.Timestamp(datetime.combine(days[-1] + timedelta(days=1), time(), tzinfo=timezone.utc))
+
+
+def _read(level, start, end, store, archive):
+    split = _split_point(archive)
+    frames = []
+    if split is not None and start < split:
+        upto = min(end, split)
+        frames.append(archive.read(start, upto) if level == 'raw' else archive.read_tiles(level, start, upto))
+    if store is not None and (split is None or end > split):
+        since = max(start, split) if split is not None else start
+        frames.append(store.read_range(since, end) if level == 'raw' else store.read_tiles(level, since, end))
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+    # 보관소(us)와 SQLite(ms)의 시간 단위가 달라서 그대로 이어 붙이면 object 컬럼이 됨
+    for frame in frames:
+        frame['created_at'] = frame['created_at'].astype(TIME_DTYPE)
+    return pd.concat(frames, ignore_index=True)
+
+
+@perf_metrics.timed('tiles.read')
+def read_tiles(start, end, store, archive, version=None, max_points=MAX_POINTS):
+    """start~end 구간을 알맞은 해상도로 -> (단위, created_at 오름차순 DataFrame)
+
+    version은 로컬 저장소 데이터가 바뀌었는지 구분하는 값(SensorWindowCache.version)으로,
+    같은 구간/버전이면 이전 결과를 그대로 돌려줍니다. 반환된 프레임은 수정하지 말아야 합니다.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    start = start.tz_localize('UTC') if start.tzinfo is None else start.tz_convert('UTC')
+    end = end.tz_localize('UTC') if end.tzinfo is None else end.tz_convert('UTC')
+    # 캐시는 프로세스 전체가 함께 쓰므로 어느 저장소/보관소(장치)의 구간인지도 키에 넣음
+    key = (
+        store.path if store is not None else None,
+        archive.path if archive is not None else None,
+        start, end, version, max_points,
+        len(archive.days()) if archive is not None else 0,
+    )
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    level = choose_level(start, end, max_points)
+    df = _read(level, start, end, store, archive)
+    if level == list(ROLLUP_LEVELS)[0] and (df.empty or df['count'].sum() <= max_points):
+        # 1분 집계의 행 수 합계가 충분히 작으면 원본을 그대로 보여줌
+        level, df = 'raw', _read('raw', start, end, store, archive)
+
+    result = (level, df)
+    with _cache_lock:
+        _cache[key] = result
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return result
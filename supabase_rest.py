@@ -0,0 +1,111 @@
+# Supabase REST(PostgREST) 클라이언트 - 공용 HTTP 세션, 키셋 페이지, CSV 컬럼 변환
+import streamlit as st
+
+import http_transport
+import perf_metrics
+from sensor_decode import decode_sensor_csv, CSV_ACCEPT
+
+
+class SimpleSupabaseClient:
+    def __init__(self, url, key, on_insert=None):
+        self.url = url.rstrip('/')
+        self.key = key
+        # 저장된 행마다 on_insert(table, row) 호출 (댓글 캐시 write-through 등)
+        self.on_insert = on_insert
+        self.headers = {
+            'apikey': key,
+            'Authorization': f'Bearer {key}',
+            'Content-Type': 'application/json',
+            'Prefer': 'return=representation'
+        }
+    
+    @perf_metrics.timed('supabase.select')
+    def select(self, table, columns="*", filters=None, order=None, limit=None):
+        endpoint = f"{self.url}/rest/v1/{table}"
+        params = {'select': columns}
+        
+        if filters:
+            for key, value in filters.items():
+                params[key] = value
+        
+        if order:
+            params['order'] = order
+            
+        if limit:
+            params['limit'] = limit
+        
+        try:
+            response = http_transport.get(endpoint, headers=self.headers, params=params)
+        except http_transport.RequestException as e:
+            st.error(f"데이터 조회 실패: {e}")
+            return []
+        
+        if response.status_code == 200:
+            with perf_metrics.span('decode.json'):
+                return response.json()
+        else:
+            st.error(f"데이터 조회 실패: {response.status_code}")
+            return []
+    
+    def select_pages(self, table, columns="*", filters=None, cursor_columns=('created_at', 'id'),
+                     descending=False, page_size=1000, after=None, as_frame=False):
+        """(created_at, id) 키셋 커서로 페이지 단위 조회 (OFFSET 없이 페이지가 도착하는 대로 yield)
+
+        as_frame=True이면 CSV로 받아 각 페이지를 DataFrame으로 바로 변환합니다.
+        """
+        endpoint = f"{self.url}/rest/v1/{table}"
+        headers = {**self.headers, 'Accept': CSV_ACCEPT} if as_frame else self.headers
+        time_col, id_col = cursor_columns
+        direction = 'desc' if descending else 'asc'
+        op = 'lt' if descending else 'gt'
+        
+        params = {'select': columns}
+        if filters:
+            for key, value in filters.items():
+                params[key] = value
+        params['order'] = f'{time_col}.{direction},{id_col}.{direction}'
+        params['limit'] = page_size
+        
+        cursor = after  # (created_at, id) - 이 행 다음부터 조회
+        while True:
+            if cursor is not None:
+                last_time, last_id = cursor
+                params['or'] = (
+                    f'({time_col}.{op}."{last_time}",'
+                    f'and({time_col}.eq."{last_time}",{id_col}.{op}.{last_id}))'
+                )
+            
+            response = http_transport.get(endpoint, headers=headers, params=params)
+            if response.status_code != 200:
+                raise RuntimeError(f"데이터 조회 실패: {response.status_code}")
+            
+            if as_frame:
+                page = decode_sensor_csv(response.content)
+                if len(page):
+                    yield page
+                    cursor = (page[time_col].iloc[-1].isoformat(), int(page[id_col].iloc[-1]))
+            else:
+                with perf_metrics.span('decode.json'):
+                    page = response.json()
+                if page:
+                    yield page
+                    cursor = (page[-1][time_col], page[-1][id_col])
+            if len(page) < page_size:
+                break
+    
+    @perf_metrics.timed('supabase.insert')
+    def insert(self, table, data):
+        endpoint = f"{self.url}/rest/v1/{table}"
+        try:
+            response = http_transport.post(endpoint, headers=self.headers, json=data)
+        except http_transport.RequestException as e:
+            return False, str(e)
+        
+        if response.status_code in [200, 201]:
+            rows = response.json()
+            if self.on_insert is not None:
+                for row in rows:
+                    self.on_insert(table, row)
+            return True, rows
+        else:
+            return False, response.text
@@ -0,0 +1,23 @@
+# 저장소 루트의 모듈(sensor_store, comment_cache 등)과 로컬 PostgREST 대역을 테스트에서 바로 import
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+
+@pytest.fixture
+def fake_supabase():
+    """빈 maintable2를 가진 로컬 PostgREST 대역 (합성 댓글은 있음) -> base URL"""
+    import fake_postgrest
+
+    server = fake_postgrest.serve(rows=0, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
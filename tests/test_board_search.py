@@ -0,0 +1,72 @@
+# board_search n-gram 역색인 검색 (한 글자/조사 붙은 단어/게시판 필터/순위/증분 갱신)
+import board_search
+
+
+def post(i, title, content='', replies=()):
+    return {'id': i, 'title': title, 'content': content, 'replies': list(replies)}
+
+
+def ids(posts):
+    return [p['id'] for p in posts]
+
+
+def make_index():
+    return board_search.build_index({
+        'free': [
+            post(1, '센서가 고장났어요', '온도 값이 이상합니다'),
+            post(2, '습도 질문', '습도 센서 교체 방법'),
+        ],
+        'notice': [
+            post(3, '서버 점검 안내', '내일 새벽 점검'),
+        ],
+    })
+
+
+def test_single_character_matches_inside_words():
+    index = make_index()
+    # "서"는 "센서"의 두 번째 글자, "서버"의 첫 글자
+    assert sorted(ids(index.search('서'))) == [1, 2, 3]
+    assert ids(index.search('밥')) == []
+
+
+def test_word_with_particle_is_found_by_stem():
+    index = make_index()
+    assert sorted(ids(index.search('센서'))) == [1, 2]
+    assert ids(index.search('센서가')) == [1]
+
+
+def test_all_words_must_match():
+    index = make_index()
+    assert ids(index.search('습도 교체')) == [2]
+    assert ids(index.search('습도 점검')) == []
+
+
+def test_ngrams_present_but_not_adjacent_are_filtered():
+    index = board_search.build_index({'free': [post(1, '가나 나다')]})
+    # 2-gram "가나", "나다"는 모두 있지만 "가나다"라는 문자열은 없음
+    assert ids(index.search('가나다')) == []
+    assert ids(index.search('가나')) == [1]
+
+
+def test_board_filter_and_title_ranks_first():
+    index = make_index()
+    assert ids(index.search('서', board='notice')) == [3]
+    # 제목에서 찾은 글(1)이 본문에서 찾은 글(2)보다 위
+    assert ids(index.search('센서')) == [1, 2]
+
+
+def test_replies_are_indexed_incrementally():
+    index = make_index()
+    assert ids(index.search('펌웨어')) == []
+    index.add_reply(2, {'content': '펌웨어 업데이트 해보세요'})
+    assert ids(index.search('펌웨어')) == [2]
+
+    index.add_post('free', post(4, '펌웨어 배포', replies=[{'content': '감사합니다'}]))
+    assert ids(index.search('펌웨어')) == [4, 2]
+    assert ids(index.search('감사')) == [4]
+
+
+def test_normalizes_width_and_case():
+    index = board_search.build_index({'free': [post(1, 'ESP8266 설정')]})
+    assert ids(index.search('esp')) == [1]
+    assert ids(index.search('ＥＳＰ８２６６')) == [1]
@@ -0,0 +1,146 @@
+# comment_cache 범위 캐시, 조회 중 들어온 행, Realtime 재연결/만료
+import pytest
+
+from comment_cache import CommentCache
+from comment_feed import cursor
+from realtime_listener import ChangeListener
+
+
+def comment(i):
+    return {'id': i, 'created_at': f'2024-01-01T00:{i:02d}:00+00:00', 'content': f'댓글 {i}'}
+
+
+def reply(i, comment_id):
+    return {'id': i, 'comment_id': comment_id, 'created_at': f'2024-01-01T01:{i:02d}:00+00:00', 'content': f'답글 {i}'}
+
+
+class FakeTable:
+    """최신순 댓글 목록 위의 comment_feed.page_query 흉내 (호출 횟수 기록)"""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda r: (r['created_at'], r['id']), reverse=True)
+        self.calls = 0
+        self.during = None   # 조회 도중 실행할 함수 (Realtime 이벤트/재연결 흉내)
+
+    def __call__(self, limit, before=None, until=None):
+        self.calls += 1
+        rows = self.rows
+        if before is not None:
+            rows = [r for r in rows if cursor(r) < before]
+        if until is not None:
+            rows = [r for r in rows if cursor(r) >= until]
+        else:
+            rows = rows[:limit]
+        if self.during is not None:
+            during, self.during = self.during, None
+            during()
+        return rows
+
+
+@pytest.fixture
+def listener():
+    listener = ChangeListener('http://127.0.0.1', 'key')
+    listener.connected = True
+    listener.connects = 1
+    return listener
+
+
+def event(listener, table, row):
+    listener._handle(table, {'data': {'record': row}})
+
+
+def test_pages_are_served_from_cache(listener):
+    table = FakeTable([comment(i) for i in range(1, 11)])
+    cache = CommentCache(listener)
+
+    first = cache.comments(table, limit=4)
+    assert [c['id'] for c in first] == [10, 9, 8, 7]
+    second = cache.comments(table, limit=4, before=cursor(first[-1]))
+    assert [c['id'] for c in second] == [6, 5, 4, 3]
+    assert table.calls == 2
+
+    assert [c['id'] for c in cache.comments(table, limit=4, until=cursor(second[-1]))] == [10, 9, 8, 7, 6, 5, 4, 3]
+    assert cache.comments(table, limit=4) == first
+    assert table.calls == 2
+
+
+def test_insert_during_cold_fetch_is_kept(listener):
+    table = FakeTable([comment(i) for i in range(1, 6)])
+    cache = CommentCache(listener)
+    # 조회가 DB를 읽은 뒤, 결과를 담기 전에 새 댓글 이벤트가 옴
+    table.during = lambda: event(listener, 'user_comments', comment(6))
+
+    assert [c['id'] for c in cache.comments(table, limit=3)] == [5, 4, 3]
+    assert [c['id'] for c in cache.comments(table, limit=4)] == [6, 5, 4, 3]
+    assert table.calls == 1
+
+
+def test_reply_during_thread_fetch_is_kept(listener):
+    cache = CommentCache(listener)
+
+    def fetch(ids):
+        event(listener, 'comment_replies', reply(2, 1))
+        return {1: [reply(1, 1)]}
+
+    assert cache.replies(fetch, [1, 2]) == {1: [reply(1, 1), reply(2, 1)], 2: []}
+    calls = []
+    assert cache.replies(lambda ids: calls.append(ids) or {}, [1, 2]) == {1: [reply(1, 1), reply(2, 1)], 2: []}
+    assert calls == []
+
+
+def test_reconnect_during_fetch_discards_result(listener):
+    table = FakeTable([comment(i) for i in range(1, 6)])
+    cache = CommentCache(listener)
+
+    def reconnect():
+        listener.connected = False
+        listener.connected, listener.connects = True, listener.connects + 1
+    table.during = reconnect
+
+    # 호출한 세션은 받은 결과를 그대로 쓰지만 캐시에는 담지 않음
+    assert [c['id'] for c in cache.comments(table, limit=3)] == [5, 4, 3]
+    cache.comments(table, limit=3)
+    assert table.calls == 2
+
+
+def test_failed_fetch_is_not_cached(listener):
+    cache = CommentCache(listener)
+
+    def broken(ids):
+        raise RuntimeError('조회 실패')
+
+    with pytest.raises(RuntimeError):
+        cache.replies(broken, [1])
+    assert cache.replies(lambda ids: {1: [reply(1, 1)]}, [1]) == {1: [reply(1, 1)]}
+    assert cache.fetching == 0 and cache.journal == []
+
+
+def test_reconnect_between_reruns_expires_cache(listener):
+    table = FakeTable([comment(i) for i in range(1, 6)])
+    cache = CommentCache(listener, max_age=0)
+    cache.comments(table, limit=3)
+    cache.comments(table, limit=3)
+    assert table.calls == 1
+
+    # 두 rerun 사이에 끊겼다가 다시 연결됨 -> connected만 보면 놓침
+    listener.connects += 1
+    cache.comments(table, limit=3)
+    assert table.calls == 2
+
+
+def test_trusted_cache_expires_after_max_trusted_age(listener):
+    table = FakeTable([comment(i) for i in range(1, 6)])
+    cache = CommentCache(listener, max_trusted_age=0)
+    cache.comments(table, limit=3)
+    cache.comments(table, limit=3)
+    assert cache.trusted
+    assert table.calls == 2
+
+
+def test_disconnected_cache_expires_after_max_age():
+    table = FakeTable([comment(i) for i in range(1, 6)])
+    cache = CommentCache(None, max_age=0)
+    cache.comments(table, limit=3)
+    cache.comments(table, limit=3)
+    assert not cache.trusted
+    assert table.calls == 2
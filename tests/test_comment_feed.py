@@ -0,0 +1,58 @@
+# comment_feed 키셋 페이지 조회 (펼친 댓글/답글이 max-rows에서 잘리지 않고 이어 받는지)
+import pytest
+from supabase import create_client
+
+import comment_feed
+
+
+@pytest.fixture
+def client(fake_supabase):
+    return create_client(fake_supabase, 'test-key')
+
+
+def all_replies(client, comment_ids):
+    rows = client.table('comment_replies').select('*').in_('comment_id', comment_ids).order('created_at').order('id').execute().data
+    replies = {}
+    for reply in rows:
+        replies.setdefault(reply['comment_id'], []).append(reply)
+    return replies
+
+
+def test_select_replies_pages_past_max_rows(client):
+    comment_ids = [c['id'] for c in client.table('user_comments').select('id').limit(30).execute().data]
+    # 같은 시각의 답글이 페이지 경계에 걸려도 id로 이어짐
+    for i in range(6):
+        client.table('comment_replies').insert({
+            'comment_id': comment_ids[0], 'user_id': 'u', 'username': 'u',
+            'content': f'같은 시각 {i}', 'created_at': '2024-01-01T00:00:00+00:00'
+        }).execute()
+    expected = all_replies(client, comment_ids)
+    total = sum(len(rows) for rows in expected.values())
+    assert total > 4
+
+    replies = comment_feed.select_replies(lambda: client.table('comment_replies').select('*'), comment_ids, page_size=4)
+    assert replies == expected
+
+
+def test_select_replies_single_page(client):
+    comment_ids = [c['id'] for c in client.table('user_comments').select('id').limit(3).execute().data]
+    replies = comment_feed.select_replies(lambda: client.table('comment_replies').select('*'), comment_ids)
+    assert replies == all_replies(client, comment_ids)
+
+
+def comments_query(client):
+    return lambda: client.table('user_comments').select('*')
+
+
+def test_select_page_until_pages_whole_range(client):
+    newest = client.table('user_comments').select('*').order('created_at', desc=True).order('id', desc=True).execute().data
+    until = comment_feed.cursor(newest[11])
+
+    rows = comment_feed.select_page(comments_query(client), until=until, page_size=5)
+    assert rows == newest[:12]
+
+
+def test_select_page_before_is_one_page(client):
+    newest = client.table('user_comments').select('*').order('created_at', desc=True).order('id', desc=True).execute().data
+    rows = comment_feed.select_page(comments_query(client), limit=4, before=comment_feed.cursor(newest[2]))
+    assert rows == newest[3:7]
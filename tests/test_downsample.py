@@ -0,0 +1,67 @@
+# downsample LTTB / 구간별 최소·최대
+import numpy as np
+import pandas as pd
+
+from downsample import data_version, downsample_frame, lttb_indices, minmax_indices, target_points
+
+
+def test_lttb_keeps_endpoints_and_size():
+    x = np.arange(10_000, dtype=np.float64)
+    y = np.sin(x / 100)
+    idx = lttb_indices(x, y, 500)
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert np.all(np.diff(idx) > 0)
+
+
+def test_lttb_keeps_isolated_spike():
+    x = np.arange(5_000, dtype=np.float64)
+    y = np.zeros_like(x)
+    y[2_345] = 100.0
+    idx = lttb_indices(x, y, 100)
+    assert 2_345 in idx
+
+
+def test_lttb_short_series_unchanged():
+    assert lttb_indices(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_lttb_ignores_nan():
+    x = np.arange(1_000, dtype=np.float64)
+    y = np.ones_like(x)
+    y[100:200] = np.nan
+    y[500] = 9.0
+    idx = lttb_indices(x, y, 50)
+    assert 500 in idx
+
+
+def test_minmax_keeps_extremes_per_bucket():
+    y = np.random.default_rng(0).normal(size=10_000)
+    y[1234], y[8765] = 50.0, -50.0
+    idx = minmax_indices(y, 200)
+    assert len(idx) <= 202
+    assert 1234 in idx and 8765 in idx
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+
+
+def test_downsample_frame_descending_input():
+    created = pd.date_range('2024-01-01', periods=3_000, freq='10s', tz='UTC')
+    df = pd.DataFrame({'created_at': created, 'temperature': np.arange(3_000.0)}).iloc[::-1]
+    picked = downsample_frame(df, ['temperature'], 100)['temperature']
+    assert len(picked) == 100
+    # 입력과 같은 내림차순 유지
+    assert picked['created_at'].is_monotonic_decreasing
+
+
+def test_target_points_floor():
+    assert target_points(0) == 3
+    assert target_points(600) == 600
+
+
+def test_data_version_is_stable_with_null_last_row():
+    created = pd.date_range('2024-01-01', periods=3, freq='1min', tz='UTC')
+    df = pd.DataFrame({'created_at': created, 'temperature': [1.0, 2.0, np.nan], 'light': [1.0, np.nan, np.nan]})
+    assert data_version(df) == data_version(df.copy())
+    changed = df.copy()
+    changed.loc[2, 'temperature'] = 3.0
+    assert data_version(df) != data_version(changed)
@@ -0,0 +1,130 @@
+# ingest_gateway 입력 검증, 거절된 행 분리, 재전송 중복 방지
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+import http_transport
+import ingest_gateway
+from ingest_gateway import IngestGateway, IngestQueue, parse_readings
+
+
+def reading(**overrides):
+    return {'light': 42, 'temperature': 23.1, 'humidity': 55.0, **overrides}
+
+
+def body(obj):
+    return json.dumps(obj).encode('utf-8')
+
+
+def test_parse_readings_fills_defaults():
+    rows = parse_readings(body([reading(), reading(device_id='esp8266-02', created_at='2024-01-01T09:00:00')]))
+    assert rows[0]['device_id'] == 'esp8266'
+    assert rows[1]['device_id'] == 'esp8266-02'
+    assert rows[1]['measured_at'] == '2024-01-01T09:00:00+00:00'
+    # created_at은 DB가 insert할 때 정함
+    assert all('created_at' not in row for row in rows)
+    assert len({row['ingest_id'] for row in rows}) == 2
+
+
+@pytest.mark.parametrize('item', [
+    reading(temperature='23.1'),
+    reading(light=True),
+    reading(humidity=None),
+    {'light': 1, 'temperature': 2},
+    reading(created_at='not-a-date'),
+    reading(created_at=1700000000),
+    reading(device_id=7),
+])
+def test_parse_readings_rejects_bad_values(item):
+    with pytest.raises(ValueError):
+        parse_readings(body([reading(), item]))
+
+
+def test_parse_readings_rejects_non_finite():
+    with pytest.raises(ValueError):
+        parse_readings(b'{"light": 1, "temperature": NaN, "humidity": 2}')
+
+
+class FakeResponse:
+    def __init__(self, status_code, text=''):
+        self.status_code = status_code
+        self.text = text
+
+
+def flush_one(gateway):
+    return gateway.flush(gateway.queue.take_batch())
+
+
+def test_rejected_rows_are_dropped_without_blocking(monkeypatch):
+    posted = []
+
+    def post(url, params=None, headers=None, json=None):
+        posted.append(len(json))
+        if any(row['light'] == -1 for row in json):
+            return FakeResponse(400, '{"code":"22P02","message":"invalid input"}')
+        return FakeResponse(201)
+
+    monkeypatch.setattr(http_transport, 'post', post)
+    gateway = IngestGateway('http://db', 'key', queue=IngestQueue(batch_size=8, interval=0))
+    rows = parse_readings(body([reading(light=i if i != 5 else -1) for i in range(8)]))
+    gateway.accept(rows)
+    assert flush_one(gateway)
+
+    assert gateway.committed == 7
+    assert gateway.dropped == 1
+    assert len(gateway.queue) == 0
+    assert posted[0] == 8 and len(posted) < 8 * 2
+
+
+def test_transient_errors_put_back_unfinished_rows(monkeypatch):
+    responses = iter([FakeResponse(400, 'bad'), FakeResponse(201), FakeResponse(503, 'busy')])
+    monkeypatch.setattr(http_transport, 'post', lambda url, **kwargs: next(responses))
+    gateway = IngestGateway('http://db', 'key', queue=IngestQueue(batch_size=4, interval=0))
+    gateway.accept(parse_readings(body([reading(light=i) for i in range(4)])))
+
+    assert not flush_one(gateway)
+    # 앞 절반은 들어갔고, 뒤 절반만 순서대로 큐 앞에 돌아옴
+    assert gateway.committed == 2
+    assert [row['light'] for _, row in gateway.queue.items] == [2, 3]
+
+
+def test_missing_unique_index_is_not_a_row_error(monkeypatch):
+    monkeypatch.setattr(
+        http_transport, 'post',
+        lambda url, **kwargs: FakeResponse(400, '{"code":"42P10","message":"no unique or exclusion constraint"}')
+    )
+    gateway = IngestGateway('http://db', 'key', queue=IngestQueue(batch_size=2, interval=0))
+    gateway.accept(parse_readings(body([reading(), reading()])))
+    assert not flush_one(gateway)
+    assert gateway.dropped == 0
+    assert len(gateway.queue) == 2
+
+
+def test_resent_batch_does_not_duplicate_rows(fake_supabase):
+    gateway = IngestGateway(fake_supabase, 'key', queue=IngestQueue(batch_size=3, interval=0))
+    rows = parse_readings(body([reading(light=i) for i in range(3)]))
+    gateway._insert(rows)
+    # 첫 요청이 커밋됐지만 응답을 못 받은 경우처럼 같은 행을 다시 보냄
+    gateway._insert(rows)
+
+    stored = requests.get(f'{fake_supabase}/rest/v1/maintable2', params={'select': 'id,light,ingest_id'}).json()
+    assert sorted(row['light'] for row in stored) == [0, 1, 2]
+
+
+def test_gateway_end_to_end(fake_supabase):
+    server, gateway = ingest_gateway.serve(fake_supabase, 'key', host='127.0.0.1', port=0, batch_size=10)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{server.server_port}'
+    try:
+        assert requests.post(f'{base}/readings', json=[reading(light=i) for i in range(5)]).status_code == 202
+        assert requests.post(f'{base}/readings', json=reading(temperature='hot')).status_code == 400
+        deadline = time.time() + 5
+        while gateway.committed < 5 and time.time() < deadline:
+            time.sleep(0.02)
+        assert requests.get(f'{base}/health').json() == {'queue': 0, 'committed': 5, 'rejected': 0, 'dropped': 0}
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,31 @@
+# realtime_listener 변경 토큰과 세션 rerun 판단 (계속 들어오는 센서 값은 주기를 두고 rerun)
+from realtime_listener import ChangeListener, _rerun_due
+
+TABLES = ('maintable2', 'user_comments', 'comment_replies')
+INTERVALS = {'maintable2': 10}
+
+
+def test_token_changes_on_event_and_resubscribe():
+    listener = ChangeListener('http://127.0.0.1', 'key', TABLES)
+    assert listener.token() is None
+    listener.connected, listener.connects = True, 1
+    before = listener.token()
+    listener._handle('maintable2', {})
+    after_event = listener.token()
+    assert after_event != before
+    listener.connects += 1
+    assert listener.token() != after_event
+    assert listener.token('user_comments') == (2, 0)
+
+
+def test_sensor_changes_rerun_at_most_every_interval():
+    seen = (1, 5, 0, 0)
+    current = (1, 9, 0, 0)
+    assert not _rerun_due(seen, current, TABLES, INTERVALS, rerun_at=100.0, now=102.0)
+    assert _rerun_due(seen, current, TABLES, INTERVALS, rerun_at=100.0, now=110.0)
+
+
+def test_comment_changes_and_resubscribe_rerun_immediately():
+    assert _rerun_due((1, 5, 0, 0), (1, 6, 1, 0), TABLES, INTERVALS, rerun_at=100.0, now=101.0)
+    assert _rerun_due((1, 5, 0, 0), (2, 5, 0, 0), TABLES, INTERVALS, rerun_at=100.0, now=101.0)
+    assert not _rerun_due((1, 5, 0, 0), (1, 5, 0, 0), TABLES, INTERVALS, rerun_at=0.0, now=101.0)
@@ -0,0 +1,58 @@
+# sensor_archive 날짜별 내보내기 (늦게 커밋된 행이 있는 최근 날짜는 다시 내보냄)
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+
+import sensor_archive
+from supabase_rest import SimpleSupabaseClient
+
+pytestmark = pytest.mark.skipif(not sensor_archive.available(), reason='pyarrow 필요')
+
+
+def insert_on(client, day, hour, temperature=20.0):
+    created_at = datetime.combine(day, time(hour), tzinfo=timezone.utc).isoformat()
+    ok, rows = client.insert('maintable2', {
+        'created_at': created_at, 'light': 1, 'temperature': temperature, 'humidity': 50.0
+    })
+    assert ok
+    return rows[0]
+
+
+@pytest.fixture
+def setup(fake_supabase, tmp_path):
+    return SimpleSupabaseClient(fake_supabase, 'key'), sensor_archive.SensorArchive(str(tmp_path / 'archive'))
+
+
+def test_exports_each_closed_day_once(setup):
+    client, archive = setup
+    day = sensor_archive.closed_until() - timedelta(days=1)
+    insert_on(client, day, 3)
+
+    assert sensor_archive.export_closed_days(client, archive, days=3) == [
+        (day - timedelta(days=1), 0), (day, 1), (day + timedelta(days=1), 0)
+    ]
+    assert sensor_archive.export_closed_days(client, archive, days=3) == []
+
+
+def test_late_row_rewrites_recent_day(setup):
+    client, archive = setup
+    day = sensor_archive.closed_until()
+    insert_on(client, day, 3)
+    sensor_archive.export_closed_days(client, archive, days=1)
+
+    # 보관한 뒤 그 날짜의 created_at으로 커밋된 행
+    late = insert_on(client, day, 1, temperature=30.0)
+    assert sensor_archive.export_closed_days(client, archive, days=1) == [(day, 2)]
+    frame = archive.read_day(day)
+    assert frame['id'].tolist() == [late['id'], late['id'] - 1]
+    assert archive.read_tiles('1d', datetime.combine(day, time(), tzinfo=timezone.utc))['temperature_max'].tolist() == [30.0]
+
+
+def test_days_past_recheck_window_are_left_alone(setup, monkeypatch):
+    client, archive = setup
+    monkeypatch.setattr(sensor_archive, 'RECHECK_DAYS', 1)
+    day = sensor_archive.closed_until() - timedelta(days=1)
+    sensor_archive.export_closed_days(client, archive, days=2)
+
+    insert_on(client, day, 3)
+    assert sensor_archive.export_closed_days(client, archive, days=2) == []
@@ -0,0 +1,142 @@
+# SensorWindowCache 워터마크 꼬리 조회 (늦게 커밋된 행, 같은 시각 중복 제거)
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+import pytest
+
+import sensor_cache
+from sensor_cache import SensorWindowCache
+
+
+class FakeTable:
+    """created_at >= since 조회만 흉내 내는 maintable2 (커밋 순서대로 append)"""
+
+    def __init__(self):
+        self.rows = []
+        self.queries = []
+
+    def insert(self, seconds_ago, **values):
+        created_at = datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)
+        row = {'id': len(self.rows) + 1, 'created_at': created_at.isoformat(),
+               'light': 1.0, 'temperature': 20.0, 'humidity': 50.0, 'device_id': 'esp8266', **values}
+        self.rows.append(row)
+        return row
+
+    def fetch_since(self, since_iso):
+        self.queries.append(since_iso)
+        since = pd.Timestamp(since_iso)
+        since = since.tz_localize('UTC') if since.tzinfo is None else since
+        rows = [r for r in self.rows if pd.Timestamp(r['created_at']) >= since]
+        return sorted(rows, key=lambda r: (r['created_at'], r['id']))
+
+
+def ids(df):
+    return df['id'].tolist()
+
+
+def test_tail_fetches_only_after_watermark():
+    table = FakeTable()
+    table.insert(120)
+    table.insert(60)
+    cache = SensorWindowCache(table.fetch_since)
+    assert ids(cache.get(1)) == [1, 2]
+
+    table.insert(0)
+    assert ids(cache.get(1)) == [1, 2, 3]
+    # 두 번째 조회는 워터마크(id 2) - TAIL_OVERLAP부터
+    assert pd.Timestamp(table.queries[-1]) == pd.Timestamp(table.rows[1]['created_at']) - sensor_cache.TAIL_OVERLAP
+
+
+def test_same_timestamp_rows_are_not_duplicated():
+    table = FakeTable()
+    first = table.insert(10)
+    cache = SensorWindowCache(table.fetch_since)
+    assert ids(cache.get(1)) == [1]
+
+    # 워터마크와 같은 시각에 나중에 커밋된 행은 받고, 이미 받은 행은 다시 붙이지 않음
+    table.insert(0, created_at=first['created_at'])
+    assert ids(cache.get(1)) == [1, 2]
+    assert ids(cache.get(1)) == [1, 2]
+
+
+def test_row_committed_late_with_older_created_at_is_kept():
+    table = FakeTable()
+    table.insert(20)
+    table.insert(5)
+    cache = SensorWindowCache(table.fetch_since)
+    assert ids(cache.get(1)) == [1, 2]
+    stats = cache.stats(1)
+
+    # 먼저 시작한 트랜잭션이 늦게 커밋됨: id 3의 created_at이 워터마크(id 2)보다 앞섬
+    table.insert(10, temperature=99.0)
+    df = cache.get(1)
+    assert ids(df) == [1, 3, 2]
+    assert df['created_at'].is_monotonic_increasing
+    assert cache.stats(1)['온도']['최고'] == 99.0
+    assert stats['온도']['최고'] == 20.0
+
+
+@pytest.mark.parametrize('late_by', [5, 25])
+def test_late_row_is_written_to_store(tmp_path, late_by):
+    from sensor_store import SensorStore
+
+    table = FakeTable()
+    table.insert(30)
+    table.insert(0)
+    store = SensorStore(str(tmp_path / 'store.sqlite3'))
+    cache = SensorWindowCache(table.fetch_since, store=store)
+    cache.get(1)
+
+    table.insert(late_by)
+    cache.get(1)
+    assert ids(store.read_frame(datetime.now(timezone.utc) - timedelta(hours=1))) == [1, 3, 2]
+    store.close()
+
+
+def test_store_is_pruned_to_the_cached_window(tmp_path):
+    from sensor_store import SensorStore
+
+    table = FakeTable()
+    old = table.insert(3 * 86400)
+    table.insert(0)
+    store = SensorStore(str(tmp_path / 'store.sqlite3'))
+    store.write([old])
+    cache = SensorWindowCache(table.fetch_since, max_hours=24, store=store)
+
+    # 보관소가 있든 없든 로컬 저장소는 수집 구간(max_hours) 밖 날짜를 지움
+    cache.get(1)
+    assert ids(store.read_frame(datetime.now(timezone.utc) - timedelta(days=7))) == [2]
+    store.close()
+
+
+def test_unchanged_token_skips_tail_until_max_age(monkeypatch):
+    table = FakeTable()
+    table.insert(10)
+    cache = SensorWindowCache(table.fetch_since, change_token=lambda: (1,))
+    cache.get(1)
+    table.insert(0)
+
+    # 토큰이 그대로면 조회하지 않음
+    assert ids(cache.get(1)) == [1]
+    assert len(table.queries) == 1
+
+    # 이벤트가 오지 않는 설정(publication 없음)이어도 TOKEN_MAX_AGE가 지나면 조회
+    monkeypatch.setattr(sensor_cache, 'TOKEN_MAX_AGE', 0)
+    assert ids(cache.get(1)) == [1, 2]
+
+
+def test_resubscribe_changes_token():
+    from realtime_listener import ChangeListener
+
+    listener = ChangeListener('http://127.0.0.1', 'key')
+    listener.connected, listener.connects = True, 1
+    table = FakeTable()
+    table.insert(10)
+    cache = SensorWindowCache(table.fetch_since, change_token=lambda: listener.token('maintable2'))
+    cache.get(1)
+    table.insert(0)
+    assert ids(cache.get(1)) == [1]
+
+    # 끊긴 사이에 들어온 행은 이벤트가 없음 -> 다시 구독하면 토큰이 바뀌어 바로 조회
+    listener.connects += 1
+    assert ids(cache.get(1)) == [1, 2]
@@ -0,0 +1,33 @@
+# sensor_charts 공유 시간축 (지표별 LTTB 합집합이 목표 점 개수를 넘지 않는지)
+import numpy as np
+import pandas as pd
+
+from sensor_charts import shared_axis
+
+
+def make_frame(n):
+    x = np.arange(n, dtype=np.float64)
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'created_at': pd.date_range('2024-01-01', periods=n, freq='10s', tz='UTC'),
+        # 지표마다 모양이 달라 LTTB가 서로 다른 행을 고름
+        'temperature': np.sin(x / 50),
+        'humidity': np.cos(x / 170),
+        'light': (x % 300) / 3,
+    })
+
+
+def test_union_stays_within_target_points():
+    df = make_frame(20_000)
+    df.loc[7_777, 'humidity'] = 100.0
+    x, rows = shared_axis(df, 600)
+    assert len(x) == len(rows) <= 600
+    assert np.all(np.diff(x) > 0)
+    assert 7_777 in rows.index      # 한 지표의 피크도 남음
+
+
+def test_short_frame_is_kept_whole():
+    df = make_frame(500)
+    x, rows = shared_axis(df, 600)
+    assert rows['id'].tolist() == df['id'].tolist()
+    assert len(x) == 500
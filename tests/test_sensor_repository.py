@@ -0,0 +1,103 @@
+# 장치별 저장소: 구간 타일 캐시 분리, 오래 안 읽힌 저장소 정리
+import sqlite3
+import time
+
+import pandas as pd
+import pytest
+
+import sensor_repository
+import sensor_tiles
+from sensor_store import SensorStore
+
+
+def write_readings(store, temperature):
+    created = pd.date_range('2024-01-01', periods=30, freq='1min', tz='UTC')
+    store.write(pd.DataFrame({
+        'id': range(1, 31), 'created_at': created,
+        'temperature': temperature, 'humidity': 40.0, 'light': 50.0,
+    }))
+
+
+def test_tile_cache_is_per_store(tmp_path):
+    first = SensorStore(str(tmp_path / 'a.sqlite3'))
+    second = SensorStore(str(tmp_path / 'b.sqlite3'))
+    write_readings(first, 20.0)
+    write_readings(second, 99.0)
+
+    start, end = pd.Timestamp('2024-01-01', tz='UTC'), pd.Timestamp('2024-01-01 00:30', tz='UTC')
+    _, a = sensor_tiles.read_tiles(start, end, first, None, version=3)
+    _, b = sensor_tiles.read_tiles(start, end, second, None, version=3)
+    assert a['temperature'].unique().tolist() == [20.0]
+    assert b['temperature'].unique().tolist() == [99.0]
+
+
+@pytest.fixture
+def repositories(monkeypatch, tmp_path, fake_supabase):
+    # 장치별 저장소/보관소 파일은 현재 디렉터리 기준
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sensor_repository, 'MAX_DEVICE_REPOSITORIES', 1)
+    monkeypatch.setattr(sensor_repository, '_repositories', {})
+    monkeypatch.setattr(sensor_repository, '_retired', [])
+    yield fake_supabase
+    for repo in list(sensor_repository._repositories.values()):
+        repo.stop()
+
+
+def test_evicted_repository_is_stopped_then_closed(repositories):
+    first = sensor_repository.get_repository(repositories, 'key', device_id='esp8266-01')
+    first.snapshot()
+    first.last_used -= 10       # 가장 오래 안 읽힌 저장소
+    sensor_repository._last_sweep = 0.0
+    second = sensor_repository.get_repository(repositories, 'key', device_id='esp8266-02')
+
+    assert first.poller.stopped and not second.poller.stopped
+    assert 'esp8266-01' not in {k[2] for k in sensor_repository._repositories}
+    # 이번 rerun에서 이미 받아 간 세션은 아직 읽을 수 있음
+    first.tiles(pd.Timestamp('2024-01-01', tz='UTC'), pd.Timestamp('2024-01-02', tz='UTC'))
+
+    first.poller.thread.join(5)
+    sensor_repository._evict_devices(time.monotonic() + sensor_repository.SWEEP_INTERVAL + 1)
+    assert all(repo is not first for _, repo in sensor_repository._retired)
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.cache.store.read_range(pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-02'))
+
+    # 다시 요청하면 새 저장소
+    again = sensor_repository.get_repository(repositories, 'key', device_id='esp8266-01')
+    assert again is not first and not again.poller.stopped
+
+
+def insert_at(client, created_at, temperature=20.0):
+    ok, rows = client.insert('maintable2', {
+        'created_at': created_at.isoformat(), 'light': 1, 'temperature': temperature, 'humidity': 50.0
+    })
+    assert ok
+    return rows[0]['id']
+
+
+def test_refresh_fetches_only_rows_past_watermark(monkeypatch, tmp_path, fake_supabase):
+    monkeypatch.chdir(tmp_path)
+    repo = sensor_repository.SensorRepository(
+        fake_supabase, 'key', store=SensorStore(str(tmp_path / 'store.sqlite3')), page_size=4
+    )
+    fetched = []
+    fetch_since = repo.cache.fetch_since
+    def counting(since_iso):
+        for page in fetch_since(since_iso):
+            fetched.append(len(page))
+            yield page
+    repo.cache.fetch_since = counting
+
+    now = pd.Timestamp.now(tz='UTC')
+    old = [insert_at(repo.client, now - pd.Timedelta(minutes=10) + pd.Timedelta(seconds=i)) for i in range(5)]
+    # 워터마크 시각에 같은 created_at 행 여러 개 (페이지 크기 4를 넘어감)
+    tied = [insert_at(repo.client, now - pd.Timedelta(seconds=5)) for _ in range(6)]
+    assert repo.cache.get(1)['id'].tolist() == old + tied
+
+    fetched.clear()
+    later = [insert_at(repo.client, now - pd.Timedelta(seconds=5)) for _ in range(2)]
+    later.append(insert_at(repo.client, now))
+    df = repo.cache.get(1)
+    assert df['id'].tolist() == old + tied + later
+    # 두 번째 갱신은 워터마크 - TAIL_OVERLAP 이후만 받음 (10분 전 행은 다시 받지 않음)
+    assert sum(fetched) == len(tied) + len(later)
+    repo.close()
@@ -0,0 +1,180 @@
+# sensor_rollup 집계 테이블 (로컬 SQLite 저장소로 확인)
+import numpy as np
+import pandas as pd
+import pytest
+
+import sensor_rollup
+from downsample import envelope_frame
+from sensor_store import SensorStore
+
+
+def make_rows(start, periods, freq='1min', first_id=1, **values):
+    created = pd.date_range(start, periods=periods, freq=freq, tz='UTC')
+    frame = pd.DataFrame({
+        'id': np.arange(first_id, first_id + periods),
+        'created_at': created,
+        'temperature': 20.0,
+        'humidity': 40.0,
+        'light': 50.0,
+    })
+    for col, value in values.items():
+        frame[col] = value
+    return frame
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SensorStore(str(tmp_path / 'store.sqlite3'))
+
+
+def ms(value):
+    return int(pd.Timestamp(value).timestamp() * 1000)
+
+
+def test_rollups_keep_min_max_mean_last(store):
+    rows = make_rows('2024-01-01 00:00', 20)
+    rows.loc[3, 'temperature'] = 35.0
+    rows.loc[7, 'temperature'] = 5.0
+    rows.loc[19, 'temperature'] = 21.0
+    store.write(rows)
+
+    df = sensor_rollup.read_rollup(store.conn, '10m', ms('2024-01-01'))
+    assert list(df['count']) == [10, 10]
+    first, second = df.iloc[0], df.iloc[1]
+    assert first['temperature_max'] == 35.0
+    assert first['temperature_min'] == 5.0
+    assert first['temperature'] == pytest.approx((8 * 20.0 + 35.0 + 5.0) / 10)
+    assert second['temperature_last'] == 21.0
+    assert df['created_at'].iloc[1] == pd.Timestamp('2024-01-01 00:10', tz='UTC')
+
+
+def test_write_updates_only_touched_buckets_and_upserts(store):
+    store.write(make_rows('2024-01-01 00:00', 60))
+    # 같은 id를 다른 값으로 다시 쓰면 해당 구간 집계가 다시 계산됨
+    store.write(make_rows('2024-01-01 00:30', 1, first_id=31, temperature=80.0))
+
+    hourly = sensor_rollup.read_rollup(store.conn, '1h', ms('2024-01-01'))
+    assert hourly['count'].tolist() == [60]
+    assert hourly['temperature_max'].iloc[0] == 80.0
+    assert hourly['temperature'].iloc[0] == pytest.approx((59 * 20.0 + 80.0) / 60)
+
+
+def test_daily_rollup_is_count_weighted_from_hourly(store):
+    store.write(make_rows('2024-01-01 00:00', 2, freq='1min', temperature=10.0))
+    store.write(make_rows('2024-01-01 05:00', 6, freq='1min', first_id=100, temperature=30.0))
+
+    daily = sensor_rollup.read_rollup(store.conn, '1d', ms('2024-01-01'))
+    assert daily['count'].tolist() == [8]
+    assert daily['temperature'].iloc[0] == pytest.approx((2 * 10.0 + 6 * 30.0) / 8)
+    assert daily['temperature_min'].iloc[0] == 10.0
+    assert daily['temperature_last'].iloc[0] == 30.0
+
+
+def test_read_rollup_range_and_null_metrics(store):
+    store.write(make_rows('2024-01-01 00:00', 180, light=None))
+    df = sensor_rollup.read_rollup(store.conn, '1h', ms('2024-01-01 01:00'), ms('2024-01-01 02:00'))
+    assert df['created_at'].tolist() == [pd.Timestamp('2024-01-01 01:00', tz='UTC')]
+    assert df['light'].isna().all()
+
+
+def test_rebuild_existing_rows_when_tables_are_created(tmp_path):
+    path = str(tmp_path / 'store.sqlite3')
+    SensorStore(path).write(make_rows('2024-01-01 00:00', 30))
+    store = SensorStore(path)
+    store.conn.execute(f"DROP TABLE {sensor_rollup.rollup_table('1m')}")
+    sensor_rollup.create_rollup_tables(store.conn)
+    assert len(sensor_rollup.read_rollup(store.conn, '1m', ms('2024-01-01'))) == 30
+
+
+@pytest.mark.parametrize('hours, target, expected', [
+    (1, 400, None),      # 1분 집계로도 60개 -> 원본
+    (24, 400, '1m'),     # 1440개
+    (72, 400, '10m'),    # 432개
+    (24 * 30, 400, '1h'),
+    (24 * 30, 1000, '10m'),
+    (24 * 365 * 2, 400, '1d'),
+])
+def test_choose_level(hours, target, expected):
+    assert sensor_rollup.choose_level(hours, target) == expected
+
+
+def test_aggregate_frame_matches_sqlite_rollup(store):
+    rows = make_rows('2024-01-01 00:00', 90, freq='20s')
+    rows['temperature'] = np.linspace(10, 30, len(rows))
+    store.write(rows)
+    expected = sensor_rollup.read_rollup(store.conn, '1m', ms('2024-01-01'))
+    actual = sensor_rollup.aggregate_frame(rows, '1m')
+    assert actual['count'].tolist() == expected['count'].tolist()
+    for col in ('temperature', 'temperature_min', 'temperature_max', 'temperature_last'):
+        np.testing.assert_allclose(actual[col], expected[col])
+
+
+def test_chart_frame_envelope_keeps_spike(store):
+    rows = make_rows('2024-01-01 00:00', 3 * 24 * 60)
+    rows.loc[1000, 'temperature'] = 90.0
+    store.write(rows)
+
+    df = store.chart_frame(pd.Timestamp('2024-01-01').to_pydatetime(), 72, 300)
+    assert len(df) == 432
+    assert df['temperature'].max() < 90.0          # 10분 평균에서는 피크가 묻힘
+    band = envelope_frame(df, 'temperature', 100)
+    assert len(band) <= 100
+    assert band['temperature_max'].max() == 90.0
+    assert band['temperature_min'].min() == 20.0
+    assert envelope_frame(rows, 'temperature') is None
+
+
+def test_null_values_are_skipped_in_last_and_weighted_mean(store):
+    rows = make_rows('2024-01-01 00:00', 4, temperature=10.0)
+    rows.loc[3, 'temperature'] = None       # 구간의 마지막 행만 온도 없음
+    store.write(rows)
+    store.write(make_rows('2024-01-01 05:00', 2, first_id=100, temperature=30.0))
+
+    hourly = sensor_rollup.read_rollup(store.conn, '1h', ms('2024-01-01'))
+    assert hourly['temperature_last'].tolist() == [10.0, 30.0]
+    daily = sensor_rollup.read_rollup(store.conn, '1d', ms('2024-01-01'))
+    assert daily['count'].tolist() == [6]
+    # 행 수(4, 2)가 아니라 온도가 있는 행 수(3, 2)로 가중
+    assert daily['temperature'].iloc[0] == pytest.approx((3 * 10.0 + 2 * 30.0) / 5)
+    assert daily['light'].iloc[0] == 50.0
+
+
+def test_daily_last_skips_hours_without_value(store):
+    store.write(make_rows('2024-01-01 00:00', 2, temperature=10.0))
+    store.write(make_rows('2024-01-01 05:00', 2, first_id=100, temperature=None))
+
+    daily = sensor_rollup.read_rollup(store.conn, '1d', ms('2024-01-01'))
+    assert daily['temperature_last'].iloc[0] == 10.0
+    assert daily['temperature'].iloc[0] == 10.0
+
+
+@pytest.mark.parametrize('level', ['1m', '1h', '1d'])
+def test_aggregate_frame_matches_sqlite_rollup_with_nulls(store, level):
+    rows = make_rows('2024-01-01 00:00', 90, freq='20s')
+    rows['temperature'] = np.linspace(10, 30, len(rows))
+    rows.loc[rows.index % 3 == 2, 'temperature'] = None
+    rows.loc[60:, 'humidity'] = None
+    store.write(rows)
+    expected = sensor_rollup.read_rollup(store.conn, level, ms('2024-01-01'))
+    actual = sensor_rollup.aggregate_frame(rows, level)
+    assert actual['count'].tolist() == expected['count'].tolist()
+    for m in ('temperature', 'humidity'):
+        for col in (m, f'{m}_min', f'{m}_max', f'{m}_last'):
+            np.testing.assert_allclose(actual[col], expected[col])
+
+
+def test_tables_without_metric_counts_are_rebuilt(tmp_path):
+    path = str(tmp_path / 'store.sqlite3')
+    store = SensorStore(path)
+    store.write(make_rows('2024-01-01 00:00', 30))
+    # 지표별 행 수 컬럼이 없던 예전 스키마
+    store.conn.execute(f"DROP TABLE {sensor_rollup.rollup_table('1h')}")
+    store.conn.execute(
+        f"CREATE TABLE {sensor_rollup.rollup_table('1h')} (bucket_ms INTEGER PRIMARY KEY, count INTEGER NOT NULL)"
+    )
+    store.close()
+
+    store = SensorStore(path)
+    hourly = sensor_rollup.read_rollup(store.conn, '1h', ms('2024-01-01'))
+    assert hourly['count'].tolist() == [30]
+    assert hourly['temperature'].tolist() == [20.0]
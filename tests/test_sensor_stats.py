@@ -0,0 +1,83 @@
+# RollingStats 슬라이딩 윈도우 통계 (pandas로 다시 계산한 값과 비교)
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sensor_cache import SensorWindowCache
+from sensor_stats import METRICS, RollingStats, empty_stats
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        'id': np.arange(n),
+        'created_at': pd.date_range('2024-01-01', periods=n, freq='1min', tz='UTC'),
+        'temperature': rng.normal(20, 5, n),
+        'humidity': rng.normal(50, 10, n),
+        'light': rng.integers(0, 100, n).astype(np.float64),
+    })
+    frame.loc[rng.choice(n, n // 10, replace=False), 'humidity'] = np.nan
+    return frame
+
+
+def expected(frame):
+    stats = {}
+    for name, col in METRICS.items():
+        values = frame[col].dropna()
+        stats[name] = {
+            "현재": values.iloc[-1] if len(values) else math.nan,
+            "평균": values.mean(),
+            "최고": values.max(),
+            "최저": values.min(),
+        }
+    return stats
+
+
+def assert_stats(actual, wanted):
+    for name in METRICS:
+        for key, value in wanted[name].items():
+            if math.isnan(value):
+                assert math.isnan(actual[name][key]), (name, key)
+            else:
+                assert actual[name][key] == pytest.approx(value), (name, key)
+
+
+def test_append_and_evict_match_pandas():
+    frame = make_frame(600)
+    rolling = RollingStats()
+    window = pd.Timedelta(minutes=90)
+    for start in range(0, 600, 50):
+        chunk = frame.iloc[start:start + 50]
+        rolling.append_frame(chunk)
+        cutoff = chunk['created_at'].iloc[-1] - window
+        rolling.evict_before(cutoff.value)
+        visible = frame.iloc[:start + 50]
+        assert_stats(rolling.snapshot(), expected(visible[visible['created_at'] >= cutoff]))
+
+
+def test_all_null_metric_and_empty_window_are_nan():
+    frame = make_frame(20)
+    frame['light'] = np.nan
+    rolling = RollingStats()
+    rolling.append_frame(frame)
+    stats = rolling.snapshot()
+    assert math.isnan(stats["조도"]["현재"]) and math.isnan(stats["조도"]["평균"])
+    # 화면의 포맷 문자열이 예외 없이 동작
+    assert f"{stats['조도']['현재']:.0f}" == 'nan'
+
+    rolling.evict_before(frame['created_at'].iloc[-1].value + 1)
+    assert len(rolling) == 0
+    assert_stats(rolling.snapshot(), expected(frame.iloc[:0]))
+
+
+def test_empty_stats_shape():
+    stats = empty_stats()
+    assert set(stats) == set(METRICS)
+    assert all(math.isnan(v) for metric in stats.values() for v in metric.values())
+
+
+def test_window_cache_stats_without_data():
+    cache = SensorWindowCache(lambda since: [])
+    assert f"{cache.stats(24)['온도']['현재']:.1f}" == 'nan'
@@ -0,0 +1,52 @@
+# SimpleSupabaseClient.select_pages 키셋 페이지 (max-rows 경계에서 같은 created_at 행이 잘리거나 겹치지 않는지)
+import pandas as pd
+import pytest
+
+from supabase_rest import SimpleSupabaseClient
+
+SELECT = 'id,created_at,temperature'
+
+
+@pytest.fixture
+def client(fake_supabase):
+    client = SimpleSupabaseClient(fake_supabase, 'key')
+    # 같은 시각 행 5개가 페이지(4행) 경계에 걸침
+    for i, second in enumerate([0, 1, 1, 1, 1, 1, 2, 3, 3]):
+        ok, _ = client.insert('maintable2', {
+            'created_at': f'2024-01-01T00:00:0{second}+00:00', 'light': 1, 'temperature': float(i), 'humidity': 50.0
+        })
+        assert ok
+    return client
+
+
+def all_ids(client, descending=False):
+    direction = 'desc' if descending else 'asc'
+    rows = client.select('maintable2', columns=SELECT, order=f'created_at.{direction},id.{direction}')
+    return [row['id'] for row in rows]
+
+
+@pytest.mark.parametrize('descending', [False, True])
+def test_pages_continue_across_page_limit(client, descending):
+    pages = list(client.select_pages('maintable2', columns=SELECT, descending=descending, page_size=4))
+    assert [len(page) for page in pages] == [4, 4, 1]
+    assert [row['id'] for page in pages for row in page] == all_ids(client, descending)
+
+
+def test_frame_pages_continue_across_page_limit(client):
+    pages = list(client.select_pages('maintable2', columns=SELECT, page_size=4, as_frame=True))
+    frame = pd.concat(pages)
+    assert frame['id'].tolist() == all_ids(client)
+    assert frame['created_at'].is_monotonic_increasing
+
+
+def test_after_cursor_inside_tied_timestamps(client):
+    ids = all_ids(client)
+    rows = client.select('maintable2', columns=SELECT, filters={'id': f'eq.{ids[2]}'})
+    after = (rows[0]['created_at'], rows[0]['id'])
+    pages = client.select_pages('maintable2', columns=SELECT, page_size=4, after=after)
+    assert [row['id'] for page in pages for row in page] == ids[3:]
+
+
+def test_exact_multiple_of_page_size_ends(client):
+    pages = list(client.select_pages('maintable2', columns=SELECT, page_size=3))
+    assert [len(page) for page in pages] == [3, 3, 3]